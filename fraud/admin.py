@@ -0,0 +1,17 @@
+"""
+Module: Django admin registration for fraud rule configuration.
+"""
+
+from django.contrib import admin
+
+from .models import FraudRuleConfig
+
+
+@admin.register(FraudRuleConfig)
+class FraudRuleConfigAdmin(admin.ModelAdmin):
+    """Edit rule thresholds and toggle rules; changes reach every worker
+    on its next request."""
+
+    list_display = ("rule", "enabled", "shadow", "thresholds", "updated_at")
+    list_editable = ("enabled", "shadow")
+    search_fields = ("rule",)
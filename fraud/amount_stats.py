@@ -0,0 +1,183 @@
+"""
+Module: Per-user running statistics of requested loan amounts.
+
+Each loan creation folds its amount into the applicant's
+``UserLoanStats`` row with one UPDATE. Welford's recurrence is written
+as F-expressions over the row's current values, so concurrent creations
+for the same user serialize on the row lock and never lose an update.
+Every right-hand side sees the pre-update row, giving:
+
+    count' = count + 1
+    mean'  = mean + (x - mean) / (count + 1)
+    m2'    = m2 + (x - mean)^2 * count / (count + 1)
+
+The amount z-score rule reads the row by primary key and removes the
+loan being evaluated from the statistics (the inverse recurrence), so a
+loan is compared with the user's other loans only. Each loan records
+whether it was folded in (``LoanApplication.in_amount_stats``), so
+loans created before the stats or outside the create view are never
+removed from a row that does not hold them. ``rebuild_amount_stats``
+recomputes every row from the loans and marks them all as folded in.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from loan.models import LoanApplication
+
+from .models import UserLoanStats
+
+STATS_FIELDS = ("count", "mean", "m2")
+logger: logging.Logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+def _fold(loan: LoanApplication) -> None:
+    x = float(loan.amount)
+    delta = Value(x) - F("mean")
+    updated = UserLoanStats.objects.filter(pk=loan.user_id).update(
+        count=F("count") + 1,
+        mean=F("mean") + delta / (F("count") + 1),
+        m2=F("m2") + delta * delta * F("count") / (F("count") + 1),
+        max_amount=Greatest("max_amount", Value(loan.amount)),
+    )
+    if updated:
+        return
+    _, created = UserLoanStats.objects.get_or_create(
+        pk=loan.user_id,
+        defaults={
+            "count": 1,
+            "mean": x,
+            "m2": 0.0,
+            "max_amount": loan.amount,
+        },
+    )
+    if not created:  # Another transaction created the row first
+        _fold(loan)
+
+
+def record_loan_amount(loan: LoanApplication) -> None:
+    """Fold a newly created loan's amount into its applicant's stats and
+    mark the loan as folded in; a loan already folded in is skipped.
+
+    Call inside the transaction creating the loan, so the stats change
+    commits or rolls back with it.
+
+    Args:
+        loan (LoanApplication): The saved loan.
+    """
+    if loan.in_amount_stats:
+        return
+    LoanApplication.objects.filter(pk=loan.pk).update(in_amount_stats=True)
+    loan.in_amount_stats = True
+    _fold(loan)
+
+
+def empty_amount_stats() -> Dict[str, Any]:
+    """Statistics of a user with no other loans."""
+    return {"count": 0, "mean": 0.0, "std": 0.0}
+
+
+def prior_amount_stats(
+    included: bool, amount: Any, row: Optional[Mapping[str, Any]]
+) -> Dict[str, Any]:
+    """Statistics of the applicant's loans other than the one evaluated.
+
+    Args:
+        included: Whether the evaluated loan is folded into ``row``.
+        amount: Its requested amount.
+        row: The applicant's ``STATS_FIELDS``, or None without a row.
+
+    Returns:
+        Dict[str, Any]: ``count``, ``mean`` and sample ``std`` of the
+        other loans' amounts.
+    """
+    if row is None or not row["count"]:
+        return empty_amount_stats()
+    count, mean, m2 = row["count"], row["mean"], row["m2"]
+    if included:  # Undo the loan's Welford step
+        if count == 1:
+            return empty_amount_stats()
+        x = float(amount)
+        before = (count * mean - x) / (count - 1)
+        m2 -= (x - before) * (x - mean)
+        count, mean = count - 1, before
+    std = math.sqrt(max(m2, 0.0) / (count - 1)) if count > 1 else 0.0
+    return {"count": count, "mean": mean, "std": std}
+
+
+def _rebuild_users(user_ids: List[int]) -> int:
+    """Recompute some users' rows in one transaction.
+
+    The rows are locked before the loans are read. ``record_loan_amount``
+    updates the same rows after writing a loan, so a concurrent loan is
+    either read here or folded into the rebuilt row.
+
+    Returns:
+        int: Number of rows written.
+    """
+    with transaction.atomic():
+        users = list(
+            User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+        )
+        UserLoanStats.objects.bulk_create(
+            [UserLoanStats(pk=user_id) for user_id in users],
+            ignore_conflicts=True,
+        )
+        list(
+            UserLoanStats.objects.select_for_update()
+            .filter(pk__in=users)
+            .values_list("pk", flat=True)
+        )
+        rows = {user_id: UserLoanStats(pk=user_id) for user_id in users}
+        loan_ids: List[int] = []
+        amounts: Dict[int, List[Decimal]] = defaultdict(list)
+        for loan_id, user_id, amount in LoanApplication.objects.filter(
+            user_id__in=users
+        ).values_list("pk", "user_id", "amount"):
+            loan_ids.append(loan_id)
+            amounts[user_id].append(amount)
+        for user_id, values in amounts.items():
+            row = rows[user_id]
+            for amount in values:
+                x = float(amount)
+                row.count += 1
+                delta = x - row.mean
+                row.mean += delta / row.count
+                row.m2 += delta * (x - row.mean)
+            row.max_amount = max(values)
+        UserLoanStats.objects.bulk_update(
+            rows.values(), ["count", "mean", "m2", "max_amount"]
+        )
+        LoanApplication.objects.filter(pk__in=loan_ids).update(
+            in_amount_stats=True
+        )
+    return len(rows)
+
+
+def rebuild_amount_stats(chunk_size: int = 2000) -> int:
+    """Recompute every user's amount statistics from their loans.
+
+    Users are rebuilt ``chunk_size`` at a time, each chunk in its own
+    transaction holding the chunk's rows, and every loan read is marked
+    as folded in. Run it once after deploying the statistics, and to
+    cover loans created outside the create view.
+
+    Returns:
+        int: Number of rows written.
+    """
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    written = sum(
+        _rebuild_users(user_ids[start:start + chunk_size])
+        for start in range(0, len(user_ids), chunk_size)
+    )
+    logger.info("Rebuilt amount stats of %s users", written)
+    return written
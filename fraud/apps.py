@@ -3,6 +3,7 @@ Module: App configuration for the fraud detection component.
 """
 
 from django.apps import AppConfig
+from django.core import checks
 
 
 class FraudConfig(AppConfig):
@@ -13,5 +14,8 @@ class FraudConfig(AppConfig):
 
     def ready(self) -> None:
         """Called when Django starts; imports signal handlers for fraud
-        checks."""
+        checks and registers the lane cache system check."""
         import fraud.signals  # noqa: F401
+        from fraud.lanes import check_lane_cache
+
+        checks.register(check_lane_cache, checks.Tags.caches)
@@ -0,0 +1,392 @@
+"""
+Module: Incremental clustering of linked accounts for ring detection.
+
+Accounts are linked when they share an email domain, a public client
+address (recorded at registration and on every loan), or a
+near-duplicate loan purpose (at least ``PURPOSE_LINK_BUCKETS`` shared
+LSH buckets, see fraud.purpose_lsh). Linked accounts are merged in a
+disjoint-set forest persisted in ``UserCluster``: ``find`` follows
+parent pointers with path compression and ``union`` attaches the
+smaller tree under the larger one, so a lookup touches O(α(n)) nodes
+and every tree level costs one query. Roots carry the cluster's size
+and loan totals.
+
+Free mail providers (``FRAUD_CLUSTER_IGNORED_DOMAINS``) and
+non-public addresses (private, loopback, proxies) are not evidence of
+a link and are ignored. Behind a reverse proxy every request comes
+from the proxy's address, so ``FRAUD_CLIENT_IP_HEADER`` names the
+header the proxy puts the client address in. ``rebuild_clusters``
+recomputes the forest from scratch in memory.
+"""
+
+import ipaddress
+import logging
+from collections import Counter, defaultdict
+from decimal import Decimal
+from typing import (Any, Dict, Iterable, List, Optional, Set, Tuple,
+                    TypeGuard, Union)
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+from loan.models import LoanApplication
+from users.models import UserProfile, normalize_email_domain
+
+from .models import PurposeBucket, UserCluster
+from .purpose_lsh import similar_purposes
+
+PURPOSE_LINK_BUCKETS: int = 4  # Shared purpose buckets linking two users
+UNION_RETRIES: int = 5  # Attempts when a concurrent union moves a root
+MAX_BUCKET_USERS: int = 500  # Larger purpose buckets are skipped on rebuild
+logger: logging.Logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+def client_ip(request: Union[HttpRequest, Request]) -> Optional[str]:
+    """Return the request's client address, or None if missing or
+    malformed.
+
+    The address is ``REMOTE_ADDR``, or with ``FRAUD_CLIENT_IP_HEADER``
+    set, the last entry of that header: the one the trusted proxy
+    appended.
+    """
+    header = getattr(settings, "FRAUD_CLIENT_IP_HEADER", "")
+    value = request.META.get(header or "REMOTE_ADDR") or ""
+    try:
+        return str(ipaddress.ip_address(value.split(",")[-1].strip()))
+    except ValueError:
+        return None
+
+
+def linkable_ip(address: Optional[str]) -> TypeGuard[str]:
+    """Whether an address is public, and so evidence of a link."""
+    if not address:
+        return False
+    return ipaddress.ip_address(address).is_global
+
+
+def linkable_domain(domain: str) -> bool:
+    """Whether an email domain is evidence of a link."""
+    ignored = getattr(settings, "FRAUD_CLUSTER_IGNORED_DOMAINS", ())
+    return bool(domain) and domain not in ignored
+
+
+def _ensure_node(user_id: int) -> None:
+    UserCluster.objects.get_or_create(
+        user_id=user_id, defaults={"parent": user_id}
+    )
+
+
+def find_roots(user_ids: Iterable[int]) -> Dict[int, UserCluster]:
+    """Return each user's cluster root, compressing the paths walked.
+
+    Nodes are fetched one tree level at a time for all users together.
+    Users without a node get an unsaved singleton root. A parent that
+    no longer exists (deleted user) makes its child a root again.
+
+    Returns:
+        Dict[int, UserCluster]: Root node keyed by user id.
+    """
+    wanted = set(user_ids)
+    nodes: Dict[int, UserCluster] = {}
+    pending = set(wanted)
+    while pending:
+        fetched = UserCluster.objects.in_bulk(pending)
+        nodes.update(fetched)
+        pending = {
+            node.parent
+            for node in fetched.values()
+            if node.parent not in nodes
+        }
+    roots: Dict[int, UserCluster] = {}
+    compress: Dict[int, Set[int]] = defaultdict(set)
+    orphans: Set[int] = set()
+    for user_id in wanted:
+        node = nodes.get(user_id)
+        if node is None:
+            roots[user_id] = UserCluster(user_id=user_id, parent=user_id)
+            continue
+        path: List[int] = []
+        while node.parent != node.pk:
+            if node.parent not in nodes:
+                orphans.add(node.pk)
+                node.parent = node.pk
+                break
+            path.append(node.pk)
+            node = nodes[node.parent]
+        roots[user_id] = node
+        compress[node.pk].update(path[:-1])
+    for root, members in compress.items():
+        if members:
+            UserCluster.objects.filter(pk__in=members).update(parent=root)
+    if orphans:
+        logger.warning("Re-rooting cluster nodes %s", sorted(orphans))
+        UserCluster.objects.filter(pk__in=orphans).update(parent=F("pk"))
+    return roots
+
+
+def union(first: int, second: int) -> Optional[int]:
+    """Merge the clusters of two users, smaller under larger.
+
+    Returns:
+        Optional[int]: The merged root's user id, or None if concurrent
+        merges kept moving the roots.
+    """
+    _ensure_node(first)
+    _ensure_node(second)
+    for _ in range(UNION_RETRIES):
+        roots = find_roots([first, second])
+        a, b = roots[first].pk, roots[second].pk
+        if a == b:
+            return a
+        with transaction.atomic():
+            locked = list(
+                UserCluster.objects.select_for_update()
+                .filter(pk__in=[a, b])
+                .order_by("pk")
+            )
+            if len(locked) < 2 or any(
+                node.parent != node.pk for node in locked
+            ):
+                continue  # Another union moved a root; look again
+            big, small = sorted(locked, key=lambda node: -node.size)
+            UserCluster.objects.filter(pk=small.pk).update(parent=big.pk)
+            UserCluster.objects.filter(pk=big.pk).update(
+                size=F("size") + small.size,
+                loan_count=F("loan_count") + small.loan_count,
+                loan_amount=F("loan_amount") + small.loan_amount,
+            )
+            return big.pk
+    logger.warning("Gave up linking users %s and %s", first, second)
+    return None
+
+
+def _add_loan(user_id: int, amount: Decimal) -> None:
+    """Add one loan to the totals of the user's cluster root."""
+    for _ in range(UNION_RETRIES):
+        root = find_roots([user_id])[user_id].pk
+        updated = UserCluster.objects.filter(pk=root, parent=root).update(
+            loan_count=F("loan_count") + 1,
+            loan_amount=F("loan_amount") + amount,
+        )
+        if updated:
+            return
+    logger.warning("Could not add a loan to user %s's cluster", user_id)
+
+
+def _users_with_ip(address: str, exclude: int) -> List[int]:
+    """One other user seen at ``address`` at registration and one seen on
+    a loan; every such user is already in the same cluster."""
+    found: List[int] = []
+    for queryset in (
+        UserProfile.objects.filter(registration_ip=address),
+        LoanApplication.objects.filter(ip_address=address),
+    ):
+        user_id = (
+            queryset.exclude(user_id=exclude)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if user_id is not None:
+            found.append(user_id)
+    return found
+
+
+def link_registration(user: AbstractBaseUser, address: Optional[str]) -> None:
+    """Record a new account's address and link it by domain and
+    address.
+
+    Args:
+        user (AbstractBaseUser): The saved user.
+        address: Client address of the registration request.
+    """
+    with transaction.atomic():
+        UserProfile.objects.filter(user_id=user.pk).update(
+            registration_ip=address
+        )
+        _ensure_node(user.pk)
+        others: List[int] = []
+        domain = normalize_email_domain(
+            getattr(user, "email", "")  # type: ignore[arg-type]
+        )
+        if linkable_domain(domain):
+            other = (
+                UserProfile.objects.filter(email_domain=domain)
+                .exclude(user_id=user.pk)
+                .values_list("user_id", flat=True)
+                .first()
+            )
+            if other is not None:
+                others.append(other)
+        if linkable_ip(address):
+            others.extend(_users_with_ip(address, user.pk))
+        for other in others:
+            union(user.pk, other)
+
+
+def link_loan(loan: LoanApplication) -> None:
+    """Link a new loan's applicant by address and purpose, and add the
+    loan to the cluster totals; call inside the creating transaction
+    after the purpose is indexed."""
+    _ensure_node(loan.user_id)
+    others: List[int] = []
+    if linkable_ip(loan.ip_address):
+        others.extend(_users_with_ip(loan.ip_address, loan.user_id))
+    matches = similar_purposes([loan])[loan.pk]
+    others.extend(
+        user_id
+        for user_id, shared in matches.items()
+        if shared >= PURPOSE_LINK_BUCKETS
+    )
+    for other in others:
+        union(loan.user_id, other)
+    _add_loan(loan.user_id, loan.amount)
+
+
+def node_stats(root: UserCluster) -> Dict[str, Any]:
+    """Cluster totals held by a root node."""
+    return {
+        "size": root.size,
+        "loan_count": root.loan_count,
+        "loan_amount": root.loan_amount,
+    }
+
+
+def cluster_stats(user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Size and loan totals of each user's cluster.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: ``size``, ``loan_count`` and
+        ``loan_amount`` keyed by user id.
+    """
+    return {
+        user_id: node_stats(root)
+        for user_id, root in find_roots(user_ids).items()
+    }
+
+
+class DisjointSet:
+    """In-memory union-find with path compression and union by size."""
+
+    def __init__(self) -> None:
+        self.parent: Dict[int, int] = {}
+        self.size: Dict[int, int] = {}
+
+    def add(self, item: int) -> None:
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, first: int, second: int) -> None:
+        a, b = self.find(first), self.find(second)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+def _link_anchors(
+    forest: DisjointSet, pairs: Iterable[Tuple[int, Optional[str]]]
+) -> None:
+    """Union every user with the first user seen with the same key."""
+    anchors: Dict[str, int] = {}
+    for user_id, key in pairs:
+        if key is None:
+            continue
+        forest.union(anchors.setdefault(key, user_id), user_id)
+
+
+def rebuild_clusters(chunk_size: int = 2000) -> Tuple[int, int]:
+    """Recompute every cluster from profiles, loans and purpose buckets.
+
+    Purpose buckets shared by more than ``MAX_BUCKET_USERS`` users hold
+    boilerplate rather than copied purposes; comparing every loan in
+    them with every other would be quadratic, so they are skipped.
+
+    Returns:
+        Tuple[int, int]: Number of accounts and of clusters.
+    """
+    forest = DisjointSet()
+    for user_id in User.objects.values_list("pk", flat=True).iterator(
+        chunk_size=chunk_size
+    ):
+        forest.add(user_id)
+    profiles = list(
+        UserProfile.objects.values_list(
+            "user_id", "email_domain", "registration_ip"
+        ).iterator(chunk_size=chunk_size)
+    )
+    _link_anchors(
+        forest,
+        (
+            (user_id, f"domain:{domain}" if linkable_domain(domain) else None)
+            for user_id, domain, _ip in profiles
+        ),
+    )
+    ip_keys: List[Tuple[int, Optional[str]]] = [
+        (user_id, ip if linkable_ip(ip) else None)
+        for user_id, _domain, ip in profiles
+    ]
+    loans: Counter = Counter()
+    amounts: Dict[int, Decimal] = defaultdict(Decimal)
+    for user_id, ip, amount in LoanApplication.objects.values_list(
+        "user_id", "ip_address", "amount"
+    ).iterator(chunk_size=chunk_size):
+        loans[user_id] += 1
+        amounts[user_id] += amount
+        ip_keys.append((user_id, ip if linkable_ip(ip) else None))
+    _link_anchors(forest, ((u, f"ip:{ip}") for u, ip in ip_keys if ip))
+
+    bucket_users: Dict[int, Set[int]] = defaultdict(set)
+    loan_buckets: Dict[int, Tuple[int, List[int]]] = {}
+    for loan_id, user_id, bucket in PurposeBucket.objects.values_list(
+        "loan_id", "user_id", "bucket"
+    ).iterator(chunk_size=chunk_size):
+        bucket_users[bucket].add(user_id)
+        loan_buckets.setdefault(loan_id, (user_id, []))[1].append(bucket)
+    for user_id, buckets in loan_buckets.values():
+        shared: Counter = Counter()
+        for bucket in buckets:
+            if len(bucket_users[bucket]) <= MAX_BUCKET_USERS:
+                shared.update(bucket_users[bucket] - {user_id})
+        for other, count in shared.items():
+            if count >= PURPOSE_LINK_BUCKETS:
+                forest.union(user_id, other)
+
+    totals: Dict[int, List[Any]] = defaultdict(lambda: [0, Decimal("0")])
+    for user_id in forest.parent:
+        root = forest.find(user_id)
+        totals[root][0] += loans[user_id]
+        totals[root][1] += amounts[user_id]
+    nodes = []
+    for user_id in forest.parent:
+        root = forest.find(user_id)
+        is_root = root == user_id
+        nodes.append(
+            UserCluster(
+                user_id=user_id,
+                parent=root,
+                size=forest.size[root] if is_root else 1,
+                loan_count=totals[root][0] if is_root else 0,
+                loan_amount=totals[root][1] if is_root else 0,
+            )
+        )
+    with transaction.atomic():
+        UserCluster.objects.all().delete()
+        UserCluster.objects.bulk_create(nodes, batch_size=chunk_size)
+    return len(nodes), len(totals)
@@ -0,0 +1,207 @@
+"""
+Module: Database-backed fraud rule configuration with a versioned
+in-process cache.
+
+Admins edit ``FraudRuleConfig`` rows. Every change bumps a single version
+stamp in the shared cache once its transaction commits. Each worker keeps
+its built engines (live, plus shadow when any rule is in shadow mode) in
+memory and rebuilds them only when the stamp changes.
+A request therefore costs one small cache read and no query, and a
+change reaches every worker on its next request.
+"""
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .engine import REVIEW_AMOUNT_THRESHOLD, RULE_TIMEOUT, FraudEngine
+from .rules import RULE_REGISTRY, check_threshold
+
+CONFIG_VERSION_KEY: str = "fraud.rule_config.version"
+REVIEW_CONFIG: str = "review"  # Pseudo-rule holding the review cutoff
+logger: logging.Logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cached: Optional[
+    Tuple[Any, Tuple[FraudEngine, Optional[FraudEngine]]]
+] = None
+
+
+def validate_rule_config(rule: str, thresholds: Mapping[str, Any]) -> None:
+    """Check that ``thresholds`` can be applied to ``rule``.
+
+    Raises:
+        ValidationError: For an unknown rule or threshold name, or a
+            threshold value of the wrong type.
+    """
+    if not isinstance(thresholds, Mapping):
+        raise ValidationError({"thresholds": "Must be a JSON object."})
+    if rule == REVIEW_CONFIG:
+        unknown = set(thresholds) - {"amount"}
+        if unknown:
+            raise ValidationError(
+                {"thresholds": f"Unknown thresholds: {sorted(unknown)}"}
+            )
+        if "amount" in thresholds:
+            try:
+                check_threshold(
+                    "the review cutoff",
+                    "amount",
+                    REVIEW_AMOUNT_THRESHOLD,
+                    thresholds["amount"],
+                )
+            except ValueError as exc:
+                raise ValidationError({"thresholds": str(exc)})
+        return
+    rule_cls = RULE_REGISTRY.get(rule)
+    if rule_cls is None:
+        raise ValidationError({"rule": f"Unknown fraud rule: {rule}"})
+    try:
+        rule_cls(**thresholds)
+    except ValueError as exc:
+        raise ValidationError({"thresholds": str(exc)})
+
+
+def bump_config_version() -> None:
+    """Publish a new config version so every worker reloads."""
+    cache.set(CONFIG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def config_version() -> str:
+    """Current config version, minting one if the cache lost it."""
+    version = cache.get(CONFIG_VERSION_KEY)
+    if version is None:
+        cache.add(CONFIG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(CONFIG_VERSION_KEY)
+    return version
+
+
+@dataclass
+class RuleConfig:
+    """Effective rule configuration after merging settings and rows.
+
+    Attributes:
+        thresholds: Threshold overrides keyed by rule name.
+        disabled: Rules evaluated nowhere.
+        shadow: Rules evaluated only in shadow mode.
+        review_amount: Unflagged loans above this stay PENDING.
+    """
+
+    thresholds: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    disabled: Set[str] = field(default_factory=set)
+    shadow: Set[str] = field(default_factory=set)
+    review_amount: int = REVIEW_AMOUNT_THRESHOLD
+
+
+def load_rule_config() -> RuleConfig:
+    """Merge rule class defaults, settings and database configuration.
+
+    Rows that fail validation, e.g. saved with a threshold of the wrong
+    type, are logged and skipped.
+    """
+    from .models import FraudRuleConfig
+
+    config = RuleConfig(
+        thresholds={
+            name: dict(values)
+            for name, values in (
+                getattr(settings, "FRAUD_RULE_THRESHOLDS", None) or {}
+            ).items()
+        },
+        shadow={name for name, cls in RULE_REGISTRY.items() if cls.shadow},
+    )
+    for row in FraudRuleConfig.objects.all():
+        try:
+            validate_rule_config(row.rule, row.thresholds)
+        except ValidationError as exc:
+            # One bad row must not break every evaluation
+            logger.error(
+                "Ignoring invalid fraud rule config %r: %s",
+                row.rule,
+                "; ".join(exc.messages),
+            )
+            continue
+        if row.rule == REVIEW_CONFIG:
+            config.review_amount = row.thresholds.get(
+                "amount", config.review_amount
+            )
+            continue
+        if not row.enabled:
+            config.disabled.add(row.rule)
+        if row.shadow is not None:
+            if row.shadow:
+                config.shadow.add(row.rule)
+            else:
+                config.shadow.discard(row.rule)
+        config.thresholds.setdefault(row.rule, {}).update(row.thresholds)
+    return config
+
+
+def build_engines() -> Tuple[FraudEngine, Optional[FraudEngine]]:
+    """Build the live engine and, if any rule is in shadow mode, the
+    shadow engine from the current configuration."""
+    config = load_rule_config()
+    live = FraudEngine.from_registry(
+        thresholds=config.thresholds,
+        exclude=config.disabled | config.shadow,
+        review_amount=config.review_amount,
+        short_circuit=getattr(settings, "FRAUD_SHORT_CIRCUIT", True),
+        max_workers=getattr(settings, "FRAUD_RULE_WORKERS", 0),
+        timeout=getattr(settings, "FRAUD_RULE_TIMEOUT", RULE_TIMEOUT),
+        timeout_outcome=getattr(
+            settings, "FRAUD_RULE_TIMEOUT_OUTCOME", "pass"
+        ),
+    )
+    shadow_names = config.shadow - config.disabled
+    if not shadow_names:
+        return live, None
+    shadow = FraudEngine.from_registry(
+        thresholds=config.thresholds,
+        exclude=set(RULE_REGISTRY) - shadow_names,
+        review_amount=config.review_amount,
+        short_circuit=False,
+    )
+    return live, shadow
+
+
+def _engines() -> Tuple[FraudEngine, Optional[FraudEngine]]:
+    """Return this worker's engines, rebuilding them after a config
+    change.
+
+    The cache key includes the settings the engines read, so overriding
+    them (as tests do) also triggers a rebuild.
+    """
+    global _cached
+    key = (
+        config_version(),
+        getattr(settings, "FRAUD_SHORT_CIRCUIT", True),
+        getattr(settings, "FRAUD_RULE_THRESHOLDS", None),
+        getattr(settings, "FRAUD_RULE_WORKERS", 0),
+        getattr(settings, "FRAUD_RULE_TIMEOUT", RULE_TIMEOUT),
+        getattr(settings, "FRAUD_RULE_TIMEOUT_OUTCOME", "pass"),
+    )
+    cached = _cached
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _lock:
+        if _cached is None or _cached[0] != key:
+            _cached = (key, build_engines())
+            logger.info("Loaded fraud rule config version %s", key[0])
+        return _cached[1]
+
+
+def current_engine() -> FraudEngine:
+    """Return this worker's live engine."""
+    return _engines()[0]
+
+
+def current_shadow_engine() -> Optional[FraudEngine]:
+    """Return this worker's shadow engine, or None without shadow
+    rules."""
+    return _engines()[1]
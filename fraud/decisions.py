@@ -0,0 +1,228 @@
+"""
+Module: Compact fraud decision records and their offline replay.
+
+Every evaluation that writes a loan's outcome also writes one
+FraudDecisionRecord in the same transaction. The record holds the
+feature values the engine loaded, the version of the engine
+configuration, the resulting status with its reason codes, and the
+evaluation time. Configurations are stored once per version in
+FraudEngineConfig.
+
+``replay_decisions`` re-runs the engine over stored records without
+touching live tables. Each record's engine is rebuilt from its
+configuration, and rules read only the recorded features. Any database
+query during a replay is refused and the record is skipped. The replay
+reports records whose outcome differs, and the engine time per
+decision.
+"""
+
+import datetime
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from loan.models import LoanApplication
+
+from .engine import FraudDecision, FraudEngine
+from .models import FraudDecisionRecord, FraudEngineConfig, FraudReason
+from .reasons import reason_codes
+
+REPLAY_CHUNK_SIZE: int = 1000
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class ReplayQueryError(Exception):
+    """Raised when a replayed rule needs a feature missing from its
+    record, which would mean querying live tables."""
+
+
+def plain(value: Any) -> Any:
+    """Convert feature values to compact JSON: decimals become floats,
+    times ISO strings, keys strings and collections lists."""
+    if isinstance(value, Mapping):
+        return {str(key): plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [plain(item) for item in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _config_cache_key(version: str) -> str:
+    return f"fraud.engine_config.{version}"
+
+
+def store_engine_config(engine: FraudEngine) -> str:
+    """Make sure the engine's configuration is stored; return its
+    version. Stored versions are cached once committed."""
+    key = _config_cache_key(engine.version)
+    if cache.get(key) is None:
+        FraudEngineConfig.objects.get_or_create(
+            version=engine.version, defaults={"config": engine.describe()}
+        )
+        transaction.on_commit(lambda: cache.set(key, True, None))
+    return engine.version
+
+
+def build_records(
+    loans: Sequence[LoanApplication],
+    decisions: Mapping[int, FraudDecision],
+    engine: FraudEngine,
+    elapsed_us: int,
+) -> List[FraudDecisionRecord]:
+    """Unsaved decision records for evaluated loans.
+
+    Call inside the transaction writing the outcomes.
+
+    Args:
+        loans: The evaluated loans.
+        decisions: Their decisions, keyed by loan pk.
+        engine: The engine that made them.
+        elapsed_us: Evaluation time of each loan, in microseconds.
+    """
+    version = store_engine_config(engine)
+    codes = reason_codes(
+        reason
+        for decision in decisions.values()
+        for reason in decision.reasons
+    )
+    return [
+        FraudDecisionRecord(
+            loan_id=loan.pk,
+            config_version=version,
+            status=decisions[loan.pk].status,
+            reasons=[codes[reason] for reason in decisions[loan.pk].reasons],
+            features=plain(decisions[loan.pk].features),
+            elapsed_us=elapsed_us,
+        )
+        for loan in loans
+    ]
+
+
+@dataclass
+class ReplayResult:
+    """Outcome of replaying decision records.
+
+    Attributes:
+        replayed (int): Records evaluated again.
+        matched (int): Records whose status and reasons were reproduced.
+        mismatched (List[int]): Ids of records that came out differently.
+        skipped (int): Records with an unknown configuration or rule, or
+            missing the amount or another feature a rule needed.
+        engine_seconds (float): Time spent in the engine.
+        recorded_us (int): Sum of the replayed records' elapsed times.
+    """
+
+    replayed: int = 0
+    matched: int = 0
+    mismatched: List[int] = field(default_factory=list)
+    skipped: int = 0
+    engine_seconds: float = 0.0
+    recorded_us: int = 0
+
+    @property
+    def engine_us(self) -> float:
+        """Mean replayed engine time per decision, in microseconds."""
+        if not self.replayed:
+            return 0.0
+        return self.engine_seconds * 1e6 / self.replayed
+
+
+def _refuse_queries(execute: Any, sql: str, *args: Any) -> Any:
+    raise ReplayQueryError(sql)
+
+
+def _records(
+    after_id: int, chunk_size: int, limit: Optional[int]
+) -> Iterator[List[Any]]:
+    """Decision record rows in id order, in keyset-paged chunks."""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk = list(
+            FraudDecisionRecord.objects.filter(pk__gt=after_id)
+            .order_by("pk")
+            .values_list(
+                "pk",
+                "loan_id",
+                "config_version",
+                "status",
+                "reasons",
+                "features",
+                "elapsed_us",
+            )[:size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1][0]
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+def replay_decisions(
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    chunk_size: int = REPLAY_CHUNK_SIZE,
+) -> ReplayResult:
+    """Re-run the engine over stored decision records.
+
+    Args:
+        after_id: Replay records with ids above this.
+        limit: Replay at most this many records.
+        chunk_size: Records read per query.
+
+    Returns:
+        ReplayResult: Counts, differing record ids and timings.
+    """
+    configs = dict(FraudEngineConfig.objects.values_list("version", "config"))
+    texts = dict(FraudReason.objects.values_list("id", "text"))
+    engines: Dict[str, Optional[FraudEngine]] = {}
+    result = ReplayResult()
+    for chunk in _records(after_id, chunk_size, limit):
+        for pk, loan_id, version, status, codes, features, us in chunk:
+            if version not in engines:
+                engines[version] = _replay_engine(configs.get(version))
+            engine = engines[version]
+            if engine is None or "amount" not in features:
+                result.skipped += 1
+                continue
+            loan = LoanApplication(pk=loan_id, amount=features.get("amount"))
+            started = time.perf_counter()
+            try:
+                with connection.execute_wrapper(_refuse_queries):
+                    decision = engine.evaluate(loan, features)
+            except ReplayQueryError:
+                result.skipped += 1
+                continue
+            result.engine_seconds += time.perf_counter() - started
+            result.replayed += 1
+            result.recorded_us += us
+            expected = [texts.get(code) for code in codes]
+            if decision.status == status and decision.reasons == expected:
+                result.matched += 1
+            else:
+                result.mismatched.append(pk)
+    return result
+
+
+def _replay_engine(
+    config: Optional[Mapping[str, Any]],
+) -> Optional[FraudEngine]:
+    """Sequential engine for a stored configuration, or None."""
+    if config is None:
+        return None
+    try:
+        return FraudEngine.from_description(
+            config, prefetch=False, record_metrics=False
+        )
+    except KeyError:
+        logger.warning("Skipping decisions of unknown rules in %s", config)
+        return None
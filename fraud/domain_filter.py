@@ -0,0 +1,243 @@
+"""
+Module: Memory-mapped Bloom filter of disposable or blocked email domains.
+
+``manage.py build_domain_filter`` compiles a plain-text domain list into a
+single binary file:
+
+- a header (magic, version, hash count, bit count, domain count and
+  blob size);
+- the Bloom filter bit array;
+- ``count + 1`` little-endian uint64 offsets into the blob;
+- the sorted, UTF-8 encoded domains, concatenated.
+
+Each process maps the file read-only, so gunicorn workers share its pages
+and loading costs nothing up front. A replaced file is noticed within
+``STAT_INTERVAL`` seconds. Lookups test the Bloom filter first.
+The rare hits are confirmed by binary search over the sorted domains, so
+a false positive never reaches a flag.
+"""
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+MAGIC: bytes = b"FDBF"
+VERSION: int = 1
+DEFAULT_ERROR_RATE: float = 0.001  # Bloom false positive probability
+HEADER = struct.Struct("<4sHHQQQ")
+OFFSET = struct.Struct("<Q")
+STAT_INTERVAL: float = 1.0  # Seconds between checks for a replaced file
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def normalize_domain(value: str) -> str:
+    """Lowercase a domain list entry, dropping comments, a leading "@"
+    and trailing dots; blank entries become ""."""
+    return value.split("#", 1)[0].strip().lstrip("@").rstrip(".").lower()
+
+
+def _positions(domain: bytes, hashes: int, bits: int) -> Iterator[int]:
+    """Bit positions for ``domain`` by double hashing one digest."""
+    h1, h2 = struct.unpack(
+        "<QQ", hashlib.blake2b(domain, digest_size=16).digest()
+    )
+    h2 |= 1  # Odd step so positions never collapse onto one bit
+    for i in range(hashes):
+        yield (h1 + i * h2) % bits
+
+
+class DomainFilter:
+    """Read-only view of a compiled domain filter.
+
+    Args:
+        buffer: Bytes-like object holding the whole file, typically an
+            ``mmap``.
+
+    Raises:
+        ValueError: If the buffer is not a filter of a known version.
+    """
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        magic, version, hashes, bits, count, blob_size = HEADER.unpack_from(
+            buffer, 0
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a domain filter file")
+        self._buffer = buffer
+        self.hashes: int = hashes
+        self.bits: int = bits
+        self.count: int = count
+        self._bits_at: int = HEADER.size
+        self._offsets_at: int = self._bits_at + (bits + 7) // 8
+        self._blob_at: int = self._offsets_at + (count + 1) * OFFSET.size
+        if len(buffer) < self._blob_at + blob_size:
+            raise ValueError("Truncated domain filter file")
+
+    @classmethod
+    def open(cls, path: str) -> "DomainFilter":
+        """Map the file at ``path`` read-only."""
+        with open(path, "rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, domain: object) -> bool:
+        if not isinstance(domain, str) or not domain:
+            return False
+        encoded = domain.encode("utf-8")
+        return self.might_contain(encoded) and self._exact(encoded)
+
+    def might_contain(self, domain: bytes) -> bool:
+        """Bloom filter test: False is certain, True may be wrong."""
+        buffer = self._buffer
+        base = self._bits_at
+        for position in _positions(domain, self.hashes, self.bits):
+            if not buffer[base + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _domain(self, index: int) -> bytes:
+        at = self._offsets_at + index * OFFSET.size
+        (start,) = OFFSET.unpack_from(self._buffer, at)
+        (end,) = OFFSET.unpack_from(self._buffer, at + OFFSET.size)
+        return self._buffer[self._blob_at + start:self._blob_at + end]
+
+    def _exact(self, domain: bytes) -> bool:
+        """Binary search the sorted domains."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._domain(middle) < domain:
+                low = middle + 1
+            else:
+                high = middle
+        return low < self.count and self._domain(low) == domain
+
+    def matches(self, domain: str) -> bool:
+        """True if ``domain`` or any parent domain is listed, so a listed
+        ``mailinator.com`` also blocks ``eu.mailinator.com``."""
+        labels = domain.split(".")
+        return any(
+            ".".join(labels[i:]) in self
+            for i in range(max(len(labels) - 1, 1))
+        )
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def write_filter(
+    domains: Iterable[str],
+    path: str,
+    error_rate: float = DEFAULT_ERROR_RATE,
+) -> DomainFilter:
+    """Compile ``domains`` into a filter file at ``path``.
+
+    The file is written beside ``path`` and moved into place, so running
+    workers keep their current mapping until they pick up the new file.
+
+    Args:
+        domains: Normalized domains; duplicates are ignored.
+        path (str): Destination file.
+        error_rate (float): Target Bloom false positive probability.
+
+    Returns:
+        DomainFilter: The new filter, mapped from ``path``.
+    """
+    encoded: List[bytes] = sorted({d.encode("utf-8") for d in domains if d})
+    count = len(encoded)
+    bits = max(
+        64, math.ceil(-count * math.log(error_rate) / math.log(2) ** 2)
+    )
+    hashes = max(1, round(bits / max(count, 1) * math.log(2)))
+    bit_array = bytearray((bits + 7) // 8)
+    for domain in encoded:
+        for position in _positions(domain, hashes, bits):
+            bit_array[position >> 3] |= 1 << (position & 7)
+    offsets = [0]
+    for domain in encoded:
+        offsets.append(offsets[-1] + len(domain))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(
+            HEADER.pack(MAGIC, VERSION, hashes, bits, count, offsets[-1])
+        )
+        handle.write(bit_array)
+        handle.write(struct.pack(f"<{count + 1}Q", *offsets))
+        handle.write(b"".join(encoded))
+    os.replace(tmp_path, path)
+    return DomainFilter.open(path)
+
+
+_loaded: Optional[Tuple[str, Tuple[int, int, int], DomainFilter]] = None
+# Path, monotonic time of its last stat and the filter it answered
+_checked: Optional[Tuple[str, float, Optional[DomainFilter]]] = None
+_lock = threading.Lock()
+
+
+def _load(path: str) -> Optional[DomainFilter]:
+    """Map ``path`` unless it is already mapped, closing a replaced
+    mapping; None while the file is missing or unreadable."""
+    global _loaded
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if _loaded is None or _loaded[:2] != (path, version):
+        try:
+            domain_filter = DomainFilter.open(path)
+        except (OSError, ValueError):
+            logger.exception("Cannot load domain filter %s", path)
+            return None
+        if _loaded is not None:
+            _loaded[2].close()
+        _loaded = (path, version, domain_filter)
+    return _loaded[2]
+
+
+def get_domain_filter() -> Optional[DomainFilter]:
+    """Return this process's mapping of ``FRAUD_DOMAIN_FILTER_PATH``.
+
+    The file is stat'ed at most every ``STAT_INTERVAL`` seconds and
+    re-mapped when it was replaced; None is returned while it does not
+    exist. Do not keep the result: a replaced mapping is closed.
+    """
+    global _checked
+    path: str = settings.FRAUD_DOMAIN_FILTER_PATH
+    checked = _checked
+    now = time.monotonic()
+    if (
+        checked is not None
+        and checked[0] == path
+        and now - checked[1] < STAT_INTERVAL
+    ):
+        return checked[2]
+    with _lock:
+        domain_filter = _load(path)
+        _checked = (path, now, domain_filter)
+    return domain_filter
+
+
+def is_blocked_domain(domain: str) -> bool:
+    """True if ``domain`` is on the compiled blocklist."""
+    if not domain:
+        return False
+    domain_filter = get_domain_filter()
+    return domain_filter is not None and domain_filter.matches(domain)
+
+
+def read_domain_list(lines: Iterable[str]) -> Set[str]:
+    """Normalized domains from plain-text lines, one per line."""
+    return {domain for domain in map(normalize_domain, lines) if domain}
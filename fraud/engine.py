@@ -0,0 +1,390 @@
+"""
+Module: Cost-ordered fraud rule engine.
+
+The engine evaluates registered rules cheapest-first, loading each
+rule's features only when that rule runs, and can stop as soon as a
+loan's outcome is decided (any flag makes it FLAGGED). Each rule's
+feature loading and check are timed into ``fraud.metrics``.
+
+With ``max_workers`` set, rules that are not pure in-memory checks run
+concurrently on a bounded, process-wide thread pool. Database-backed
+features are prefetched on the calling thread first, so pool threads
+normally touch no connection; any they do open is closed after each
+task. Each pooled rule gets a timeout, after which the engine stops
+waiting and applies a fallback outcome, so one slow dependency cannot
+stall loan creation. Pooled rules resolve features in their own copy of
+the context, merged back only once the rule has finished, so a rule
+still running after its timeout never changes a decision's features.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import (Any, Dict, Iterable, List, Mapping, Optional, Sequence,
+                    Set, Tuple)
+
+from django.db import close_old_connections
+
+from loan.models import LoanApplication
+
+from . import metrics
+from .features import (CACHED_FEATURES, QUERY_FEATURES, FeatureTable,
+                       FraudContext, feature_closure, load_features_many)
+from .rules import COST_MEMORY, RULE_REGISTRY, FraudRule
+
+REVIEW_AMOUNT_THRESHOLD: int = 1000000  # Unflagged loans above stay PENDING
+RULE_TIMEOUT: float = 0.5  # Seconds a pooled rule may take by default
+TIMEOUT_OUTCOMES: Tuple[str, ...] = ("pass", "flag")
+TIMEOUT_REASON: str = "Fraud rule {name} timed out"
+logger: logging.Logger = logging.getLogger(__name__)
+
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Return the shared rule pool with ``max_workers`` threads,
+    creating it on first use."""
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="fraud-rule"
+            )
+            _executors[max_workers] = executor
+        return executor
+
+
+def _run_rule(
+    rule: FraudRule, context: FraudContext, record: bool = True
+) -> bool:
+    """Load a rule's features, run its check and record its latency."""
+    started = time.perf_counter()
+    flagged = rule.check(context.resolve(rule.inputs))
+    if record:
+        metrics.record_rule(
+            rule.name, flagged, time.perf_counter() - started
+        )
+    return flagged
+
+
+def _run_pooled_rule(
+    rule: FraudRule, context: FraudContext, record: bool = True
+) -> bool:
+    """Run a rule on a pool thread, releasing that thread's database
+    connections afterwards."""
+    try:
+        return _run_rule(rule, context, record)
+    finally:
+        close_old_connections()
+
+
+@dataclass
+class FraudDecision:
+    """Outcome of evaluating a loan against the rule set.
+
+    Attributes:
+        status (str): Resulting loan status (FLAGGED, PENDING or APPROVED).
+        reasons (List[str]): Flag reasons, in evaluation order.
+        features (Dict[str, Any]): Every feature value that was loaded.
+        evaluated (List[str]): Names of the rules that actually ran.
+    """
+
+    status: str
+    reasons: List[str] = field(default_factory=list)
+    features: Dict[str, Any] = field(default_factory=dict)
+    evaluated: List[str] = field(default_factory=list)
+
+
+class FraudEngine:
+    """Evaluate loans against an ordered set of fraud rules.
+
+    Args:
+        rules (Iterable[FraudRule]): Bound rule instances; sorted by cost,
+            keeping registration order between rules of equal cost.
+        review_amount (int): Unflagged loans above this stay PENDING.
+        short_circuit (bool): Stop at the first rule that flags.
+        prefetch (bool): Load every query feature the rules may need in
+            one annotated query the first time any of them is needed,
+            instead of one loader at a time, along with the cache-backed
+            features.
+        max_workers (int): Size of the thread pool for concurrent rule
+            evaluation; 0 evaluates rules sequentially.
+        timeout (float): Seconds a pooled rule may take, unless the rule
+            declares its own.
+        timeout_outcome (str): "pass" or "flag" for a rule that times
+            out, unless the rule declares its own.
+        record_metrics (bool): Time rules into ``fraud.metrics``; off
+            for offline replays.
+
+    Attributes:
+        version (str): Hash of ``describe()``, identifying the settings
+            that determine this engine's decisions.
+
+    Raises:
+        ValueError: If ``timeout_outcome`` is not "pass" or "flag".
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[FraudRule],
+        review_amount: int = REVIEW_AMOUNT_THRESHOLD,
+        short_circuit: bool = True,
+        prefetch: bool = True,
+        max_workers: int = 0,
+        timeout: float = RULE_TIMEOUT,
+        timeout_outcome: str = "pass",
+        record_metrics: bool = True,
+    ) -> None:
+        if timeout_outcome not in TIMEOUT_OUTCOMES:
+            raise ValueError(
+                f"Unknown fraud rule timeout outcome: {timeout_outcome}"
+            )
+        self.rules: List[FraudRule] = sorted(rules, key=attrgetter("cost"))
+        self.review_amount: int = review_amount
+        self.short_circuit: bool = short_circuit
+        self.max_workers: int = max_workers
+        self.timeout: float = timeout
+        self.timeout_outcome: str = timeout_outcome
+        self.record_metrics: bool = record_metrics
+        self.prefetch: Set[str] = (
+            feature_closure(self.inputs())
+            & (set(QUERY_FEATURES) | CACHED_FEATURES)
+            if prefetch
+            else set()
+        )
+        canonical = json.dumps(self.describe(), sort_keys=True)
+        digest = hashlib.sha1(canonical.encode()).hexdigest()
+        self.version: str = digest[:16]
+
+    @classmethod
+    def from_registry(
+        cls,
+        thresholds: Optional[Mapping[str, Mapping[str, Any]]] = None,
+        exclude: Iterable[str] = (),
+        **kwargs: Any,
+    ) -> "FraudEngine":
+        """Build an engine with every registered rule.
+
+        Args:
+            thresholds: Optional per-rule threshold overrides keyed by
+                rule name.
+            exclude: Names of rules to leave out.
+            **kwargs: Passed through to the constructor.
+        """
+        thresholds = thresholds or {}
+        rules = [
+            rule_cls(**thresholds.get(name, {}))
+            for name, rule_cls in RULE_REGISTRY.items()
+            if name not in exclude
+        ]
+        return cls(rules, **kwargs)
+
+    @classmethod
+    def from_description(
+        cls, description: Mapping[str, Any], **kwargs: Any
+    ) -> "FraudEngine":
+        """Rebuild an engine from ``describe()`` output.
+
+        Raises:
+            KeyError: If a described rule is no longer registered.
+        """
+        rules = [
+            RULE_REGISTRY[name](**params)
+            for name, params in description["rules"].items()
+        ]
+        return cls(
+            rules,
+            review_amount=description["review_amount"],
+            short_circuit=description["short_circuit"],
+            **kwargs,
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        """Rules with their thresholds, review cutoff and short-circuit
+        flag, as JSON-serializable data."""
+        return {
+            "rules": {rule.name: dict(rule.params) for rule in self.rules},
+            "review_amount": self.review_amount,
+            "short_circuit": self.short_circuit,
+        }
+
+    def evaluate(
+        self,
+        loan: LoanApplication,
+        features: Optional[Mapping[str, Any]] = None,
+    ) -> FraudDecision:
+        """Run the rules against a loan without persisting anything.
+
+        Args:
+            loan (LoanApplication): The loan to examine.
+            features: Feature values already known to the caller; they
+                are used instead of loading them again.
+
+        Returns:
+            FraudDecision: The resulting status, reasons and features.
+        """
+        context = FraudContext(loan, features, self.prefetch)
+        if self.max_workers > 0:
+            reasons, evaluated = self._run_concurrent(context)
+        else:
+            reasons, evaluated = self._run_sequential(context)
+        return FraudDecision(
+            status=self.decide(context.get("amount"), reasons),
+            reasons=reasons,
+            features=context.features,
+            evaluated=evaluated,
+        )
+
+    def _run_sequential(
+        self, context: FraudContext
+    ) -> Tuple[List[str], List[str]]:
+        """Run the rules one by one in cost order.
+
+        Returns:
+            Tuple[List[str], List[str]]: Flag reasons and the names of
+            the rules that ran.
+        """
+        reasons: List[str] = []
+        evaluated: List[str] = []
+        for rule in self.rules:
+            evaluated.append(rule.name)
+            if _run_rule(rule, context, self.record_metrics):
+                reasons.append(rule.reason_text)
+                if self.short_circuit:
+                    self._log_decided(context, rule)
+                    break
+        return reasons, evaluated
+
+    def _run_concurrent(
+        self, context: FraudContext
+    ) -> Tuple[List[str], List[str]]:
+        """Run in-memory rules inline, then the rest on the thread pool.
+
+        Results are collected in cost order, so reasons and the
+        short-circuit decision match sequential evaluation unless a
+        rule times out.
+
+        Returns:
+            Tuple[List[str], List[str]]: Flag reasons and the names of
+            the rules that ran.
+        """
+        reasons: List[str] = []
+        evaluated: List[str] = []
+        pooled: List[FraudRule] = []
+        context.load_prefetched()
+        for rule in self.rules:
+            if rule.cost > COST_MEMORY:
+                pooled.append(rule)
+                continue
+            evaluated.append(rule.name)
+            if _run_rule(rule, context, self.record_metrics):
+                reasons.append(rule.reason_text)
+                if self.short_circuit:
+                    self._log_decided(context, rule)
+                    return reasons, evaluated
+        executor = get_executor(self.max_workers)
+        started = time.monotonic()
+        forks = [(rule, context.fork()) for rule in pooled]
+        futures: List[Tuple[FraudRule, FraudContext, "Future[bool]"]] = [
+            (
+                rule,
+                fork,
+                executor.submit(
+                    _run_pooled_rule, rule, fork, self.record_metrics
+                ),
+            )
+            for rule, fork in forks
+        ]
+        for index, (rule, fork, future) in enumerate(futures):
+            evaluated.append(rule.name)
+            flagged, reason = self._result(rule, future, started)
+            if future.done() and not future.cancelled():
+                context.merge(fork)
+            if flagged:
+                reasons.append(reason)
+                if self.short_circuit:
+                    self._log_decided(context, rule)
+                    for _, _, pending in futures[index + 1:]:
+                        pending.cancel()
+                    break
+        return reasons, evaluated
+
+    def _result(
+        self, rule: FraudRule, future: "Future[bool]", started: float
+    ) -> Tuple[bool, str]:
+        """Wait for a pooled rule until its deadline.
+
+        Args:
+            rule (FraudRule): The rule the future is running.
+            future: The rule's pending result.
+            started (float): ``time.monotonic()`` when the rules were
+                submitted.
+
+        Returns:
+            Tuple[bool, str]: Whether the loan is flagged, and the reason
+            to record if so.
+        """
+        timeout = rule.timeout if rule.timeout is not None else self.timeout
+        remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            return future.result(timeout=remaining), rule.reason_text
+        except FutureTimeout:
+            future.cancel()
+            outcome = rule.timeout_outcome or self.timeout_outcome
+            logger.warning(
+                "Fraud rule %s timed out after %.3fs; treating as %s",
+                rule.name,
+                timeout,
+                outcome,
+            )
+            return outcome == "flag", TIMEOUT_REASON.format(name=rule.name)
+
+    def _log_decided(self, context: FraudContext, rule: FraudRule) -> None:
+        logger.debug(
+            "Loan id=%s decided by rule %s; skipping the rest",
+            context.loan.id,
+            rule.name,
+        )
+
+    def evaluate_many(
+        self,
+        loans: Sequence[LoanApplication],
+        known: Optional[FeatureTable] = None,
+    ) -> Dict[int, FraudDecision]:
+        """Evaluate many loans, loading their features with batch queries.
+
+        The number of round trips depends on the rule set, not on the
+        number of loans.
+
+        Args:
+            loans: The loans to examine.
+            known: Feature values already known to the caller, keyed by
+                loan pk; features known for every loan are not loaded.
+
+        Returns:
+            Dict[int, FraudDecision]: Decisions keyed by loan pk.
+        """
+        table = load_features_many(loans, self.inputs(), known)
+        return {loan.pk: self.evaluate(loan, table[loan.pk]) for loan in loans}
+
+    def inputs(self) -> Set[str]:
+        """Features read by the rules or by ``decide``."""
+        names = {"amount"}
+        for rule in self.rules:
+            names.update(rule.inputs)
+        return names
+
+    def decide(self, amount: Any, reasons: List[str]) -> str:
+        """Map flag reasons and amount to the resulting loan status."""
+        if reasons:
+            return "FLAGGED"
+        if amount > self.review_amount:
+            return "PENDING"
+        return "APPROVED"
@@ -0,0 +1,607 @@
+"""
+Module: Feature loaders for fraud detection rules.
+
+Rules declare the named inputs they need; the engine resolves them
+lazily through the loaders registered here, so a feature that no
+evaluated rule asks for never costs a cache lookup or a query.
+
+Database-backed features can also be registered as query features:
+annotations on the loan's own row. The first time a context needs
+any of them, it fetches all of them in one round trip. The user's
+email comes through a join, and the counts come from correlated
+subqueries. Features served from the cache (the recent loan count's
+sliding-window counters and the domain user count) are deliberately
+not query features, so prefetching never bypasses their caches; a
+prefetch loads them through their own loaders right after the query,
+still on the calling thread.
+"""
+
+import datetime
+import logging
+import threading
+from typing import (Any, Callable, Dict, Iterable, List, Mapping, Optional,
+                    Sequence, Set, Tuple)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from loan.models import LoanApplication
+from users.models import DomainUserCount, normalize_email_domain
+
+from . import metrics
+from .amount_stats import STATS_FIELDS, prior_amount_stats
+from .clusters import cluster_stats, node_stats
+from .domain_filter import is_blocked_domain
+from .models import UserCluster, UserLoanStats, UserRiskFeatures
+from .purpose_lsh import similar_purposes
+from .risk_features import FEATURE_FIELDS, prior_risk_features
+from .scoring import SCORE_INPUTS, score, score_many
+from .velocity import (created_at, empty_window_stats, recent_loan_count,
+                       recent_loan_counts, window_stats, window_stats_many,
+                       window_subqueries)
+
+CACHE_TTL_5_MIN: int = 300  # Cache TTL for 5 minutes
+logger: logging.Logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+class FraudContext:
+    """Evaluation state for a single loan with lazily loaded features.
+
+    Attributes:
+        loan (LoanApplication): The loan under evaluation.
+        features (Dict[str, Any]): Feature values resolved so far, seeded
+            with any values the caller already knows.
+    """
+
+    def __init__(
+        self,
+        loan: LoanApplication,
+        features: Optional[Mapping[str, Any]] = None,
+        prefetch: Iterable[str] = (),
+    ) -> None:
+        self.loan: LoanApplication = loan
+        self.features: Dict[str, Any] = dict(features or {})
+        if "email_domain" not in self.features and (
+            LoanApplication.user.is_cached(loan)  # type: ignore[attr-defined]
+        ):
+            # Already in memory; never worth a query
+            self.features["email_domain"] = normalize_email_domain(
+                loan.user.email  # type: ignore[attr-defined]
+            )
+        self.prefetch: Set[str] = set(prefetch) - set(self.features)
+        # Rules may run on several threads; each feature loads once
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def load_prefetched(self) -> None:
+        """Load every pending query feature now, in one query, then the
+        pending cache-backed features through their loaders."""
+        with self._lock(""):
+            pending = self.prefetch
+            if pending & set(QUERY_FEATURES):
+                self.features.update(load_query_features(self.loan, pending))
+            self.prefetch = set()
+        for name in sorted(pending - set(QUERY_FEATURES)):
+            self.get(name)
+
+    def get(self, name: str) -> Any:
+        """Return a feature value, loading and memoizing it on first use.
+
+        A feature listed in ``prefetch`` loads every prefetched query
+        feature at once; any other feature uses its own loader. Safe to
+        call from several threads.
+
+        Raises:
+            KeyError: If no loader is registered for ``name``.
+        """
+        if name in self.features:
+            return self.features[name]
+        if name in self.prefetch:
+            self.load_prefetched()
+        with self._lock(name):
+            if name not in self.features:
+                loader = FEATURE_LOADERS.get(name)
+                if loader is None:
+                    raise KeyError(f"Unknown fraud feature: {name}")
+                self.features[name] = loader(self)
+        return self.features[name]
+
+    def resolve(self, names: Iterable[str]) -> Dict[str, Any]:
+        """Return a mapping of the requested features."""
+        return {name: self.get(name) for name in names}
+
+    def fork(self) -> "FraudContext":
+        """Return a context for the same loan starting from a copy of
+        the features resolved so far, for a rule that may outlive the
+        evaluation."""
+        return FraudContext(self.loan, self.features, self.prefetch)
+
+    def merge(self, other: "FraudContext") -> None:
+        """Add the features ``other`` resolved that this context lacks."""
+        for name, value in other.features.items():
+            self.features.setdefault(name, value)
+
+
+FeatureLoader = Callable[[FraudContext], Any]
+FEATURE_LOADERS: Dict[str, FeatureLoader] = {}
+
+# Batch loaders fill one feature for many loans at once, keyed by loan pk.
+FeatureTable = Dict[int, Dict[str, Any]]
+BatchFeatureLoader = Callable[[Sequence[LoanApplication], FeatureTable], None]
+BATCH_FEATURE_LOADERS: Dict[
+    str, Tuple[BatchFeatureLoader, Tuple[str, ...]]
+] = {}
+
+# Query features: annotations built for a given "now", and a converter
+# from the annotated row to the feature value.
+Annotations = Callable[[datetime.datetime], Dict[str, Any]]
+RowConverter = Callable[[Mapping[str, Any]], Any]
+QUERY_FEATURES: Dict[str, Tuple[Annotations, RowConverter]] = {}
+# Cache-backed features with a database fallback, prefetched alongside
+# the query features so pool threads never run their fallback queries
+CACHED_FEATURES: Set[str] = {"recent_loan_count", "domain_user_count"}
+
+
+def register_feature(name: str) -> Callable[[FeatureLoader], FeatureLoader]:
+    """Register a loader computing the feature ``name`` for a context."""
+
+    def decorator(loader: FeatureLoader) -> FeatureLoader:
+        FEATURE_LOADERS[name] = loader
+        return loader
+
+    return decorator
+
+
+def register_batch_feature(
+    name: str, requires: Tuple[str, ...] = ()
+) -> Callable[[BatchFeatureLoader], BatchFeatureLoader]:
+    """Register a loader computing ``name`` for a list of loans.
+
+    Args:
+        name (str): Feature name, matching a per-loan loader.
+        requires (Tuple[str, ...]): Features the loader reads from the
+            table; they must be registered before this one.
+    """
+
+    def decorator(loader: BatchFeatureLoader) -> BatchFeatureLoader:
+        BATCH_FEATURE_LOADERS[name] = (loader, requires)
+        return loader
+
+    return decorator
+
+
+def register_query_feature(
+    name: str, annotations: Annotations
+) -> Callable[[RowConverter], RowConverter]:
+    """Register ``name`` as computable from annotations on the loan row.
+
+    Args:
+        name (str): Feature name, matching a per-loan loader.
+        annotations: Builds the expressions the converter reads, given
+            the evaluation time.
+    """
+
+    def decorator(converter: RowConverter) -> RowConverter:
+        QUERY_FEATURES[name] = (annotations, converter)
+        return converter
+
+    return decorator
+
+
+def load_query_features(
+    loan: LoanApplication, names: Iterable[str]
+) -> Dict[str, Any]:
+    """Load the requested query features with one annotated query.
+
+    Returns:
+        Dict[str, Any]: Feature values; empty if the loan row is gone,
+        leaving the per-loan loaders to answer.
+    """
+    now = timezone.now()
+    wanted = [name for name in names if name in QUERY_FEATURES]
+    expressions: Dict[str, Any] = {}
+    for name in wanted:
+        expressions.update(QUERY_FEATURES[name][0](now))
+    row = (
+        LoanApplication.objects.filter(pk=loan.pk)
+        .values(**expressions)
+        .first()
+    )
+    if row is None:
+        return {}
+    return {name: QUERY_FEATURES[name][1](row) for name in wanted}
+
+
+def feature_closure(names: Iterable[str]) -> Set[str]:
+    """``names`` plus every feature they require, as declared by the
+    batch loaders."""
+    wanted: Set[str] = set()
+    pending: List[str] = list(names)
+    while pending:
+        name = pending.pop()
+        if name in wanted:
+            continue
+        wanted.add(name)
+        if name in BATCH_FEATURE_LOADERS:
+            pending.extend(BATCH_FEATURE_LOADERS[name][1])
+    return wanted
+
+
+def load_features_many(
+    loans: Sequence[LoanApplication],
+    names: Iterable[str],
+    known: Optional[FeatureTable] = None,
+) -> FeatureTable:
+    """Load the requested features for many loans with batch loaders.
+
+    Features without a batch loader are left out; the engine falls back
+    to loading them per loan.
+
+    Args:
+        loans: The loans to load features for.
+        names: Features the caller needs.
+        known: Feature values the caller already has, keyed by loan pk;
+            a feature known for every loan is not loaded again.
+
+    Returns:
+        FeatureTable: Feature values keyed by loan pk.
+    """
+    wanted = feature_closure(names)
+    known = known or {}
+    table: FeatureTable = {
+        loan.pk: dict(known.get(loan.pk, {})) for loan in loans
+    }
+    for name, (loader, _requires) in BATCH_FEATURE_LOADERS.items():
+        if name in wanted and any(name not in row for row in table.values()):
+            loader(loans, table)
+    return table
+
+
+@register_feature("amount")
+def load_amount(context: FraudContext) -> Any:
+    """Requested loan amount; already in memory."""
+    return context.loan.amount
+
+
+@register_feature("recent_loan_count")
+def load_recent_loan_count(context: FraudContext) -> int:
+    """Number of loans the applicant created in the past 24 hours, served
+    by the sliding-window counters in fraud.velocity."""
+    return recent_loan_count(context.loan)
+
+
+@register_feature("loan_windows")
+def load_loan_windows(context: FraudContext) -> Dict[str, Any]:
+    """Applicant's loan counts over 1h/24h/7d and amount over 24h up to
+    the loan's creation, from one conditional aggregate query."""
+    return window_stats(context.loan.user_id, created_at(context.loan))
+
+
+@register_feature("amount_stats")
+def load_amount_stats(context: FraudContext) -> Dict[str, Any]:
+    """Count, mean and standard deviation of the applicant's other loan
+    amounts, from one UserLoanStats primary-key lookup."""
+    row = (
+        UserLoanStats.objects.filter(pk=context.loan.user_id)
+        .values(*STATS_FIELDS)
+        .first()
+    )
+    return prior_amount_stats(
+        context.loan.in_amount_stats, context.loan.amount, row
+    )
+
+
+@register_feature("purpose_matches")
+def load_purpose_matches(context: FraudContext) -> Dict[int, int]:
+    """Other users whose loan purposes are near-duplicates of this one,
+    with the number of LSH buckets shared, from one index query."""
+    return similar_purposes([context.loan])[context.loan.pk]
+
+
+@register_feature("cluster")
+def load_cluster(context: FraudContext) -> Dict[str, Any]:
+    """Size and loan totals of the applicant's linked-account cluster,
+    found in the UserCluster forest."""
+    return cluster_stats([context.loan.user_id])[context.loan.user_id]
+
+
+@register_feature("risk_features")
+def load_risk_features(context: FraudContext) -> Dict[str, Any]:
+    """Applicant's precomputed counts, exposure and application rate,
+    from one UserRiskFeatures primary-key lookup."""
+    row = (
+        UserRiskFeatures.objects.filter(pk=context.loan.user_id)
+        .values(*FEATURE_FIELDS)
+        .first()
+    )
+    return prior_risk_features(row, context.loan.status, context.loan.amount)
+
+
+@register_feature("email_domain")
+def load_email_domain(context: FraudContext) -> str:
+    """Normalized domain part of the applicant's email address."""
+    email: str = context.loan.user.email  # type: ignore[attr-defined]
+    return normalize_email_domain(email)
+
+
+@register_feature("blocked_domain")
+def load_blocked_domain(context: FraudContext) -> bool:
+    """Whether the applicant's email domain is on the compiled blocklist."""
+    return is_blocked_domain(context.get("email_domain"))
+
+
+@register_feature("domain_user_count")
+def load_domain_user_count(context: FraudContext) -> int:
+    """Number of users sharing the applicant's email domain.
+
+    Served from the cache, falling back to a DomainUserCount primary-key
+    lookup.
+    """
+    domain: str = context.get("email_domain")
+    cache_key_domain: str = f"fraud.domain_user_count_{domain}"
+    domain_user_count: Optional[int] = cache.get(cache_key_domain)
+    metrics.record_cache("domain_user_count", domain_user_count is not None)
+    if domain_user_count is None:
+        domain_user_count = (
+            DomainUserCount.objects.filter(pk=domain)
+            .values_list("user_count", flat=True)
+            .first()
+        ) or 0
+        cache.set(cache_key_domain, domain_user_count, CACHE_TTL_5_MIN)
+    return domain_user_count
+
+
+@register_feature("fraud_score")
+def load_fraud_score(context: FraudContext) -> Optional[float]:
+    """Fraud model probability, or None while no model is deployed."""
+    return score(context.resolve(SCORE_INPUTS))
+
+
+@register_batch_feature("amount")
+def load_amount_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """Requested amounts; already in memory."""
+    for loan in loans:
+        table[loan.pk]["amount"] = loan.amount
+
+
+@register_batch_feature("recent_loan_count")
+def load_recent_loan_count_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """One query counting each loan's prior 24 hours of applications."""
+    counts = recent_loan_counts(loans)
+    for loan in loans:
+        table[loan.pk]["recent_loan_count"] = counts[loan.pk]
+
+
+@register_batch_feature("loan_windows")
+def load_loan_windows_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """One query annotating every loan's row with its windows."""
+    stats = window_stats_many(loans)
+    for loan in loans:
+        table[loan.pk]["loan_windows"] = dict(stats[loan.pk])
+
+
+@register_batch_feature("amount_stats")
+def load_amount_stats_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """One UserLoanStats query for every applicant in the batch."""
+    rows: Dict[int, Dict[str, Any]] = {
+        row["pk"]: row
+        for row in UserLoanStats.objects.filter(
+            pk__in={loan.user_id for loan in loans}
+        ).values("pk", *STATS_FIELDS)
+    }
+    for loan in loans:
+        table[loan.pk]["amount_stats"] = prior_amount_stats(
+            loan.in_amount_stats, loan.amount, rows.get(loan.user_id)
+        )
+
+
+@register_batch_feature("purpose_matches")
+def load_purpose_matches_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """One bucket-index query for every purpose in the batch."""
+    matches = similar_purposes(loans)
+    for loan in loans:
+        table[loan.pk]["purpose_matches"] = matches[loan.pk]
+
+
+@register_batch_feature("cluster")
+def load_cluster_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """Walk every applicant's tree together, one query per tree level."""
+    stats = cluster_stats(loan.user_id for loan in loans)
+    for loan in loans:
+        table[loan.pk]["cluster"] = stats[loan.user_id]
+
+
+@register_batch_feature("risk_features")
+def load_risk_features_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """One UserRiskFeatures query for every applicant in the batch."""
+    rows: Dict[int, Dict[str, Any]] = {
+        row["pk"]: row
+        for row in UserRiskFeatures.objects.filter(
+            pk__in={loan.user_id for loan in loans}
+        ).values("pk", *FEATURE_FIELDS)
+    }
+    now = timezone.now()
+    for loan in loans:
+        table[loan.pk]["risk_features"] = prior_risk_features(
+            rows.get(loan.user_id), loan.status, loan.amount, now
+        )
+
+
+@register_batch_feature("email_domain")
+def load_email_domain_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """One query fetching the email of every applicant in the batch."""
+    emails: Dict[int, str] = dict(
+        User.objects.filter(
+            pk__in={loan.user_id for loan in loans}
+        ).values_list("pk", "email")
+    )
+    for loan in loans:
+        table[loan.pk]["email_domain"] = normalize_email_domain(
+            emails.get(loan.user_id, "")
+        )
+
+
+@register_batch_feature("blocked_domain", requires=("email_domain",))
+def load_blocked_domain_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """Blocklist lookups; memory only."""
+    for loan in loans:
+        row = table[loan.pk]
+        row["blocked_domain"] = is_blocked_domain(row["email_domain"])
+
+
+@register_batch_feature("domain_user_count", requires=("email_domain",))
+def load_domain_user_count_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """Serve domain counts from the cache, fetching every miss from
+    DomainUserCount in a single query."""
+    domains: Set[str] = {table[loan.pk]["email_domain"] for loan in loans}
+    keys: Dict[str, str] = {
+        domain: f"fraud.domain_user_count_{domain}" for domain in domains
+    }
+    cached: Dict[str, Any] = cache.get_many(list(keys.values()))
+    counts: Dict[str, int] = {
+        domain: cached[key] for domain, key in keys.items() if key in cached
+    }
+    missing: Set[str] = domains - set(counts)
+    metrics.record_cache("domain_user_count", True, len(counts))
+    metrics.record_cache("domain_user_count", False, len(missing))
+    if missing:
+        fresh: Dict[str, int] = dict.fromkeys(missing, 0)
+        fresh.update(
+            DomainUserCount.objects.filter(pk__in=missing).values_list(
+                "domain", "user_count"
+            )
+        )
+        cache.set_many(
+            {keys[domain]: count for domain, count in fresh.items()},
+            CACHE_TTL_5_MIN,
+        )
+        counts.update(fresh)
+    for loan in loans:
+        table[loan.pk]["domain_user_count"] = (
+            counts[table[loan.pk]["email_domain"]]
+        )
+
+
+@register_batch_feature("fraud_score", requires=SCORE_INPUTS)
+def load_fraud_score_many(
+    loans: Sequence[LoanApplication], table: FeatureTable
+) -> None:
+    """Score the whole batch with one matrix multiply."""
+    scores = score_many([table[loan.pk] for loan in loans])
+    for index, loan in enumerate(loans):
+        table[loan.pk]["fraud_score"] = (
+            None if scores is None else scores[index]
+        )
+
+
+@register_query_feature(
+    "email_domain", lambda now: {"user_email": F("user__email")}
+)
+def email_domain_from_row(row: Mapping[str, Any]) -> str:
+    """Applicant's domain from the joined email."""
+    return normalize_email_domain(row["user_email"] or "")
+
+
+@register_query_feature("loan_windows", window_subqueries)
+def loan_windows_from_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Applicant's multi-window velocity stats."""
+    return {key: row[key] for key in empty_window_stats()}
+
+
+def _amount_stats_annotations(now: datetime.datetime) -> Dict[str, Any]:
+    expressions: Dict[str, Any] = {
+        f"amount_stats_{name}": F(f"user__loan_stats__{name}")
+        for name in STATS_FIELDS
+    }
+    expressions["amount_stats_included"] = F("in_amount_stats")
+    expressions["amount_stats_amount"] = F("amount")
+    return expressions
+
+
+@register_query_feature("amount_stats", _amount_stats_annotations)
+def amount_stats_from_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Applicant's amount statistics, joined on the user's primary key."""
+    stats: Optional[Dict[str, Any]] = None
+    if row["amount_stats_count"] is not None:
+        stats = {name: row[f"amount_stats_{name}"] for name in STATS_FIELDS}
+    return prior_amount_stats(
+        row["amount_stats_included"], row["amount_stats_amount"], stats
+    )
+
+
+def _cluster_annotations(now: datetime.datetime) -> Dict[str, Any]:
+    parent = UserCluster.objects.filter(pk=OuterRef("user__cluster__parent"))
+    expressions: Dict[str, Any] = {
+        "cluster_user": F("user_id"),
+        "cluster_parent": F("user__cluster__parent"),
+    }
+    for name in ("parent", "size", "loan_count", "loan_amount"):
+        expressions[f"cluster_parent_{name}"] = Subquery(
+            parent.values(name)[:1]
+        )
+    return expressions
+
+
+@register_query_feature("cluster", _cluster_annotations)
+def cluster_from_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Applicant's cluster totals, read from the parent node when it is
+    the root; deeper trees are walked by ``cluster_stats``."""
+    parent = row["cluster_parent"]
+    if parent is None:
+        return node_stats(UserCluster(parent=row["cluster_user"]))
+    if row["cluster_parent_parent"] == parent:
+        return {
+            "size": row["cluster_parent_size"],
+            "loan_count": row["cluster_parent_loan_count"],
+            "loan_amount": row["cluster_parent_loan_amount"],
+        }
+    user_id = row["cluster_user"]
+    return cluster_stats([user_id])[user_id]
+
+
+def _risk_features_annotations(now: datetime.datetime) -> Dict[str, Any]:
+    expressions: Dict[str, Any] = {
+        f"risk_{name}": F(f"user__risk_features__{name}")
+        for name in FEATURE_FIELDS
+    }
+    expressions["risk_loan_status"] = F("status")
+    expressions["risk_loan_amount"] = F("amount")
+    return expressions
+
+
+@register_query_feature("risk_features", _risk_features_annotations)
+def risk_features_from_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Applicant's stored features, joined on the user's primary key."""
+    stored: Optional[Dict[str, Any]] = None
+    if row["risk_email_domain"] is not None:
+        stored = {name: row[f"risk_{name}"] for name in FEATURE_FIELDS}
+    return prior_risk_features(
+        stored, row["risk_loan_status"], row["risk_loan_amount"]
+    )
@@ -0,0 +1,175 @@
+"""
+Module: Database-backed queue for asynchronous fraud evaluation.
+
+With ``FRAUD_EVALUATION_MODE = "async"`` the loan create endpoint only
+enqueues a FraudJob in the same transaction as the loan. Workers
+started with ``manage.py fraud_worker`` claim batches of jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED`` so several workers never pick the
+same job, then evaluate the claimed loans with one batch call while
+holding their applicants' evaluation lanes, so a worker never evaluates
+a user's loan alongside another evaluation for the same user.
+"""
+
+import datetime
+import logging
+from typing import List, Tuple, cast
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from loan.models import LoanApplication
+
+from .lanes import user_lanes
+from .models import FraudJob
+from .services import invalidate_loan_caches, run_fraud_checks_many
+from .shadow import run_shadow
+
+MAX_ATTEMPTS: int = 3  # Claims before a job is marked FAILED
+LEASE_SECONDS: int = 300  # RUNNING jobs older than this are reclaimed
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def is_async_mode() -> bool:
+    """Return True when fraud checks should run on the job queue."""
+    return getattr(settings, "FRAUD_EVALUATION_MODE", "sync") == "async"
+
+
+def enqueue_fraud_check(loan: LoanApplication) -> FraudJob:
+    """Queue fraud checks for a loan; call inside the loan's transaction.
+
+    Args:
+        loan (LoanApplication): The newly created loan.
+
+    Returns:
+        FraudJob: The queued job.
+    """
+    job = FraudJob.objects.create(loan=loan)
+    logger.info("Queued fraud job id=%s for loan id=%s", job.id, loan.id)
+    return job
+
+
+def claim_jobs(batch_size: int) -> List[FraudJob]:
+    """Claim up to ``batch_size`` queued or expired jobs for this worker.
+
+    Rows locked by another worker are skipped rather than waited on.
+
+    Returns:
+        List[FraudJob]: The claimed jobs, now RUNNING.
+    """
+    lease_expired = timezone.now() - datetime.timedelta(seconds=LEASE_SECONDS)
+    with transaction.atomic():
+        ids = list(
+            FraudJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="QUEUED")
+                | Q(status="RUNNING", updated_at__lt=lease_expired)
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        FraudJob.objects.filter(id__in=ids).update(
+            status="RUNNING",
+            attempts=F("attempts") + 1,
+            updated_at=timezone.now(),
+        )
+    return list(FraudJob.objects.filter(id__in=ids).select_related("loan"))
+
+
+def _evaluate(jobs: List[FraudJob]) -> List[LoanApplication]:
+    """Run fraud checks for the still PENDING loans of ``jobs`` in one
+    batch, inside their applicants' lanes.
+
+    Returns:
+        List[LoanApplication]: The evaluated loans.
+    """
+    loans = [
+        loan
+        for loan in (cast(LoanApplication, job.loan) for job in jobs)
+        if loan.status == "PENDING"
+    ]
+    with user_lanes(loan.user_id for loan in loans):
+        run_fraud_checks_many(loans)
+    return loans
+
+
+def _retry(jobs: List[FraudJob], exc: Exception) -> None:
+    """Re-queue failed jobs, or mark FAILED those out of attempts."""
+    ids = [job.id for job in jobs]
+    FraudJob.objects.filter(id__in=ids).update(
+        status="QUEUED", last_error=str(exc), updated_at=timezone.now()
+    )
+    FraudJob.objects.filter(id__in=ids, attempts__gte=MAX_ATTEMPTS).update(
+        status="FAILED"
+    )
+
+
+def _evaluate_singly(
+    jobs: List[FraudJob],
+) -> Tuple[List[FraudJob], List[LoanApplication]]:
+    """Evaluate jobs one by one after their batch failed, so only the
+    jobs that fail on their own are retried.
+
+    Returns:
+        Tuple[List[FraudJob], List[LoanApplication]]: The jobs that
+        succeeded and the loans they evaluated.
+    """
+    done: List[FraudJob] = []
+    loans: List[LoanApplication] = []
+    for job in jobs:
+        try:
+            cast(LoanApplication, job.loan).refresh_from_db()
+            loans += _evaluate([job])
+        except Exception as exc:
+            logger.exception("Fraud job %s failed", job.id)
+            _retry([job], exc)
+        else:
+            done.append(job)
+    return done, loans
+
+
+def process_jobs(batch_size: int = 100) -> int:
+    """Claim one batch of jobs and run fraud checks for their loans.
+
+    Loans that are no longer PENDING (e.g. withdrawn while queued) are
+    skipped. If the batch fails, its jobs are evaluated one by one, and
+    only those failing alone are re-queued, or marked FAILED once they
+    have used up ``MAX_ATTEMPTS``. Shadow rules are evaluated inline for
+    the successful jobs; their failures never affect the jobs.
+
+    Args:
+        batch_size (int): Maximum number of jobs to claim.
+
+    Returns:
+        int: Number of jobs claimed.
+    """
+    jobs = claim_jobs(batch_size)
+    if not jobs:
+        return 0
+    try:
+        loans = _evaluate(jobs)
+        done = jobs
+    except Exception as exc:
+        if len(jobs) == 1:
+            logger.exception("Fraud job %s failed", jobs[0].id)
+            _retry(jobs, exc)
+            return 1
+        logger.exception(
+            "Fraud jobs %s failed as a batch; retrying them one by one",
+            [job.id for job in jobs],
+        )
+        done, loans = _evaluate_singly(jobs)
+    ids = [job.id for job in done]
+    FraudJob.objects.filter(id__in=ids).update(
+        status="DONE", last_error="", updated_at=timezone.now()
+    )
+    invalidate_loan_caches(loans)
+    try:
+        run_shadow(loan.pk for loan in loans)
+    except Exception:
+        logger.exception("Shadow evaluation failed for fraud jobs %s", ids)
+    logger.info("Processed %s fraud jobs", len(jobs))
+    return len(jobs)
@@ -0,0 +1,183 @@
+"""
+Module: Per-user evaluation lanes serializing fraud checks.
+
+Concurrent loan creations by one user must not be evaluated against
+the same history, or several of them can each slip under a velocity
+limit. Creating and evaluating a loan therefore happens inside the
+applicant's lane, so each evaluation sees every earlier loan of that
+user. Lanes of different users never wait on each other.
+
+On PostgreSQL a lane is a transaction holding
+``pg_advisory_xact_lock`` on the user id, released at commit or
+rollback. Other databases use a cache entry added atomically with
+``cache.add``; it expires after ``FRAUD_LANE_LEASE`` seconds, so a
+crashed holder cannot block its user for longer than that. That cache
+must be shared by every server process: a process-local cache (locmem)
+fails the ``fraud.E001`` system check at startup unless
+``FRAUD_LANE_LOCAL_CACHE`` declares a single-process server. When the
+cache backend fails, the lane is skipped at once rather than polled for
+the whole lease.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from typing import Any, Iterable, Iterator, List, Optional, Set
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import CheckMessage, Error
+from django.db import connection, transaction
+
+# First key of the two-key advisory lock, keeping lane locks apart from
+# other advisory locks on the same database
+LANE_LOCK_CLASS: int = 0x4C4E  # "LN"
+POLL_MIN: float = 0.005  # Seconds between cache lock attempts, doubling
+POLL_MAX: float = 0.1
+logger: logging.Logger = logging.getLogger(__name__)
+_held = threading.local()
+
+
+def lane_lease() -> float:
+    """Seconds a cache-based lane is held at most."""
+    return float(getattr(settings, "FRAUD_LANE_LEASE", 30))
+
+
+def _held_lanes() -> Set[int]:
+    if not hasattr(_held, "users"):
+        _held.users = set()
+    return _held.users
+
+
+@contextmanager
+def _advisory_lane(user_id: int) -> Iterator[None]:
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s, %s)",
+                [LANE_LOCK_CLASS, user_id],
+            )
+        yield
+
+
+def check_lane_cache(app_configs: Any, **kwargs: Any) -> List[CheckMessage]:
+    """System check refusing cache lanes on a cache other processes
+    cannot see.
+
+    Registered by FraudConfig.ready, so a misconfigured server fails
+    when it starts instead of on every loan creation.
+
+    Returns:
+        List[CheckMessage]: One error when the database has no advisory
+        locks, the default cache is process-local and
+        ``FRAUD_LANE_LOCAL_CACHE`` is not set; otherwise empty.
+    """
+    if connection.vendor == "postgresql" or getattr(
+        settings, "FRAUD_LANE_LOCAL_CACHE", False
+    ):
+        return []
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if not isinstance(backend, (LocMemCache, DummyCache)):
+        return []
+    return [
+        Error(
+            "Per-user fraud lanes need PostgreSQL or a cache shared by "
+            "all processes.",
+            hint="Configure REDIS_URL, or set FRAUD_LANE_LOCAL_CACHE "
+            "only for a single-process server.",
+            id="fraud.E001",
+        )
+    ]
+
+
+def _try_add(key: str, token: str, lease: float) -> Optional[bool]:
+    """Add the lane entry; None when the cache backend failed.
+
+    django-redis with ``IGNORE_EXCEPTIONS`` already answers None on a
+    connection error instead of raising.
+    """
+    try:
+        return cache.add(key, token, lease)
+    except Exception:
+        logger.exception("Cache add for %s failed", key)
+        return None
+
+
+@contextmanager
+def _cache_lane(user_id: int) -> Iterator[None]:
+    key = f"fraud.lane.user_{user_id}"
+    token = uuid.uuid4().hex
+    lease = lane_lease()
+    deadline = time.monotonic() + lease
+    delay = POLL_MIN
+    while True:
+        added = _try_add(key, token, lease)
+        if added is None:
+            # Waiting cannot help while the backend is down
+            logger.warning(
+                "Evaluation lane of user id=%s unavailable; cache failed",
+                user_id,
+            )
+            token = ""
+            break
+        if added:
+            break
+        if time.monotonic() >= deadline:
+            # The holder outlived its lease; evaluate rather than fail
+            logger.warning(
+                "Evaluation lane of user id=%s still held after %ss",
+                user_id,
+                lease,
+            )
+            token = ""
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX)
+    try:
+        yield
+    finally:
+        if token and cache.get(key) == token:
+            cache.delete(key)
+
+
+@contextmanager
+def user_lane(user_id: int) -> Iterator[None]:
+    """Hold the evaluation lane of one user.
+
+    Re-entering a lane the current thread already holds does not wait.
+    On PostgreSQL the block runs in one transaction.
+
+    Args:
+        user_id (int): The applicant whose loans are serialized.
+    """
+    held = _held_lanes()
+    if user_id in held:
+        yield
+        return
+    lane = _advisory_lane if connection.vendor == "postgresql" else _cache_lane
+    with lane(user_id):
+        held.add(user_id)
+        try:
+            yield
+        finally:
+            held.discard(user_id)
+
+
+@contextmanager
+def user_lanes(user_ids: Iterable[int]) -> Iterator[None]:
+    """Hold the evaluation lanes of several users at once.
+
+    Lanes are taken in user id order, so two holders of overlapping
+    sets never deadlock.
+
+    Args:
+        user_ids (Iterable[int]): The applicants; duplicates are fine.
+    """
+    with ExitStack() as stack:
+        for user_id in sorted(set(user_ids)):
+            stack.enter_context(user_lane(user_id))
+        yield
@@ -0,0 +1,100 @@
+"""
+Module: Management command backtesting fraud thresholds over loan history.
+
+Usage:
+    python manage.py backtest_fraud [--max-loans N,...]
+        [--max-amount N,...] [--max-users N,...] [--review-amount N,...]
+        [--top N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable, List, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from fraud.backtest import (BacktestResult, ThresholdGrid, load_columns,
+                            run_backtest)
+
+
+def _number_list(cast: Callable[[str], Any]) -> Callable[[str], List[Any]]:
+    """argparse type for comma-separated numbers."""
+
+    def parse(value: str) -> List[Any]:
+        try:
+            return [cast(part) for part in value.split(",") if part.strip()]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid list: {value}")
+
+    return parse
+
+
+def _pct(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1%}"
+
+
+class Command(BaseCommand):
+    help = "Simulate fraud threshold combinations over existing loans."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        defaults = ThresholdGrid.around_defaults()
+        for option, cast, values in (
+            ("--max-loans", int, defaults.max_loans),
+            ("--max-amount", float, defaults.max_amount),
+            ("--max-users", int, defaults.max_users),
+            ("--review-amount", float, defaults.review_amount),
+        ):
+            parser.add_argument(
+                option,
+                type=_number_list(cast),
+                default=list(values),
+                help="Comma-separated values to try (default: "
+                f"{','.join(str(v) for v in values)}).",
+            )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Combinations to print, best agreement first "
+            "(default: 20; 0 prints all).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        grid = ThresholdGrid(
+            max_loans=options["max_loans"],
+            max_amount=options["max_amount"],
+            max_users=options["max_users"],
+            review_amount=options["review_amount"],
+        )
+        started = time.monotonic()
+        columns = load_columns()
+        loaded = time.monotonic()
+        results = run_backtest(columns, grid)
+        finished = time.monotonic()
+        self.stdout.write(
+            f"Loaded {len(columns)} loans in {loaded - started:.2f}s; "
+            f"evaluated {len(results)} combinations in "
+            f"{finished - loaded:.2f}s."
+        )
+        results.sort(key=self._rank)
+        if options["top"] > 0:
+            results = results[: options["top"]]
+        self.stdout.write(
+            f"{'loans':>5} {'amount':>12} {'users':>5} {'review':>12} "
+            f"{'flagged':>8} {'review%':>8} {'approve':>8} {'agree':>8} "
+            f"{'rej.hit':>8} {'appr.fp':>8}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r.max_loans:>5} {r.max_amount:>12.0f} {r.max_users:>5} "
+                f"{r.review_amount:>12.0f} {_pct(r.flag_rate):>8} "
+                f"{_pct(r.review_rate):>8} {_pct(r.approve_rate):>8} "
+                f"{_pct(r.agreement):>8} {_pct(r.rejected_caught):>8} "
+                f"{_pct(r.approved_flagged):>8}"
+            )
+
+    @staticmethod
+    def _rank(result: BacktestResult) -> tuple:
+        """Best agreement first, then fewest flags."""
+        agreement = -1.0 if result.agreement is None else result.agreement
+        return (-agreement, result.flag_rate)
@@ -0,0 +1,66 @@
+"""
+Module: Management command compiling the blocked email-domain filter.
+
+Usage:
+    python manage.py build_domain_filter SOURCE [SOURCE ...]
+        [--output FILE] [--error-rate P]
+"""
+
+from typing import Any, Set
+
+from django.conf import settings
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+
+from fraud.domain_filter import (DEFAULT_ERROR_RATE, read_domain_list,
+                                 write_filter)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile plain-text lists of disposable or blocked email domains "
+        "into the memory-mapped filter used by the blocked_domain rule."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "sources",
+            nargs="+",
+            help="Text files with one domain per line; '#' starts a "
+            "comment.",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Filter file to write (default: "
+            "FRAUD_DOMAIN_FILTER_PATH).",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=DEFAULT_ERROR_RATE,
+            help="Bloom filter false positive rate (default: "
+            f"{DEFAULT_ERROR_RATE}).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        error_rate: float = options["error_rate"]
+        if not 0 < error_rate < 1:
+            raise CommandError("--error-rate must be between 0 and 1.")
+        domains: Set[str] = set()
+        for source in options["sources"]:
+            try:
+                with open(source, encoding="utf-8") as handle:
+                    domains |= read_domain_list(handle)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {source}: {exc}")
+        output: str = options["output"] or settings.FRAUD_DOMAIN_FILTER_PATH
+        domain_filter = write_filter(domains, output, error_rate)
+        size = (domain_filter.bits + 7) // 8
+        domain_filter.close()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built filter of {len(domains)} domains at {output} "
+                f"({size} filter bytes, {domain_filter.hashes} hashes)."
+            )
+        )
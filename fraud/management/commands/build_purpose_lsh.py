@@ -0,0 +1,72 @@
+"""
+Module: Management command backfilling the purpose LSH index.
+
+Streams existing loans with a purpose in primary-key chunks and writes
+their band buckets. Loans already indexed are left alone, so the
+command can be re-run or resumed after an interruption.
+
+Usage:
+    python manage.py build_purpose_lsh [--chunk-size N] [--rebuild]
+"""
+
+from typing import Any, List
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from fraud.models import PurposeBucket
+from fraud.purpose_lsh import bucket_rows
+from loan.models import LoanApplication
+
+
+class Command(BaseCommand):
+    help = "Backfill the MinHash/LSH buckets of existing loan purposes."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Loans read and written per batch (default: 2000).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Delete every bucket first, e.g. after changing the "
+            "signature parameters.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        chunk_size: int = options["chunk_size"]
+        if options["rebuild"]:
+            PurposeBucket.objects.all().delete()
+        loans = (
+            LoanApplication.objects.exclude(purpose="")
+            .order_by("pk")
+            .only("pk", "user_id", "purpose")
+            .iterator(chunk_size=chunk_size)
+        )
+        chunk: List[PurposeBucket] = []
+        indexed = written = 0
+        for loan in loans:
+            rows = bucket_rows(loan)
+            if rows:
+                indexed += 1
+                chunk.extend(rows)
+            if len(chunk) >= chunk_size:
+                written += self._write(chunk, chunk_size)
+                chunk = []
+        if chunk:
+            written += self._write(chunk, chunk_size)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed} loan purposes ({written} buckets)."
+            )
+        )
+
+    def _write(self, chunk: List[PurposeBucket], chunk_size: int) -> int:
+        """Insert one chunk of buckets, skipping existing ones; returns
+        the chunk size."""
+        PurposeBucket.objects.bulk_create(
+            chunk, batch_size=chunk_size, ignore_conflicts=True
+        )
+        return len(chunk)
@@ -0,0 +1,63 @@
+"""
+Module: Management command draining the fraud alert outbox.
+
+Usage:
+    python manage.py dispatch_notifications [--batch-size N]
+        [--digest-window S] [--poll-interval S] [--once]
+"""
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from fraud.notifications import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = "Email queued fraud alerts from the notification outbox."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Outbox rows sent per batch (default: 100).",
+        )
+        parser.add_argument(
+            "--digest-window",
+            type=int,
+            default=0,
+            help=(
+                "Coalesce alerts into one email per window of this many "
+                "seconds (default: 0, one email per alert)."
+            ),
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the outbox is empty (default: 5).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the outbox once and exit instead of polling.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        total = 0
+        try:
+            while True:
+                sent = dispatch_outbox(
+                    options["batch_size"], options["digest_window"]
+                )
+                total += sent
+                if sent:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Sent {total} alerts."))
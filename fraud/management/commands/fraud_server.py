@@ -0,0 +1,81 @@
+"""
+Module: Management command running the fraud evaluation sidecar.
+
+Loads the engine, the blocked-domain filter and the fraud model once,
+then serves evaluation requests from ``run_fraud_checks`` on a Unix
+socket until interrupted, evaluating requests that arrive close
+together as one batch.
+
+Usage:
+    python manage.py fraud_server [--socket PATH] [--batch-window MS]
+                                  [--max-batch N]
+"""
+
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+
+from fraud.config import current_engine
+from fraud.domain_filter import get_domain_filter
+from fraud.scoring import get_weights
+from fraud.sidecar import BATCH_WINDOW, MAX_BATCH, SidecarServer
+
+
+class Command(BaseCommand):
+    help = "Serve fraud evaluations on a local Unix socket."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--socket",
+            default=getattr(settings, "FRAUD_SIDECAR_SOCKET", ""),
+            help="Socket path (default: FRAUD_SIDECAR_SOCKET).",
+        )
+        parser.add_argument(
+            "--batch-window",
+            type=float,
+            default=BATCH_WINDOW * 1000,
+            help=(
+                "Milliseconds to wait for more requests before "
+                f"evaluating a batch (default: {BATCH_WINDOW * 1000:g})."
+            ),
+        )
+        parser.add_argument(
+            "--max-batch",
+            type=int,
+            default=MAX_BATCH,
+            help=f"Requests evaluated together (default: {MAX_BATCH}).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not options["socket"]:
+            raise CommandError("Set FRAUD_SIDECAR_SOCKET or pass --socket")
+        if options["max_batch"] < 1 or options["batch_window"] < 0:
+            raise CommandError(
+                "--max-batch must be positive and --batch-window not "
+                "negative"
+            )
+        engine = current_engine()
+        get_domain_filter()
+        get_weights()
+        server = SidecarServer(
+            options["socket"],
+            batch_window=options["batch_window"] / 1000,
+            max_batch=options["max_batch"],
+        )
+        self.stdout.write(
+            f"Serving fraud config {engine.version} on {options['socket']}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Evaluated {server.evaluated} loans in {server.batches} "
+                f"batches (largest {server.largest_batch})."
+            )
+        )
@@ -0,0 +1,56 @@
+"""
+Module: Management command running the asynchronous fraud worker.
+
+Claims batches of queued FraudJob rows and evaluates them until
+interrupted. Run as many workers as needed; claims use SKIP LOCKED.
+
+Usage:
+    python manage.py fraud_worker [--batch-size N] [--poll-interval S]
+                                  [--once]
+"""
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from fraud.jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued fraud evaluation jobs."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Jobs claimed per batch (default: 100).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty (default: 1).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit instead of polling.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size: int = options["batch_size"]
+        total = 0
+        try:
+            while True:
+                claimed = process_jobs(batch_size)
+                total += claimed
+                if claimed:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} jobs."))
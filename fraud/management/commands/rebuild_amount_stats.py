@@ -0,0 +1,35 @@
+"""
+Module: Management command recomputing per-user loan amount statistics.
+
+Rebuilds every UserLoanStats row from the users' loans, one chunk of
+users per transaction, and marks the loans as folded in. Run it once
+after migrating, and whenever loans were created outside the create
+view.
+
+Usage:
+    python manage.py rebuild_amount_stats [--chunk-size N]
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from fraud.amount_stats import rebuild_amount_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's loan amount statistics."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Users rebuilt per transaction (default: 2000).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        users = rebuild_amount_stats(options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt amount stats of {users} users.")
+        )
@@ -0,0 +1,89 @@
+"""
+Module: Management command fitting the fraud scoring model.
+
+Learns logistic-regression weights from loans an admin approved or
+rejected, and writes them where every worker maps them from. Features
+come from each loan's first decision record; loans without one use
+current data, which can leak later information, and are reported.
+
+Usage:
+    python manage.py train_fraud_model [--output FILE] [--l2 L]
+        [--chunk-size N] [--min-samples N]
+"""
+
+from typing import Any
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+
+from fraud.scoring import (fit_logistic, load_training_data, save_weights,
+                           score_matrix)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fit the fraud model used by the model_score rule on historical "
+        "APPROVED and REJECTED loans."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Weights file to write (default: FRAUD_MODEL_PATH).",
+        )
+        parser.add_argument(
+            "--l2",
+            type=float,
+            default=1.0,
+            help="L2 penalty on the standardized weights (default: 1.0).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Loans whose features are loaded per batch "
+            "(default: 2000).",
+        )
+        parser.add_argument(
+            "--min-samples",
+            type=int,
+            default=20,
+            help="Refuse to train on fewer labelled loans (default: 20).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["l2"] < 0:
+            raise CommandError("--l2 must not be negative.")
+        matrix, labels, current = load_training_data(options["chunk_size"])
+        rejected = int(labels.sum())
+        if len(labels) < options["min_samples"]:
+            raise CommandError(
+                f"Only {len(labels)} approved or rejected loans; need "
+                f"{options['min_samples']}."
+            )
+        if rejected in (0, len(labels)):
+            raise CommandError(
+                "Training needs both approved and rejected loans."
+            )
+        weights = fit_logistic(matrix, labels, l2=options["l2"])
+        output: str = options["output"] or settings.FRAUD_MODEL_PATH
+        save_weights(weights, output)
+        predicted = score_matrix(weights, matrix) > 0.5
+        accuracy = float(np.mean(predicted == labels.astype(bool)))
+        if current:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{current} loans had no decision record; their "
+                    "features were loaded from current data and can "
+                    "include information from after their decision."
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Trained on {len(labels)} loans ({rejected} rejected); "
+                f"training accuracy {accuracy:.1%}. Wrote {output}."
+            )
+        )
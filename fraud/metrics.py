@@ -0,0 +1,192 @@
+"""
+Module: In-process fraud rule metrics flushed to the cache backend.
+
+Every rule evaluation is timed and counted per rule name and outcome
+("hit" when the rule flagged the loan, "pass" otherwise) in a
+fixed-bucket latency histogram. Feature cache lookups are counted as
+hits and misses. Each process accumulates deltas under a lock and adds
+them to shared cache counters at most every ``FLUSH_INTERVAL`` seconds,
+so gunicorn workers aggregate into one view served by
+``GET /api/fraud/stats/``.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from .rules import RULE_REGISTRY
+
+# Upper bounds, in microseconds, of the latency histogram buckets; the
+# last bucket catches everything slower.
+LATENCY_BUCKETS_US: Tuple[int, ...] = (
+    10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000,
+    100000, 250000, 1000000,
+)
+OUTCOMES: Tuple[str, ...] = ("hit", "pass")
+# Cached features whose hits and misses are counted
+COUNTED_CACHE_FEATURES: Tuple[str, ...] = ("domain_user_count",)
+FLUSH_INTERVAL: float = 10.0  # Seconds between flushes to the cache
+KEY_PREFIX: str = "fraud.metrics"
+logger: logging.Logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending: DefaultDict[str, int] = defaultdict(int)
+_last_flush: float = time.monotonic()
+
+
+def _rule_key(rule: str, outcome: str, bucket: int) -> str:
+    return f"{KEY_PREFIX}.rule.{rule}.{outcome}.b{bucket}"
+
+
+def _cache_key(feature: str, hit: bool) -> str:
+    return f"{KEY_PREFIX}.cache.{feature}.{'hit' if hit else 'miss'}"
+
+
+def record_rule(rule: str, flagged: bool, seconds: float) -> None:
+    """Count one evaluation of ``rule`` and its latency."""
+    bucket = bisect.bisect_left(LATENCY_BUCKETS_US, seconds * 1e6)
+    key = _rule_key(rule, "hit" if flagged else "pass", bucket)
+    with _lock:
+        _pending[key] += 1
+    _maybe_flush()
+
+
+def record_cache(feature: str, hit: bool, count: int = 1) -> None:
+    """Count ``count`` cache hits or misses for a cached feature."""
+    with _lock:
+        _pending[_cache_key(feature, hit)] += count
+    _maybe_flush()
+
+
+def _maybe_flush() -> None:
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def _incr(key: str, delta: int) -> None:
+    """Atomically add ``delta`` to a persistent cache counter."""
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def flush() -> None:
+    """Add this process's pending counts to the shared cache counters.
+
+    Counts not yet added when the cache fails are kept for the next
+    flush.
+    """
+    global _last_flush
+    with _lock:
+        deltas = list(_pending.items())
+        _pending.clear()
+        _last_flush = time.monotonic()
+    flushed = 0
+    try:
+        for key, delta in deltas:
+            _incr(key, delta)
+            flushed += 1
+    except Exception:
+        logger.warning("Failed to flush fraud metrics", exc_info=True)
+        with _lock:
+            for key, delta in deltas[flushed:]:
+                _pending[key] += delta
+
+
+def reset() -> None:
+    """Drop pending and shared metrics."""
+    with _lock:
+        _pending.clear()
+    cache.delete_many(_all_keys())
+
+
+def _all_keys() -> List[str]:
+    keys = [
+        _rule_key(rule, outcome, bucket)
+        for rule in RULE_REGISTRY
+        for outcome in OUTCOMES
+        for bucket in range(len(LATENCY_BUCKETS_US) + 1)
+    ]
+    keys += [
+        _cache_key(feature, hit)
+        for feature in COUNTED_CACHE_FEATURES
+        for hit in (True, False)
+    ]
+    return keys
+
+
+def _percentile(buckets: List[int], fraction: float) -> Optional[int]:
+    """Upper bound (µs) of the bucket holding the given quantile; None
+    when empty or beyond the last bound."""
+    total = sum(buckets)
+    if not total:
+        return None
+    threshold = fraction * total
+    running = 0
+    for index, count in enumerate(buckets):
+        running += count
+        if running >= threshold:
+            break
+    if index >= len(LATENCY_BUCKETS_US):
+        return None
+    return LATENCY_BUCKETS_US[index]
+
+
+def _summary(buckets: List[int]) -> Dict[str, Any]:
+    return {
+        "count": sum(buckets),
+        "p50_us": _percentile(buckets, 0.50),
+        "p95_us": _percentile(buckets, 0.95),
+        "p99_us": _percentile(buckets, 0.99),
+    }
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return aggregated metrics for all processes.
+
+    Returns:
+        Dict[str, Any]: ``rules`` with per-rule evaluations, hit rate and
+        latency percentiles (overall and per outcome), and ``cache`` with
+        hit ratios for cached features.
+    """
+    flush()
+    values: Dict[str, int] = cache.get_many(_all_keys())
+    size = len(LATENCY_BUCKETS_US) + 1
+    rules: Dict[str, Any] = {}
+    for rule in RULE_REGISTRY:
+        per_outcome = {
+            outcome: [
+                values.get(_rule_key(rule, outcome, b), 0)
+                for b in range(size)
+            ]
+            for outcome in OUTCOMES
+        }
+        merged = [sum(col) for col in zip(*per_outcome.values())]
+        evaluations = sum(merged)
+        hits = sum(per_outcome["hit"])
+        rules[rule] = {
+            **_summary(merged),
+            "hits": hits,
+            "hit_rate": hits / evaluations if evaluations else None,
+            "outcomes": {
+                outcome: _summary(buckets)
+                for outcome, buckets in per_outcome.items()
+            },
+        }
+    caches: Dict[str, Any] = {}
+    for feature in COUNTED_CACHE_FEATURES:
+        hits = values.get(_cache_key(feature, True), 0)
+        misses = values.get(_cache_key(feature, False), 0)
+        caches[feature] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        }
+    return {"rules": rules, "cache": caches}
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add the FraudJob queue model.
+
+    This migration creates 'FraudJob' with a 'loan' ForeignKey,
+    'status' (QUEUED, RUNNING, DONE, FAILED), 'attempts', 'last_error'
+    and timestamps, indexed on ('status', 'id') for worker claims.
+    """
+
+    dependencies = [
+        ("fraud", "0001_initial"),
+        ("loan", "0002_loanapplication_purpose"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FraudJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUEUED", "Queued"),
+                            ("RUNNING", "Running"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="QUEUED",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fraud_jobs",
+                        to="loan.loanapplication",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"],
+                        name="fraud_fraud_status_d090be_idx",
+                    )
+                ],
+            },
+        ),
+    ]
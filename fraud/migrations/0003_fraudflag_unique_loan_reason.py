@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_flags(apps, schema_editor):
+    """Keep the oldest flag for each (loan, reason) pair."""
+    FraudFlag = apps.get_model("fraud", "FraudFlag")
+    duplicates = (
+        FraudFlag.objects.order_by()
+        .values("loan_id", "reason")
+        .annotate(keep=Min("id"), n=Count("id"))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        FraudFlag.objects.filter(
+            loan_id=row["loan_id"], reason=row["reason"]
+        ).exclude(id=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+    """Migration to make FraudFlag unique per (loan, reason).
+
+    Duplicate flags are removed first, keeping the oldest row so its
+    'flagged_at' is preserved.
+    """
+
+    dependencies = [
+        ("fraud", "0002_fraudjob"),
+        ("loan", "0002_loanapplication_purpose"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_flags, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="fraudflag",
+            constraint=models.UniqueConstraint(
+                fields=("loan", "reason"),
+                name="fraud_flag_unique_loan_reason",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add the NotificationOutbox model.
+
+    This migration creates 'NotificationOutbox' holding queued admin
+    alerts ('subject', 'body', JSON 'recipients') with delivery state
+    ('sent_at', 'attempts', 'last_error'), indexed on ('sent_at', 'id').
+    """
+
+    dependencies = [
+        ("fraud", "0003_fraudflag_unique_loan_reason"),
+        ("loan", "0002_loanapplication_purpose"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255)),
+                ("body", models.TextField()),
+                ("recipients", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notifications",
+                        to="loan.loanapplication",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["sent_at", "id"],
+                        name="fraud_notif_sent_at_f23048_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add the admin-editable FraudRuleConfig model.
+
+    This migration creates 'FraudRuleConfig' with a unique 'rule' name,
+    'enabled', JSON 'thresholds' and 'updated_at'.
+    """
+
+    dependencies = [
+        ("fraud", "0004_notificationoutbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FraudRuleConfig",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rule", models.CharField(max_length=64, unique=True)),
+                ("enabled", models.BooleanField(default=True)),
+                ("thresholds", models.JSONField(blank=True, default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["rule"],
+            },
+        ),
+    ]
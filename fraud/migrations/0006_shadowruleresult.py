@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add shadow-mode fraud rules.
+
+    This migration adds a nullable 'shadow' override to
+    'FraudRuleConfig' and creates 'ShadowRuleResult' with a 'loan'
+    ForeignKey, 'rule', 'flagged', 'live_status' and 'evaluated_at',
+    indexed on ('rule', 'evaluated_at').
+    """
+
+    dependencies = [
+        ("fraud", "0005_fraudruleconfig"),
+        ("loan", "0003_loanapplication_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fraudruleconfig",
+            name="shadow",
+            field=models.BooleanField(blank=True, default=None, null=True),
+        ),
+        migrations.CreateModel(
+            name="ShadowRuleResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rule", models.CharField(max_length=64)),
+                ("flagged", models.BooleanField()),
+                ("live_status", models.CharField(max_length=10)),
+                ("evaluated_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shadow_results",
+                        to="loan.loanapplication",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["rule", "evaluated_at"],
+                        name="fraud_shado_rule_a2de92_idx",
+                    )
+                ],
+            },
+        ),
+    ]
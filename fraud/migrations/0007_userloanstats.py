@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add per-user running loan amount statistics.
+
+    This migration creates 'UserLoanStats', keyed by 'user', with
+    'count', 'mean', 'm2', 'max_amount' and 'latest_loan_id' maintained
+    incrementally with Welford's algorithm.
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("fraud", "0006_shadowruleresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserLoanStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="loan_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("mean", models.FloatField(default=0.0)),
+                ("m2", models.FloatField(default=0.0)),
+                (
+                    "max_amount",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=10
+                    ),
+                ),
+                ("latest_loan_id", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
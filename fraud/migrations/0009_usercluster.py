@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add the linked-account disjoint-set forest.
+
+    This migration creates 'UserCluster', keyed by 'user', with a
+    'parent' user id and per-root 'size', 'loan_count' and
+    'loan_amount'.
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("fraud", "0008_purposebucket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserCluster",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="cluster",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("parent", models.BigIntegerField()),
+                ("size", models.PositiveIntegerField(default=1)),
+                ("loan_count", models.PositiveIntegerField(default=0)),
+                (
+                    "loan_amount",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=14
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add the per-user fraud feature store.
+
+    This migration creates 'UserRiskFeatures', keyed by 'user', with
+    loan counts per status, approved exposure, the last application
+    time, a decayed application rate and the email domain.
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("fraud", "0009_usercluster"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserRiskFeatures",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="risk_features",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("pending_count", models.PositiveIntegerField(default=0)),
+                ("approved_count", models.PositiveIntegerField(default=0)),
+                ("rejected_count", models.PositiveIntegerField(default=0)),
+                ("flagged_count", models.PositiveIntegerField(default=0)),
+                ("withdrawn_count", models.PositiveIntegerField(default=0)),
+                (
+                    "approved_exposure",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=14
+                    ),
+                ),
+                (
+                    "last_applied_at",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("application_rate", models.FloatField(default=0.0)),
+                (
+                    "email_domain",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add the fraud reason lookup table.
+
+    This migration creates 'FraudReason', drops the unique (loan,
+    reason) constraint on the reason text and adds a nullable
+    'reason_code' reference and a 'detail' column to 'FraudFlag'; the
+    next migration fills the codes from the existing reason texts.
+    """
+
+    dependencies = [
+        ("fraud", "0010_userriskfeatures"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="fraudflag",
+            name="fraud_flag_unique_loan_reason",
+        ),
+        migrations.CreateModel(
+            name="FraudReason",
+            fields=[
+                (
+                    "id",
+                    models.SmallAutoField(primary_key=True, serialize=False),
+                ),
+                ("text", models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="fraudflag",
+            name="detail",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="fraudflag",
+            name="reason_code",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="fraud.fraudreason",
+            ),
+        ),
+    ]
@@ -0,0 +1,155 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:40
+
+import re
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 500
+DETAIL_LENGTH = 255
+MANUAL_REASON = "Manually flagged by admin"
+# Reasons the fraud rules produce, "{...}" standing for any threshold.
+# Frozen here so later rule changes cannot change this migration.
+ENGINE_REASONS = (
+    "Amount exceeds threshold",
+    "Email domain is disposable or blocked",
+    "Email domain used by more than {max_users} users",
+    "More than {max_loans} loans in 24 hours",
+    "Loan velocity over limits ({max_loans_1h}/1h, {max_loans_24h}/24h, "
+    "{max_loans_7d}/7d or {max_amount_24h} per 24h)",
+    "Amount more than {max_zscore} standard deviations above the user's "
+    "average",
+    "Purpose copied from more than {max_users} other users",
+    "Linked account cluster over limits ({max_users} users, {max_loans} "
+    "loans or {max_amount} requested)",
+    "Fraud model score above {max_score}",
+    "Fraud rule {name} timed out",
+)
+ENGINE_PATTERN = re.compile(
+    "|".join(
+        "(?:{})".format(
+            ".+".join(re.escape(part) for part in re.split(r"{[^}]*}", text))
+        )
+        for text in ENGINE_REASONS
+    )
+)
+
+
+def _reason_text(flag):
+    """The flag's engine reason, or the manual reason for admin text."""
+    if ENGINE_PATTERN.fullmatch(flag.reason):
+        return flag.reason
+    if flag.reason != MANUAL_REASON:
+        flag.detail = flag.reason[:DETAIL_LENGTH]
+    return MANUAL_REASON
+
+
+def _merge_manual_flags(FraudFlag, chunk, manual_code):
+    """Fold each loan's manual flags into one, joining their details,
+    since a loan may only carry each reason once.
+
+    Returns:
+        tuple: Flags to save and flags to delete.
+    """
+    manual = [flag for flag in chunk if flag.reason_code_id == manual_code]
+    keepers = {
+        flag.loan_id: flag
+        for flag in FraudFlag.objects.filter(
+            reason_code_id=manual_code,
+            loan_id__in={flag.loan_id for flag in manual},
+        ).only("pk", "loan_id", "detail")
+    }
+    merged = []
+    for flag in manual:
+        keeper = keepers.setdefault(flag.loan_id, flag)
+        if keeper is not flag:
+            details = [keeper.detail, flag.detail]
+            keeper.detail = "; ".join(filter(None, details))[:DETAIL_LENGTH]
+            merged.append(flag)
+    dropped = {flag.pk for flag in merged}
+    save = {flag.pk: flag for flag in chunk if flag.pk not in dropped}
+    save.update((flag.pk, flag) for flag in keepers.values())
+    return list(save.values()), merged
+
+
+def assign_reason_codes(apps, schema_editor):
+    """Point each flag at the FraudReason row of its reason text.
+
+    Only texts the fraud rules produce become reasons of their own.
+    Any other text was typed by an admin: the flag gets the manual
+    reason, with the text moved to its detail.
+    """
+    FraudFlag = apps.get_model("fraud", "FraudFlag")
+    FraudReason = apps.get_model("fraud", "FraudReason")
+    codes = {}
+    last = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                FraudFlag.objects.filter(pk__gt=last, reason_code__isnull=True)
+                .order_by("pk")
+                .only("pk", "loan_id", "reason", "detail")[:CHUNK_SIZE]
+            )
+            if not chunk:
+                return
+            texts = {flag.pk: _reason_text(flag) for flag in chunk}
+            new = set(texts.values()) - codes.keys()
+            FraudReason.objects.bulk_create(
+                [FraudReason(text=text) for text in new],
+                ignore_conflicts=True,
+            )
+            codes.update(
+                FraudReason.objects.filter(text__in=new).values_list(
+                    "text", "id"
+                )
+            )
+            for flag in chunk:
+                flag.reason_code_id = codes[texts[flag.pk]]
+            save, merged = _merge_manual_flags(
+                FraudFlag, chunk, codes.get(MANUAL_REASON)
+            )
+            FraudFlag.objects.filter(
+                pk__in=[flag.pk for flag in merged]
+            ).delete()
+            FraudFlag.objects.bulk_update(save, ["reason_code", "detail"])
+        last = chunk[-1].pk
+
+
+def restore_reason_texts(apps, schema_editor):
+    """Copy each flag's reason text, or its admin detail, back."""
+    FraudFlag = apps.get_model("fraud", "FraudFlag")
+    last = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                FraudFlag.objects.filter(pk__gt=last)
+                .order_by("pk")
+                .select_related("reason_code")[:CHUNK_SIZE]
+            )
+            if not chunk:
+                return
+            for flag in chunk:
+                flag.reason = flag.detail or flag.reason_code.text
+            FraudFlag.objects.bulk_update(chunk, ["reason"])
+        last = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+    """Migration to convert FraudFlag reason texts to reason codes.
+
+    This migration creates one 'FraudReason' per distinct engine reason
+    text and sets 'reason_code' on every flag, committing every 500
+    flags so large tables are converted without one long transaction.
+    Free-text admin reasons all become the manual reason, the text kept
+    in 'detail'; a loan's several admin flags merge into one. Flags
+    already converted are skipped, so an interrupted run can resume.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("fraud", "0011_fraudreason"),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_reason_codes, restore_reason_texts),
+    ]
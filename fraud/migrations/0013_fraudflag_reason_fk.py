@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to make the reason code FraudFlag's only reason.
+
+    This migration drops the 'reason' text column (given a default
+    first, so the migration can be reversed on a populated table), renames
+    'reason_code' to 'reason', makes it required and adds the unique
+    (loan, reason) constraint back on the code.
+    """
+
+    dependencies = [
+        ("fraud", "0012_fraudflag_reason_codes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="fraudflag",
+            name="reason",
+            field=models.CharField(default="", max_length=255),
+        ),
+        migrations.RemoveField(
+            model_name="fraudflag",
+            name="reason",
+        ),
+        migrations.RenameField(
+            model_name="fraudflag",
+            old_name="reason_code",
+            new_name="reason",
+        ),
+        migrations.AlterField(
+            model_name="fraudflag",
+            name="reason",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="flags",
+                to="fraud.fraudreason",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="fraudflag",
+            constraint=models.UniqueConstraint(
+                fields=("loan", "reason"),
+                name="fraud_flag_unique_loan_reason",
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to add fraud decision records.
+
+    This migration creates 'FraudEngineConfig', keyed by the engine's
+    configuration hash, and 'FraudDecisionRecord' holding the features,
+    config version, status, reason codes and elapsed time of each
+    evaluation.
+    """
+
+    dependencies = [
+        ("fraud", "0013_fraudflag_reason_fk"),
+        ("loan", "0005_loanapplication_fraud_score"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FraudEngineConfig",
+            fields=[
+                (
+                    "version",
+                    models.CharField(
+                        max_length=16, primary_key=True, serialize=False
+                    ),
+                ),
+                ("config", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FraudDecisionRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("config_version", models.CharField(max_length=16)),
+                ("status", models.CharField(max_length=10)),
+                ("reasons", models.JSONField(default=list)),
+                ("features", models.JSONField(default=dict)),
+                ("elapsed_us", models.PositiveIntegerField()),
+                ("decided_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "loan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fraud_decisions",
+                        to="loan.loanapplication",
+                    ),
+                ),
+            ],
+        ),
+    ]
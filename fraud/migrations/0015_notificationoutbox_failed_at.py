@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to dead-letter outbox rows.
+
+    This migration adds the nullable 'failed_at' timestamp to
+    'NotificationOutbox', set once a row has used up its delivery
+    attempts.
+    """
+
+    dependencies = [
+        ("fraud", "0014_frauddecisionrecord"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificationoutbox",
+            name="failed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to claim outbox rows before sending them.
+
+    This migration adds the nullable 'claimed_at' timestamp to
+    'NotificationOutbox', set while a dispatcher is sending the row.
+    """
+
+    dependencies = [
+        ("fraud", "0015_notificationoutbox_failed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificationoutbox",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
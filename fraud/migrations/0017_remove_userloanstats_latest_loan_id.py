@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Migration to drop the loan id watermark from amount statistics.
+
+    This migration removes 'latest_loan_id' from 'UserLoanStats'; each
+    loan now records whether it is folded in.
+    """
+
+    dependencies = [
+        ("fraud", "0016_notificationoutbox_claimed_at"),
+        ("loan", "0006_loanapplication_in_amount_stats"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="userloanstats",
+            name="latest_loan_id",
+        ),
+    ]
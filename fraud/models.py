@@ -5,13 +5,36 @@ loan applications.
 Attributes:
     loan (ForeignKey[LoanApplication]): Reference to the flagged
         LoanApplication.
-    reason (str): Explanation for why the loan was flagged.
+    reason (ForeignKey[FraudReason]): Why the loan was flagged.
+    detail (str): Free-text explanation from an admin, if any.
     flagged_at (datetime.datetime): Timestamp when the flag was created.
 """
 
+from django.conf import settings
 from django.db import models
 
 
+class FraudReason(models.Model):
+    """Distinct fraud flag reason, referenced by its short integer code.
+
+    Attributes:
+        id (int): The reason code.
+        text (str): Reason shown to admins, e.g. "Amount exceeds
+            threshold".
+    """
+
+    id: models.SmallAutoField = models.SmallAutoField(primary_key=True)
+    text: models.CharField = models.CharField(max_length=255, unique=True)
+
+    def __str__(self) -> str:
+        """Return a string representation of the FraudReason row.
+
+        Returns:
+            str: The code and reason text.
+        """
+        return f"{self.id}: {self.text}"
+
+
 class FraudFlag(models.Model):
     """Stores a reason why a specific LoanApplication was flagged as potential
     fraud.
@@ -27,9 +50,27 @@ class FraudFlag(models.Model):
         on_delete=models.CASCADE,
         related_name="fraud_flags",
     )
-    reason: models.CharField = models.CharField(max_length=255)
+    reason: models.ForeignKey = models.ForeignKey(
+        FraudReason,
+        on_delete=models.PROTECT,
+        related_name="flags",
+    )
+    detail: models.CharField = models.CharField(
+        max_length=255, blank=True, default=""
+    )
     flagged_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        """One flag per reason per loan, so concurrent re-evaluations
+        reconcile idempotently."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["loan", "reason"],
+                name="fraud_flag_unique_loan_reason",
+            )
+        ]
+
     def __str__(self) -> str:
         """Return a string representation of the FraudFlag instance.
 
@@ -37,3 +78,479 @@ class FraudFlag(models.Model):
             str: Formatted string containing flag id and loan reference.
         """
         return f"Flag {self.id} - {self.loan}"
+
+
+class FraudJob(models.Model):
+    """Durable queue entry asking a worker to run fraud checks on a loan.
+
+    Attributes:
+        loan (ForeignKey[LoanApplication]): The loan to evaluate.
+        status (str): QUEUED, RUNNING, DONE or FAILED.
+        attempts (int): Number of times a worker has claimed the job.
+        last_error (str): Error from the most recent failed attempt.
+        created_at (datetime.datetime): When the job was enqueued.
+        updated_at (datetime.datetime): Last state change; doubles as the
+            lease start while RUNNING.
+    """
+
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    id: int
+
+    loan: models.ForeignKey = models.ForeignKey(
+        "loan.LoanApplication",
+        on_delete=models.CASCADE,
+        related_name="fraud_jobs",
+    )
+    status: models.CharField = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="QUEUED",
+    )
+    attempts: models.PositiveSmallIntegerField = (
+        models.PositiveSmallIntegerField(default=0)
+    )
+    last_error: models.TextField = models.TextField(blank=True, default="")
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Index matching the worker's claim query."""
+
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self) -> str:
+        """Return a string representation of the FraudJob instance.
+
+        Returns:
+            str: Formatted string containing job id, status and loan id.
+        """
+        return f"FraudJob {self.id} ({self.status}) - loan {self.loan_id}"
+
+
+class NotificationOutbox(models.Model):
+    """Admin alert waiting to be emailed by the notification dispatcher.
+
+    Rows are written in the same transaction as the fraud flags they
+    describe, so an alert exists if and only if the flag committed.
+
+    Attributes:
+        loan (ForeignKey[LoanApplication]): The flagged loan.
+        subject (str): Email subject for a single-alert message.
+        body (str): Email body for a single-alert message.
+        recipients (list[str]): Email addresses to notify.
+        created_at (datetime.datetime): When the alert was queued.
+        sent_at (datetime.datetime | None): When it was delivered.
+        failed_at (datetime.datetime | None): When it was given up on
+            after too many failed attempts; such rows are never retried.
+        claimed_at (datetime.datetime | None): When a dispatcher claimed
+            it for sending; other dispatchers skip it until the claim
+            expires.
+        attempts (int): Failed delivery attempts so far.
+        last_error (str): Error from the most recent failed attempt.
+    """
+
+    id: int
+
+    loan: models.ForeignKey = models.ForeignKey(
+        "loan.LoanApplication",
+        on_delete=models.CASCADE,
+        related_name="notifications",
+    )
+    subject: models.CharField = models.CharField(max_length=255)
+    body: models.TextField = models.TextField()
+    recipients: models.JSONField = models.JSONField(default=list)
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    sent_at: models.DateTimeField = models.DateTimeField(null=True, blank=True)
+    failed_at: models.DateTimeField = models.DateTimeField(
+        null=True, blank=True
+    )
+    claimed_at: models.DateTimeField = models.DateTimeField(
+        null=True, blank=True
+    )
+    attempts: models.PositiveSmallIntegerField = (
+        models.PositiveSmallIntegerField(default=0)
+    )
+    last_error: models.TextField = models.TextField(blank=True, default="")
+
+    class Meta:
+        """Index matching the dispatcher's pending-rows query."""
+
+        indexes = [models.Index(fields=["sent_at", "id"])]
+
+    def __str__(self) -> str:
+        """Return a string representation of the NotificationOutbox row.
+
+        Returns:
+            str: Formatted string containing row id and subject.
+        """
+        return f"Notification {self.id} - {self.subject}"
+
+
+class FraudRuleConfig(models.Model):
+    """Admin-editable settings for one fraud rule.
+
+    Rows override the thresholds declared on the rule classes (and any
+    ``FRAUD_RULE_THRESHOLDS`` setting); the special rule name ``review``
+    holds the engine's review cutoff as ``{"amount": N}``. Saving or
+    deleting a row bumps the cached config version, so every worker
+    reloads within one request.
+
+    Attributes:
+        rule (str): Registered rule name, or ``review``.
+        enabled (bool): Whether the rule is evaluated at all.
+        shadow (bool | None): Evaluate the rule in shadow mode only;
+            None keeps the rule class default.
+        thresholds (dict): Threshold overrides for the rule.
+        updated_at (datetime.datetime): Last modification time.
+    """
+
+    id: int
+
+    rule: models.CharField = models.CharField(max_length=64, unique=True)
+    enabled: models.BooleanField = models.BooleanField(default=True)
+    shadow: models.BooleanField = models.BooleanField(
+        null=True, blank=True, default=None
+    )
+    thresholds: models.JSONField = models.JSONField(default=dict, blank=True)
+    updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Order rows by rule name."""
+
+        ordering = ["rule"]
+
+    def clean(self) -> None:
+        """Reject unknown rule names, threshold keys and threshold values
+        of the wrong type."""
+        from .config import validate_rule_config
+
+        validate_rule_config(self.rule, self.thresholds)
+
+    def __str__(self) -> str:
+        """Return a string representation of the FraudRuleConfig row.
+
+        Returns:
+            str: The rule name and whether it is enabled.
+        """
+        state = "enabled" if self.enabled else "disabled"
+        return f"{self.rule} ({state})"
+
+
+class ShadowRuleResult(models.Model):
+    """Would-be outcome of a shadow rule for one loan, next to the live
+    decision it is compared with.
+
+    Attributes:
+        loan (ForeignKey[LoanApplication]): The evaluated loan.
+        rule (str): Name of the shadow rule.
+        flagged (bool): Whether the shadow rule would have flagged it.
+        live_status (str): Loan status when the shadow rule ran.
+        evaluated_at (datetime.datetime): When the shadow rule ran.
+    """
+
+    id: int
+
+    loan: models.ForeignKey = models.ForeignKey(
+        "loan.LoanApplication",
+        on_delete=models.CASCADE,
+        related_name="shadow_results",
+    )
+    rule: models.CharField = models.CharField(max_length=64)
+    flagged: models.BooleanField = models.BooleanField()
+    live_status: models.CharField = models.CharField(max_length=10)
+    evaluated_at: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        """Index matching the per-rule comparison query."""
+
+        indexes = [models.Index(fields=["rule", "evaluated_at"])]
+
+    def __str__(self) -> str:
+        """Return a string representation of the ShadowRuleResult row.
+
+        Returns:
+            str: The rule, loan id and would-be outcome.
+        """
+        outcome = "flag" if self.flagged else "pass"
+        return f"{self.rule} on loan {self.loan_id}: {outcome}"
+
+
+class UserLoanStats(models.Model):
+    """Running statistics of the amounts a user has requested.
+
+    Updated in place on each loan creation with Welford's algorithm, so
+    the amount z-score rule reads one row instead of the loan history.
+
+    Attributes:
+        user (OneToOneField): The applicant; also the primary key.
+        count (int): Loans recorded.
+        mean (float): Mean requested amount.
+        m2 (float): Sum of squared deviations from the mean.
+        max_amount (Decimal): Largest requested amount.
+    """
+
+    user: models.OneToOneField = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="loan_stats",
+    )
+    count: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0
+    )
+    mean: models.FloatField = models.FloatField(default=0.0)
+    m2: models.FloatField = models.FloatField(default=0.0)
+    max_amount: models.DecimalField = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0
+    )
+
+    def __str__(self) -> str:
+        """Return a string representation of the UserLoanStats row.
+
+        Returns:
+            str: The user id, loan count and mean amount.
+        """
+        return f"User {self.pk}: {self.count} loans, mean {self.mean:.2f}"
+
+
+class PurposeBucket(models.Model):
+    """One LSH band hash of a loan's purpose MinHash signature.
+
+    Loans whose purposes are near-duplicates share buckets, so similar
+    purposes are found with an index lookup per band instead of
+    comparing every pair of loans.
+
+    Attributes:
+        loan (ForeignKey[LoanApplication]): The indexed loan.
+        user (ForeignKey): The loan's applicant, copied so matches from
+            the same user are excluded without a join.
+        band (int): Band number within the signature.
+        bucket (int): Hash of the band's rows, including the band number.
+    """
+
+    id: int
+
+    loan: models.ForeignKey = models.ForeignKey(
+        "loan.LoanApplication",
+        on_delete=models.CASCADE,
+        related_name="purpose_buckets",
+    )
+    user: models.ForeignKey = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    band: models.PositiveSmallIntegerField = (
+        models.PositiveSmallIntegerField()
+    )
+    bucket: models.BigIntegerField = models.BigIntegerField()
+
+    class Meta:
+        """One row per band per loan; bucket lookups are covered by an
+        index that also holds the applicant."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["loan", "band"], name="purpose_bucket_unique_band"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["bucket", "user"], name="purpose_bucket_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        """Return a string representation of the PurposeBucket row.
+
+        Returns:
+            str: The loan id, band and bucket.
+        """
+        return f"Loan {self.loan_id} band {self.band}: {self.bucket}"
+
+
+class UserCluster(models.Model):
+    """Node of the disjoint-set forest grouping linked accounts.
+
+    Each user points at a parent user; a root points at itself and
+    holds the totals of its cluster. Totals on other nodes are stale.
+
+    Attributes:
+        user (OneToOneField): The account; also the primary key.
+        parent (int): User id of the parent node.
+        size (int): Accounts in the cluster (roots only).
+        loan_count (int): Loans requested by the cluster (roots only).
+        loan_amount (Decimal): Amount requested by the cluster (roots
+            only).
+    """
+
+    user: models.OneToOneField = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="cluster",
+    )
+    parent: models.BigIntegerField = models.BigIntegerField()
+    size: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=1
+    )
+    loan_count: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0
+    )
+    loan_amount: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+
+    def __str__(self) -> str:
+        """Return a string representation of the UserCluster node.
+
+        Returns:
+            str: The user id and its parent.
+        """
+        return f"User {self.pk} -> {self.parent}"
+
+
+class UserRiskFeatures(models.Model):
+    """Precomputed fraud features of one user.
+
+    Created at registration and kept current by the loan creation and
+    status-transition paths (see fraud.risk_features), so rules and the
+    fraud model read one row instead of aggregating the loan history.
+    ``manage.py rebuild_features`` recomputes every row to repair drift.
+
+    Attributes:
+        user (OneToOneField): The applicant; also the primary key.
+        pending_count (int): Loans in PENDING.
+        approved_count (int): Loans in APPROVED.
+        rejected_count (int): Loans in REJECTED.
+        flagged_count (int): Loans in FLAGGED.
+        withdrawn_count (int): Loans in WITHDRAWN.
+        approved_exposure (Decimal): Total amount of approved loans.
+        last_applied_at (datetime): Creation time of the latest loan.
+        application_rate (float): Loans applied for, each decaying with
+            a one-day half-life, as of ``last_applied_at``.
+        email_domain (str): Normalized email domain, the key of the
+            user's domain cluster in DomainUserCount.
+    """
+
+    user: models.OneToOneField = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="risk_features",
+    )
+    pending_count: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0
+    )
+    approved_count: models.PositiveIntegerField = (
+        models.PositiveIntegerField(default=0)
+    )
+    rejected_count: models.PositiveIntegerField = (
+        models.PositiveIntegerField(default=0)
+    )
+    flagged_count: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0
+    )
+    withdrawn_count: models.PositiveIntegerField = (
+        models.PositiveIntegerField(default=0)
+    )
+    approved_exposure: models.DecimalField = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    last_applied_at: models.DateTimeField = models.DateTimeField(
+        null=True, blank=True
+    )
+    application_rate: models.FloatField = models.FloatField(default=0.0)
+    email_domain: models.CharField = models.CharField(
+        max_length=255, blank=True, default=""
+    )
+
+    def __str__(self) -> str:
+        """Return a string representation of the UserRiskFeatures row.
+
+        Returns:
+            str: The user id and its loan counts.
+        """
+        return (
+            f"User {self.pk}: {self.pending_count} pending, "
+            f"{self.approved_count} approved, {self.rejected_count} rejected"
+        )
+
+
+class FraudEngineConfig(models.Model):
+    """Settings of one engine configuration, keyed by its hash.
+
+    Decision records refer to the configuration they were made under by
+    ``version``, so replays can rebuild the same engine.
+
+    Attributes:
+        version (str): ``FraudEngine.version`` of the configuration.
+        config (dict): ``FraudEngine.describe()`` output.
+        created_at (datetime.datetime): When it was first used.
+    """
+
+    version: models.CharField = models.CharField(
+        max_length=16, primary_key=True
+    )
+    config: models.JSONField = models.JSONField()
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        """Return a string representation of the FraudEngineConfig row.
+
+        Returns:
+            str: The version and number of rules.
+        """
+        return f"Config {self.version} ({len(self.config['rules'])} rules)"
+
+
+class FraudDecisionRecord(models.Model):
+    """Inputs and outcome of one fraud evaluation, for audit and replay.
+
+    Attributes:
+        loan (ForeignKey[LoanApplication]): The evaluated loan.
+        config_version (str): FraudEngineConfig version that decided.
+        status (str): Resulting status.
+        reasons (list[int]): FraudReason codes of the flag reasons.
+        features (dict): Every feature value the engine loaded, with
+            decimals as floats and times as ISO strings.
+        elapsed_us (int): Evaluation time in microseconds; a batch's
+            time is shared equally among its loans.
+        decided_at (datetime.datetime): When the decision was written.
+    """
+
+    id: int
+
+    loan: models.ForeignKey = models.ForeignKey(
+        "loan.LoanApplication",
+        on_delete=models.CASCADE,
+        related_name="fraud_decisions",
+    )
+    config_version: models.CharField = models.CharField(max_length=16)
+    status: models.CharField = models.CharField(max_length=10)
+    reasons: models.JSONField = models.JSONField(default=list)
+    features: models.JSONField = models.JSONField(default=dict)
+    elapsed_us: models.PositiveIntegerField = models.PositiveIntegerField()
+    decided_at: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    def __str__(self) -> str:
+        """Return a string representation of the FraudDecisionRecord row.
+
+        Returns:
+            str: The loan id, outcome and config version.
+        """
+        return (
+            f"Loan {self.loan_id}: {self.status} "
+            f"(config {self.config_version})"
+        )
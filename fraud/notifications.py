@@ -0,0 +1,213 @@
+"""
+Module: Transactional outbox for admin fraud alert emails.
+
+Fraud services only insert NotificationOutbox rows. The dispatcher
+(``manage.py dispatch_notifications``) drains pending rows in batches
+over a single reused mail connection and can coalesce alerts into one
+digest email per time window. A batch is claimed in a short transaction
+and no lock is held while mail is sent; each email's rows are marked
+sent in their own transaction as soon as that email goes out. A claim
+left by a dispatcher that died expires after ``CLAIM_SECONDS``. A row
+whose email keeps failing is given up (``failed_at``) after
+``MAX_ATTEMPTS``, so it cannot hold back the rows queued after it.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+MAX_ATTEMPTS: int = 5  # Failed sends before a row is given up
+CLAIM_SECONDS: int = 600  # Claimed unsent rows older than this are reclaimed
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def alert_recipients() -> List[str]:
+    """Return the addresses that receive fraud alerts."""
+    return list(
+        getattr(settings, "FRAUD_ALERT_RECIPIENTS", ["admin@example.com"])
+    )
+
+
+def queue_flag_alerts(alerts: Sequence[Tuple[int, List[str]]]) -> None:
+    """Insert one outbox row per flagged loan; call inside the transaction
+    that writes the flags.
+
+    Args:
+        alerts: (loan id, reasons) pairs for flagged loans.
+    """
+    recipients = alert_recipients()
+    NotificationOutbox.objects.bulk_create(
+        NotificationOutbox(
+            loan_id=loan_id,
+            subject=f"Loan {loan_id} Flagged",
+            body=f"Loan {loan_id} flagged for reasons: {', '.join(reasons)}",
+            recipients=recipients,
+        )
+        for loan_id, reasons in alerts
+    )
+
+
+def _window_start(
+    moment: datetime.datetime, window: int
+) -> datetime.datetime:
+    """Floor a timestamp to the start of its digest window."""
+    seconds = int(moment.timestamp()) // window * window
+    return datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc)
+
+
+def _build_messages(
+    rows: List[NotificationOutbox], digest_window: Optional[int]
+) -> List[Tuple[EmailMessage, List[NotificationOutbox]]]:
+    """One message per row, or one digest per (window, recipients),
+    each with the rows it delivers."""
+    if not digest_window:
+        return [
+            (EmailMessage(row.subject, row.body, None, row.recipients), [row])
+            for row in rows
+        ]
+    groups: Dict[
+        Tuple[datetime.datetime, Tuple[str, ...]], List[NotificationOutbox]
+    ] = defaultdict(list)
+    for row in rows:
+        key = (
+            _window_start(row.created_at, digest_window),
+            tuple(row.recipients),
+        )
+        groups[key].append(row)
+    return [
+        (
+            EmailMessage(
+                f"Fraud alert digest: {len(group)} loans flagged "
+                f"since {start:%Y-%m-%d %H:%M} UTC",
+                "\n".join(row.body for row in group),
+                None,
+                list(recipients),
+            ),
+            group,
+        )
+        for (start, recipients), group in groups.items()
+    ]
+
+
+def _claim(
+    pending: QuerySet[NotificationOutbox], batch_size: int
+) -> List[NotificationOutbox]:
+    """Claim up to ``batch_size`` pending rows for this dispatcher.
+
+    Rows locked by another dispatcher are skipped rather than waited on,
+    and the lock is released as soon as the claim commits.
+
+    Returns:
+        List[NotificationOutbox]: The claimed rows, in id order.
+    """
+    now = timezone.now()
+    expired = now - datetime.timedelta(seconds=CLAIM_SECONDS)
+    with transaction.atomic():
+        rows = list(
+            pending.select_for_update(skip_locked=True)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+            .order_by("id")[:batch_size]
+        )
+        NotificationOutbox.objects.filter(
+            id__in=[row.id for row in rows]
+        ).update(claimed_at=now)
+    return rows
+
+
+def _release(rows: Sequence[NotificationOutbox]) -> None:
+    """Drop the claim on rows left unsent."""
+    NotificationOutbox.objects.filter(
+        id__in=[row.id for row in rows], sent_at__isnull=True
+    ).update(claimed_at=None)
+
+
+def _record_failure(rows: List[NotificationOutbox], exc: Exception) -> None:
+    """Count a failed send, giving up rows that reached MAX_ATTEMPTS."""
+    ids = [row.id for row in rows]
+    NotificationOutbox.objects.filter(id__in=ids).update(
+        attempts=F("attempts") + 1, last_error=str(exc), claimed_at=None
+    )
+    given_up = NotificationOutbox.objects.filter(
+        id__in=ids, attempts__gte=MAX_ATTEMPTS
+    ).update(failed_at=timezone.now())
+    if given_up:
+        logger.error(
+            "Gave up on %s fraud alerts after %s attempts: %s",
+            given_up,
+            MAX_ATTEMPTS,
+            exc,
+        )
+
+
+def dispatch_outbox(
+    batch_size: int = 100, digest_window: Optional[int] = None
+) -> int:
+    """Send one batch of pending alerts over a single mail connection.
+
+    Rows are claimed first (see ``_claim``) so concurrent dispatchers
+    never send the same alert twice, without holding locks over SMTP.
+    With ``digest_window`` only alerts from windows that have already
+    closed are sent, each window's alerts coalesced into one email per
+    recipient list. Emails go out in row order and each one's rows are
+    marked sent in their own transaction right away; the first failure
+    counts an attempt against that email's rows and ends the batch,
+    releasing the rest.
+
+    Args:
+        batch_size (int): Maximum number of outbox rows to handle.
+        digest_window (Optional[int]): Digest window length in seconds;
+            None or 0 sends one email per alert.
+
+    Returns:
+        int: Number of outbox rows marked as sent.
+    """
+    pending = NotificationOutbox.objects.filter(
+        sent_at__isnull=True, failed_at__isnull=True
+    )
+    if digest_window:
+        pending = pending.filter(
+            created_at__lt=_window_start(timezone.now(), digest_window)
+        )
+    sent_rows = 0
+    sent_emails = 0
+    rows = _claim(pending, batch_size)
+    if not rows:
+        return 0
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception:
+        logger.exception("Cannot connect to send fraud alerts")
+        _release(rows)
+        return 0
+    try:
+        for message, group in _build_messages(rows, digest_window):
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                logger.exception("Failed to send %s fraud alerts", len(group))
+                _record_failure(group, exc)
+                break
+            with transaction.atomic():
+                NotificationOutbox.objects.filter(
+                    id__in=[row.id for row in group]
+                ).update(sent_at=timezone.now())
+            sent_rows += len(group)
+            sent_emails += 1
+    finally:
+        connection.close()
+        _release(rows)
+    if sent_rows:
+        logger.info(
+            "Sent %s fraud alerts in %s emails", sent_rows, sent_emails
+        )
+    return sent_rows
@@ -0,0 +1,141 @@
+"""
+Module: MinHash/LSH index over loan purpose text.
+
+Fraud rings paste near-identical purposes into applications from many
+accounts. Each purpose is normalized, split into overlapping character
+shingles and summarized by a MinHash signature of ``NUM_PERM`` values;
+two signatures agree in each position with probability equal to the
+Jaccard similarity of the shingle sets. The signature is cut into
+``BANDS`` bands of ``ROWS`` values and each band is hashed into a
+``PurposeBucket`` row. Loans sharing a bucket are near-duplicate
+candidates, found through the bucket index without comparing pairs:
+with 16 bands of 4 rows, purposes 80% similar share at least one
+bucket over 99.9% of the time and 30% similar ones 12% of the time.
+
+The number of buckets two loans share estimates their similarity
+(``BANDS * s ** ROWS`` on average), which the purpose rule thresholds.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from loan.models import LoanApplication
+
+from .models import PurposeBucket
+
+NUM_PERM: int = 64  # MinHash values per signature
+BANDS: int = 16  # LSH bands per signature
+ROWS: int = NUM_PERM // BANDS  # Signature values hashed per band
+SHINGLE: int = 4  # Characters per shingle
+MIN_PURPOSE_LENGTH: int = 20  # Shorter purposes are too generic to index
+PRIME: int = (1 << 31) - 1  # Modulus of the universal hash family
+SEED: int = 20240501  # Fixed so signatures are stable across processes
+
+_rng = np.random.default_rng(SEED)
+_A: np.ndarray = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+_B: np.ndarray = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def normalize_purpose(text: str) -> str:
+    """Lower-case ``text`` and collapse punctuation and whitespace."""
+    return " ".join(re.findall(r"[^\W_]+", (text or "").lower()))
+
+
+def shingles(text: str) -> List[str]:
+    """Overlapping ``SHINGLE``-character substrings of normalized text."""
+    if len(text) <= SHINGLE:
+        return [text]
+    return [text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)]
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of a purpose.
+
+    Returns:
+        Optional[np.ndarray]: ``NUM_PERM`` unsigned values, or None when
+        the normalized purpose is shorter than ``MIN_PURPOSE_LENGTH``.
+    """
+    text = normalize_purpose(text)
+    if len(text) < MIN_PURPOSE_LENGTH:
+        return None
+    hashes = np.fromiter(
+        {zlib.crc32(s.encode()) % PRIME for s in shingles(text)},
+        dtype=np.uint64,
+    )
+    # (a * x + b) mod p stays below 2**63 for 31-bit a, x and b
+    values = (_A[:, None] * hashes[None, :] + _B[:, None]) % PRIME
+    return values.min(axis=1)
+
+
+def band_buckets(text: str) -> List[Tuple[int, int]]:
+    """``(band, bucket)`` pairs for a purpose; empty if not indexed."""
+    sig = signature(text)
+    if sig is None:
+        return []
+    rows = sig.astype("<u4").reshape(BANDS, ROWS)
+    buckets: List[Tuple[int, int]] = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(
+            bytes([band]) + rows[band].tobytes(), digest_size=8
+        ).digest()
+        buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+    return buckets
+
+
+def bucket_rows(loan: LoanApplication) -> List[PurposeBucket]:
+    """Unsaved ``PurposeBucket`` rows for a loan."""
+    return [
+        PurposeBucket(
+            loan_id=loan.pk, user_id=loan.user_id, band=band, bucket=bucket
+        )
+        for band, bucket in band_buckets(loan.purpose)
+    ]
+
+
+def index_purpose(loan: LoanApplication) -> int:
+    """Store a new loan's purpose buckets; call when it is created.
+
+    Returns:
+        int: Number of bucket rows written.
+    """
+    rows = bucket_rows(loan)
+    PurposeBucket.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def similar_purposes(
+    loans: Sequence[LoanApplication],
+) -> Dict[int, Dict[int, int]]:
+    """Find other users whose loan purposes collide with each loan's.
+
+    One query over the bucket index serves the whole sequence; it reads
+    distinct (bucket, user) pairs, so a user repeating a purpose does
+    not multiply the rows.
+
+    Returns:
+        Dict[int, Dict[int, int]]: Per loan pk, how many of the loan's
+        buckets each other user's loans share, keyed by user id.
+    """
+    by_bucket: Dict[int, List[LoanApplication]] = defaultdict(list)
+    for loan in loans:
+        for _band, bucket in band_buckets(loan.purpose):
+            by_bucket[bucket].append(loan)
+    matches: Dict[int, Counter] = {loan.pk: Counter() for loan in loans}
+    if not by_bucket:
+        return {pk: {} for pk in matches}
+    rows = (
+        PurposeBucket.objects.filter(bucket__in=list(by_bucket))
+        .order_by()
+        .values_list("bucket", "user_id")
+        .distinct()
+    )
+    for bucket, user_id in rows:
+        for loan in by_bucket[bucket]:
+            if user_id != loan.user_id:
+                matches[loan.pk][user_id] += 1
+    return {pk: dict(users) for pk, users in matches.items()}
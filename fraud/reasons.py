@@ -0,0 +1,87 @@
+"""
+Module: Integer codes for fraud flag reasons.
+
+FraudFlag rows reference a FraudReason row instead of repeating the
+reason text. Codes are created on first use and never deleted, so the
+text-to-code map is cached and only reasons never seen before cost a
+query.
+
+Reasons are either produced by the engine (a rule's reason or a rule
+timeout) or set by people, such as an admin's manual flag. Re-evaluating
+a loan only ever replaces the engine's own reasons.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Pattern, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .engine import TIMEOUT_REASON
+from .models import FraudReason
+from .rules import RULE_REGISTRY
+
+MANUAL_REASON: str = "Manually flagged by admin"
+REASON_CODES_CACHE_KEY: str = "fraud_reason_codes"
+
+
+def reason_codes(texts: Iterable[str]) -> Dict[str, int]:
+    """Return the code of each reason text, creating missing reasons.
+
+    New codes are only cached once the transaction creating them has
+    committed, so a rollback never leaves a cached code without a row.
+
+    Args:
+        texts (Iterable[str]): Reason texts, in any order.
+
+    Returns:
+        Dict[str, int]: Code keyed by reason text.
+    """
+    wanted = list(dict.fromkeys(texts))
+    cached: Dict[str, int] = cache.get(REASON_CODES_CACHE_KEY) or {}
+    missing = [text for text in wanted if text not in cached]
+    if not missing:
+        return {text: cached[text] for text in wanted}
+    found = dict(
+        FraudReason.objects.filter(text__in=missing).values_list("text", "id")
+    )
+    new = [text for text in missing if text not in found]
+    if new:
+        FraudReason.objects.bulk_create(
+            [FraudReason(text=text) for text in new], ignore_conflicts=True
+        )
+        found.update(
+            FraudReason.objects.filter(text__in=new).values_list("text", "id")
+        )
+
+    def remember() -> None:
+        codes = cache.get(REASON_CODES_CACHE_KEY) or {}
+        codes.update(found)
+        cache.set(REASON_CODES_CACHE_KEY, codes, None)
+
+    transaction.on_commit(remember)
+    return {text: cached.get(text) or found[text] for text in wanted}
+
+
+def reason_code(text: str) -> int:
+    """Return the code of one reason text, creating it if missing."""
+    return reason_codes([text])[text]
+
+
+@lru_cache(maxsize=8)
+def _engine_pattern(templates: Tuple[str, ...]) -> Pattern[str]:
+    alternatives = (
+        ".+".join(re.escape(part) for part in re.split(r"{[^}]*}", text))
+        for text in templates
+    )
+    return re.compile("|".join(f"(?:{pattern})" for pattern in alternatives))
+
+
+def is_engine_reason(text: str) -> bool:
+    """Return True if ``text`` is a reason the engine produces, under any
+    thresholds: a registered rule's reason or a rule timeout."""
+    templates = tuple(
+        sorted(rule.reason for rule in RULE_REGISTRY.values())
+    ) + (TIMEOUT_REASON,)
+    return _engine_pattern(templates).fullmatch(text) is not None
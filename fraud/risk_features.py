@@ -0,0 +1,292 @@
+"""
+Module: Per-user fraud feature store maintained on the write path.
+
+Each user has one ``UserRiskFeatures`` row, created at registration
+and updated by the hooks below whenever a loan is created or changes
+status. A loan's evaluation therefore reads the applicant's counts,
+exposure and application rate from that row, joined into the engine's
+feature query, instead of aggregating their loan history.
+
+The application rate is a count of the user's loans in which each loan
+weighs half as much every ``RATE_HALF_LIFE`` seconds. It is stored as
+of the latest application and decayed to the evaluation time on read.
+
+Hooks only apply deltas, so a missed write (a loan changed outside
+these paths, or a user older than the store) leaves the row off until
+``manage.py rebuild_features`` recomputes every row from the loans.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import (Any, Dict, Iterable, List, Mapping, Optional, Tuple,
+                    cast)
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, Field, Value, When
+from django.utils import timezone
+
+from loan.models import LoanApplication
+from users.models import normalize_email_domain
+
+from .models import UserRiskFeatures
+
+RATE_HALF_LIFE: float = 86400.0  # Seconds for a loan's weight to halve
+STATUS_FIELDS: Dict[str, str] = {
+    "PENDING": "pending_count",
+    "APPROVED": "approved_count",
+    "REJECTED": "rejected_count",
+    "FLAGGED": "flagged_count",
+    "WITHDRAWN": "withdrawn_count",
+}
+FEATURE_FIELDS: Tuple[str, ...] = (
+    *STATUS_FIELDS.values(),
+    "approved_exposure",
+    "last_applied_at",
+    "application_rate",
+    "email_domain",
+)
+# (user id, loan amount, old status, new status)
+StatusChange = Tuple[int, Any, str, str]
+logger: logging.Logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+def decay(
+    rate: float,
+    since: Optional[datetime.datetime],
+    until: datetime.datetime,
+) -> float:
+    """``rate`` recorded at ``since``, decayed to ``until``."""
+    if since is None or until <= since:
+        return rate
+    elapsed = (until - since).total_seconds()
+    return rate * 0.5 ** (elapsed / RATE_HALF_LIFE)
+
+
+def _add_application(
+    row: UserRiskFeatures, created_at: datetime.datetime
+) -> None:
+    """Fold one application time into a row's rate, in memory."""
+    last = row.last_applied_at
+    if last is None or created_at >= last:
+        row.application_rate = (
+            decay(row.application_rate, last, created_at) + 1
+        )
+        row.last_applied_at = created_at
+    else:  # Recorded out of order: it has already decayed
+        row.application_rate += decay(1.0, created_at, last)
+
+
+def _count_loan(row: UserRiskFeatures, status: str, amount: Any) -> None:
+    """Count one loan under its status in a row, in memory."""
+    field = STATUS_FIELDS[status]
+    setattr(row, field, getattr(row, field) + 1)
+    if status == "APPROVED":
+        row.approved_exposure += amount
+
+
+def create_risk_features(user: Any) -> None:
+    """Create a newly registered user's row."""
+    UserRiskFeatures.objects.get_or_create(
+        pk=user.pk,
+        defaults={"email_domain": normalize_email_domain(user.email)},
+    )
+
+
+def record_application(loan: LoanApplication) -> None:
+    """Count a newly created loan in its applicant's row.
+
+    Call inside the transaction creating the loan. The row is locked
+    while the rate is decayed, so concurrent applications by the same
+    user are all counted.
+
+    Args:
+        loan (LoanApplication): The saved loan.
+    """
+    with transaction.atomic():
+        locked = UserRiskFeatures.objects.select_for_update()
+        row = locked.filter(pk=loan.user_id).first()
+        if row is None:
+            # A user registered before the store existed
+            create_risk_features(loan.user)
+            row = locked.get(pk=loan.user_id)
+        _count_loan(row, loan.status, loan.amount)
+        _add_application(row, loan.created_at)
+        row.save(
+            update_fields=[
+                STATUS_FIELDS[loan.status],
+                "approved_exposure",
+                "application_rate",
+                "last_applied_at",
+            ]
+        )
+
+
+def apply_status_changes(changes: Iterable[StatusChange]) -> None:
+    """Move loans between status counts with one UPDATE.
+
+    Args:
+        changes (Iterable[StatusChange]): One entry per loan whose
+            status changed; unchanged entries are ignored.
+    """
+    deltas: Dict[int, Dict[str, Any]] = defaultdict(lambda: defaultdict(int))
+    for user_id, amount, old, new in changes:
+        if old == new:
+            continue
+        deltas[user_id][STATUS_FIELDS[old]] -= 1
+        deltas[user_id][STATUS_FIELDS[new]] += 1
+        if old == "APPROVED":
+            deltas[user_id]["approved_exposure"] -= Decimal(amount)
+        if new == "APPROVED":
+            deltas[user_id]["approved_exposure"] += Decimal(amount)
+    if not deltas:
+        return
+    fields = {field for delta in deltas.values() for field in delta}
+    updates: Dict[str, Any] = {}
+    for field in fields:
+        whens: List[When] = []
+        for user_id, delta in deltas.items():
+            change = delta.get(field)
+            if not change:
+                continue
+            whens.append(
+                When(
+                    pk=user_id,
+                    **{f"{field}__gte": -change},
+                    then=F(field) + Value(change),
+                )
+            )
+            if change < 0:  # A row that missed a write stays at zero
+                whens.append(When(pk=user_id, then=Value(0)))
+        updates[field] = Case(
+            *whens,
+            default=F(field),
+            output_field=cast(
+                Field, UserRiskFeatures._meta.get_field(field)
+            ),
+        )
+    UserRiskFeatures.objects.filter(pk__in=deltas).update(**updates)
+
+
+def record_status_change(loan: LoanApplication, old_status: str) -> None:
+    """Move one loan from ``old_status`` to its current status."""
+    apply_status_changes(
+        [(loan.user_id, loan.amount, old_status, loan.status)]
+    )
+
+
+def empty_risk_features() -> Dict[str, Any]:
+    """Features of a user without other loans."""
+    features: Dict[str, Any] = dict.fromkeys(STATUS_FIELDS.values(), 0)
+    features.update(
+        approved_exposure=0.0,
+        last_applied_at=None,
+        application_rate=0.0,
+        email_domain="",
+    )
+    return features
+
+
+def prior_risk_features(
+    row: Optional[Mapping[str, Any]],
+    status: str,
+    amount: Any,
+    now: Optional[datetime.datetime] = None,
+) -> Dict[str, Any]:
+    """Features of a stored row, excluding the evaluated loan's status.
+
+    Counts and exposure describe the applicant's other loans, so a
+    decision never feeds back into its own inputs. The rate is decayed
+    to ``now`` and still includes the loan.
+
+    Args:
+        row: The applicant's ``FEATURE_FIELDS``, or None without a row.
+        status: The evaluated loan's stored status.
+        amount: Its requested amount.
+        now: Evaluation time; defaults to the current time.
+
+    Returns:
+        Dict[str, Any]: Counts per status field, ``approved_exposure``,
+        ``last_applied_at``, ``application_rate`` and ``email_domain``.
+    """
+    if row is None:
+        return empty_risk_features()
+    features = {field: row[field] for field in FEATURE_FIELDS}
+    field = STATUS_FIELDS.get(status)
+    if field is not None:
+        features[field] = max(features[field] - 1, 0)
+    exposure = float(features["approved_exposure"])
+    if status == "APPROVED":
+        exposure = max(exposure - float(amount), 0.0)
+    features["approved_exposure"] = exposure
+    features["application_rate"] = decay(
+        features["application_rate"],
+        features["last_applied_at"],
+        now or timezone.now(),
+    )
+    return features
+
+
+def _rebuild_users(user_ids: List[int]) -> int:
+    """Recompute some users' rows in one transaction.
+
+    The rows are locked before the loans are read. The hooks lock or
+    update the same rows after writing a loan, so a concurrent write
+    is either in the loans read here or applied to the rebuilt row.
+
+    Returns:
+        int: Number of rows written.
+    """
+    with transaction.atomic():
+        emails = dict(
+            User.objects.filter(pk__in=user_ids).values_list("pk", "email")
+        )
+        UserRiskFeatures.objects.bulk_create(
+            [UserRiskFeatures(pk=user_id) for user_id in emails],
+            ignore_conflicts=True,
+        )
+        list(
+            UserRiskFeatures.objects.select_for_update()
+            .filter(pk__in=emails)
+            .values_list("pk", flat=True)
+        )
+        rows = {
+            user_id: UserRiskFeatures(
+                pk=user_id, email_domain=normalize_email_domain(email)
+            )
+            for user_id, email in emails.items()
+        }
+        loans = (
+            LoanApplication.objects.filter(user_id__in=emails)
+            .order_by("user_id", "created_at")
+            .values_list("user_id", "status", "amount", "created_at")
+        )
+        for user_id, status, amount, created_at in loans:
+            row = rows[user_id]
+            _count_loan(row, status, amount)
+            _add_application(row, created_at)
+        UserRiskFeatures.objects.bulk_update(rows.values(), FEATURE_FIELDS)
+    return len(rows)
+
+
+def rebuild_features(chunk_size: int = 2000) -> int:
+    """Recompute every user's row from their loans.
+
+    Users are rebuilt ``chunk_size`` at a time, each chunk in its own
+    transaction that reads the loans per user in creation order on the
+    (user, created_at) index while holding the chunk's rows, so loans
+    written during the rebuild are never lost.
+
+    Returns:
+        int: Number of rows written.
+    """
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    written = sum(
+        _rebuild_users(user_ids[start:start + chunk_size])
+        for start in range(0, len(user_ids), chunk_size)
+    )
+    logger.info("Rebuilt risk features of %s users", written)
+    return written
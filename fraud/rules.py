@@ -0,0 +1,310 @@
+"""
+Module: Pluggable fraud detection rules and their registry.
+
+Each rule is a small class declaring its relative evaluation cost, the
+named features it reads (see fraud.features) and its default
+thresholds. Rules are pure predicates over those features, which lets
+the engine order them cheapest-first and stop early once a loan's
+outcome is decided. New rules only need a subclass decorated with
+``register_rule``.
+"""
+
+from typing import (Any, ClassVar, Dict, Mapping, Optional, Tuple, Type,
+                    TypeVar)
+
+# Relative evaluation costs used by the engine to order rules.
+COST_MEMORY: int = 0  # Pure function of data already in memory
+COST_CACHE: int = 10  # Cache lookup, database query only on a miss
+COST_QUERY: int = 100  # At least one database round trip
+
+RuleT = TypeVar("RuleT", bound=Type["FraudRule"])
+
+
+def check_threshold(owner: str, name: str, default: Any, value: Any) -> None:
+    """Check a threshold override against the type of its default.
+
+    Integer thresholds take integers; float thresholds take any number.
+    Booleans are never numbers here.
+
+    Raises:
+        ValueError: If ``value`` does not fit the default's type.
+    """
+    if isinstance(default, bool) or default is None:
+        return
+    if isinstance(default, int):
+        allowed: Tuple[type, ...] = (int,)
+    elif isinstance(default, float):
+        allowed = (int, float)
+    else:
+        allowed = (type(default),)
+    if isinstance(value, bool) or not isinstance(value, allowed):
+        raise ValueError(
+            f"Threshold {name} of {owner} must be "
+            f"{type(default).__name__}, not {type(value).__name__}"
+        )
+
+
+class FraudRule:
+    """Base class for a single fraud detection rule.
+
+    Attributes:
+        name (str): Unique registry key for the rule.
+        reason (str): Flag reason template, formatted with the thresholds.
+        cost (int): Relative evaluation cost; cheaper rules run first.
+        inputs (Tuple[str, ...]): Feature names passed to ``check``.
+        thresholds (Dict[str, Any]): Default threshold values.
+        shadow (bool): Candidate rule evaluated off the request path
+            and recorded without affecting loan status; admins can
+            override this per rule.
+        timeout (Optional[float]): Seconds this rule may take when rules
+            run concurrently; None uses the engine's timeout.
+        timeout_outcome (Optional[str]): "pass" or "flag" when the rule
+            times out; None uses the engine's fallback.
+    """
+
+    name: ClassVar[str] = ""
+    reason: ClassVar[str] = ""
+    cost: ClassVar[int] = COST_QUERY
+    inputs: ClassVar[Tuple[str, ...]] = ()
+    thresholds: ClassVar[Dict[str, Any]] = {}
+    shadow: ClassVar[bool] = False
+    timeout: ClassVar[Optional[float]] = None
+    timeout_outcome: ClassVar[Optional[str]] = None
+
+    def __init__(self, **overrides: Any) -> None:
+        """Bind the rule to its thresholds, applying any overrides.
+
+        Raises:
+            ValueError: If an override names an undeclared threshold or
+                does not fit the type of its default.
+        """
+        unknown = set(overrides) - set(self.thresholds)
+        if unknown:
+            raise ValueError(
+                f"Unknown thresholds for rule {self.name}: "
+                f"{', '.join(sorted(unknown))}"
+            )
+        for key, value in overrides.items():
+            check_threshold(
+                f"rule {self.name}", key, self.thresholds[key], value
+            )
+        self.params: Dict[str, Any] = {**self.thresholds, **overrides}
+
+    @property
+    def reason_text(self) -> str:
+        """Flag reason with the bound threshold values filled in."""
+        return self.reason.format(**self.params)
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        """Return True when the loan described by ``features`` should be
+        flagged."""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.params}>"
+
+
+RULE_REGISTRY: Dict[str, Type[FraudRule]] = {}
+
+
+def register_rule(rule_cls: RuleT) -> RuleT:
+    """Class decorator adding a rule to the registry.
+
+    Raises:
+        ValueError: If the rule has no name or the name is already taken.
+    """
+    if not rule_cls.name:
+        raise ValueError(f"{rule_cls.__name__} must declare a name")
+    if rule_cls.name in RULE_REGISTRY:
+        raise ValueError(f"Fraud rule already registered: {rule_cls.name}")
+    RULE_REGISTRY[rule_cls.name] = rule_cls
+    return rule_cls
+
+
+@register_rule
+class AmountThresholdRule(FraudRule):
+    """Flag loans whose requested amount exceeds a fixed ceiling."""
+
+    name = "amount_threshold"
+    reason = "Amount exceeds threshold"
+    cost = COST_MEMORY
+    inputs = ("amount",)
+    thresholds = {"max_amount": 5000000}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        return features["amount"] > self.params["max_amount"]
+
+
+@register_rule
+class BlockedDomainRule(FraudRule):
+    """Flag loans from users on a disposable or blocked email domain."""
+
+    name = "blocked_domain"
+    reason = "Email domain is disposable or blocked"
+    cost = COST_MEMORY
+    inputs = ("blocked_domain",)
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        return bool(features["blocked_domain"])
+
+
+@register_rule
+class EmailDomainRule(FraudRule):
+    """Flag loans from users whose email domain is shared by many users."""
+
+    name = "email_domain"
+    reason = "Email domain used by more than {max_users} users"
+    cost = COST_CACHE
+    inputs = ("domain_user_count",)
+    thresholds = {"max_users": 10}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        return features["domain_user_count"] > self.params["max_users"]
+
+
+@register_rule
+class RecentLoansRule(FraudRule):
+    """Flag users applying for many loans within 24 hours."""
+
+    name = "recent_loans"
+    reason = "More than {max_loans} loans in 24 hours"
+    cost = COST_CACHE
+    inputs = ("recent_loan_count",)
+    thresholds = {"max_loans": 3}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        return features["recent_loan_count"] > self.params["max_loans"]
+
+
+@register_rule
+class VelocityWindowsRule(FraudRule):
+    """Flag users exceeding a loan count over 1h, 24h or 7d, or a total
+    requested amount over 24h."""
+
+    name = "velocity_windows"
+    reason = (
+        "Loan velocity over limits ({max_loans_1h}/1h, {max_loans_24h}/24h, "
+        "{max_loans_7d}/7d or {max_amount_24h} per 24h)"
+    )
+    cost = COST_QUERY
+    inputs = ("loan_windows",)
+    thresholds = {
+        "max_loans_1h": 2,
+        "max_loans_24h": 3,
+        "max_loans_7d": 10,
+        "max_amount_24h": 10000000,
+    }
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        windows = features["loan_windows"]
+        return (
+            windows["count_1h"] > self.params["max_loans_1h"]
+            or windows["count_24h"] > self.params["max_loans_24h"]
+            or windows["count_7d"] > self.params["max_loans_7d"]
+            or windows["amount_24h"] > self.params["max_amount_24h"]
+        )
+
+
+@register_rule
+class AmountZScoreRule(FraudRule):
+    """Flag amounts far above what the applicant usually requests.
+
+    The z-score is taken against the user's other loans. The standard
+    deviation is floored at ``min_spread`` times the mean, so a history
+    of identical amounts does not flag every small change.
+    """
+
+    name = "amount_zscore"
+    reason = (
+        "Amount more than {max_zscore} standard deviations above the "
+        "user's average"
+    )
+    cost = COST_QUERY
+    inputs = ("amount", "amount_stats")
+    thresholds = {"max_zscore": 3.0, "min_loans": 5, "min_spread": 0.1}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        stats = features["amount_stats"]
+        if stats["count"] < self.params["min_loans"]:
+            return False
+        spread = max(
+            stats["std"], self.params["min_spread"] * abs(stats["mean"])
+        )
+        if spread <= 0:
+            return False
+        zscore = (float(features["amount"]) - stats["mean"]) / spread
+        return zscore > self.params["max_zscore"]
+
+
+@register_rule
+class PurposeRingRule(FraudRule):
+    """Flag loans whose purpose text is a near-duplicate of purposes
+    submitted by several other users.
+
+    A user counts as a match when their loans share at least
+    ``min_buckets`` of this purpose's LSH buckets (see
+    fraud.purpose_lsh; 4 of 16 corresponds to roughly 70% similarity).
+    Templated purposes can match across honest users, so the limits are
+    not tuned yet; the rule ships in shadow mode.
+    """
+
+    name = "purpose_ring"
+    reason = "Purpose copied from more than {max_users} other users"
+    cost = COST_QUERY
+    shadow = True
+    inputs = ("purpose_matches",)
+    thresholds = {"max_users": 2, "min_buckets": 4}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        users = sum(
+            shared >= self.params["min_buckets"]
+            for shared in features["purpose_matches"].values()
+        )
+        return users > self.params["max_users"]
+
+
+@register_rule
+class AccountClusterRule(FraudRule):
+    """Flag loans from accounts linked (by email domain, client address
+    or copied purpose) to a large or busy cluster of accounts.
+
+    Cluster loan totals cover every loan ever made, in any status, so
+    the limits are not calibrated yet; the rule ships in shadow mode.
+    """
+
+    name = "account_cluster"
+    reason = (
+        "Linked account cluster over limits ({max_users} users, "
+        "{max_loans} loans or {max_amount} requested)"
+    )
+    cost = COST_QUERY
+    shadow = True
+    inputs = ("cluster",)
+    thresholds = {"max_users": 10, "max_loans": 30, "max_amount": 50000000}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        cluster = features["cluster"]
+        return (
+            cluster["size"] > self.params["max_users"]
+            or cluster["loan_count"] > self.params["max_loans"]
+            or cluster["loan_amount"] > self.params["max_amount"]
+        )
+
+
+@register_rule
+class ModelScoreRule(FraudRule):
+    """Flag loans the logistic-regression model scores as likely fraud.
+
+    The score comes from fraud.scoring and is None, never flagging,
+    until ``manage.py train_fraud_model`` has written a model.
+    """
+
+    name = "model_score"
+    reason = "Fraud model score above {max_score}"
+    cost = COST_QUERY
+    inputs = ("fraud_score",)
+    thresholds = {"max_score": 0.9}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        score = features["fraud_score"]
+        return score is not None and score > self.params["max_score"]
@@ -0,0 +1,284 @@
+"""
+Module: Logistic-regression fraud score over engine features.
+
+The model is a single float64 vector saved with ``np.save``: the
+intercept followed by one coefficient per entry of ``VECTOR_FIELDS``.
+Feature standardization is folded into the coefficients at training
+time, so scoring is ``sigmoid(X @ w + b)`` with no other state. Each
+process maps the file read-only with ``np.load(mmap_mode="r")`` and maps
+it again only when the file is replaced, which it checks at most every
+``STAT_INTERVAL`` seconds.
+
+Feature vectors are built from ``SCORE_INPUTS``, all of which the
+engine already loads with its one annotated query (or the batch
+loaders), so scoring adds no round trip. The applicant's history comes
+from their precomputed ``UserRiskFeatures`` row, which excludes the
+scored loan's own status so training labels never leak into inputs.
+``train_fraud_model`` fits the weights on historical APPROVED/REJECTED
+decisions with Newton's method, using the features recorded when each
+loan was first evaluated.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from loan.models import LoanApplication
+
+from .models import FraudDecisionRecord
+
+# Engine features the model reads; all prefetched or in memory
+SCORE_INPUTS: Tuple[str, ...] = (
+    "amount",
+    "amount_stats",
+    "domain_user_count",
+    "cluster",
+    "blocked_domain",
+    "risk_features",
+)
+VECTOR_FIELDS: Tuple[str, ...] = (
+    "log_amount",
+    "amount_zscore",
+    "log_user_loans",
+    "log_domain_users",
+    "log_linked_accounts",
+    "log_cluster_loans",
+    "blocked_domain",
+    "log_rejected_loans",
+    "log_flagged_loans",
+    "log_approved_exposure",
+)
+ZSCORE_CLIP: float = 10.0  # Bound on the amount z-score feature
+LABELS: Dict[str, float] = {"APPROVED": 0.0, "REJECTED": 1.0}
+STAT_INTERVAL: float = 1.0  # Seconds between checks for a replaced file
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def vectorize(features: Mapping[str, Any]) -> List[float]:
+    """Model inputs, in ``VECTOR_FIELDS`` order, for one loan."""
+    amount = float(features["amount"])
+    stats = features["amount_stats"]
+    zscore = 0.0
+    if stats["count"] >= 2:
+        spread = max(stats["std"], 0.1 * abs(stats["mean"]))
+        if spread > 0:
+            zscore = (amount - stats["mean"]) / spread
+    cluster = features["cluster"]
+    risk = features["risk_features"]
+    return [
+        math.log1p(max(amount, 0.0)),
+        min(max(zscore, -ZSCORE_CLIP), ZSCORE_CLIP),
+        math.log1p(stats["count"]),
+        math.log1p(features["domain_user_count"]),
+        math.log1p(cluster["size"] - 1),
+        math.log1p(cluster["loan_count"]),
+        float(bool(features["blocked_domain"])),
+        math.log1p(risk["rejected_count"]),
+        math.log1p(risk["flagged_count"]),
+        math.log1p(risk["approved_exposure"]),
+    ]
+
+
+def sigmoid(values: np.ndarray) -> np.ndarray:
+    """Logistic function, without overflow for large negative inputs."""
+    return np.exp(-np.logaddexp(0.0, -values))
+
+
+def score_matrix(weights: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Fraud probability of each row of ``matrix``; one matrix multiply."""
+    return sigmoid(matrix @ weights[1:] + weights[0])
+
+
+_loaded: Optional[Tuple[str, Tuple[int, int, int], np.ndarray]] = None
+# Path, monotonic time of its last stat and the weights it answered
+_checked: Optional[Tuple[str, float, Optional[np.ndarray]]] = None
+_lock = threading.Lock()
+
+
+def _load(path: str) -> Optional[np.ndarray]:
+    """Map ``path`` unless it is already mapped; None while the file is
+    missing or unusable."""
+    global _loaded
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if _loaded is None or _loaded[:2] != (path, version):
+        try:
+            weights = np.load(path, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError):
+            logger.exception("Cannot load fraud model %s", path)
+            return None
+        if weights.shape != (len(VECTOR_FIELDS) + 1,):
+            logger.error(
+                "Fraud model %s has shape %s; expected %s weights",
+                path,
+                weights.shape,
+                len(VECTOR_FIELDS) + 1,
+            )
+            return None
+        _loaded = (path, version, weights)
+    return _loaded[2]
+
+
+def get_weights() -> Optional[np.ndarray]:
+    """Return this process's mapping of ``FRAUD_MODEL_PATH``.
+
+    The file is stat'ed at most every ``STAT_INTERVAL`` seconds and
+    re-mapped when it was replaced; None is returned while it is missing
+    or does not fit ``VECTOR_FIELDS``.
+    """
+    global _checked
+    path: str = settings.FRAUD_MODEL_PATH
+    checked = _checked
+    now = time.monotonic()
+    if (
+        checked is not None
+        and checked[0] == path
+        and now - checked[1] < STAT_INTERVAL
+    ):
+        return checked[2]
+    with _lock:
+        weights = _load(path)
+        _checked = (path, now, weights)
+    return weights
+
+
+def score(features: Mapping[str, Any]) -> Optional[float]:
+    """Fraud probability for one loan, or None without a model."""
+    scores = score_many([features])
+    return None if scores is None else scores[0]
+
+
+def score_many(
+    rows: Sequence[Mapping[str, Any]],
+) -> Optional[List[float]]:
+    """Fraud probabilities for many loans with one matrix multiply, or
+    None without a model."""
+    weights = get_weights()
+    if weights is None:
+        return None
+    matrix = np.array([vectorize(row) for row in rows], dtype=np.float64)
+    return score_matrix(weights, matrix.reshape(len(rows), -1)).tolist()
+
+
+def fit_logistic(
+    matrix: np.ndarray,
+    labels: np.ndarray,
+    l2: float = 1.0,
+    iterations: int = 25,
+    tolerance: float = 1e-8,
+) -> np.ndarray:
+    """Fit L2-regularized logistic regression with Newton's method.
+
+    Columns are standardized for the fit, and the scaling is folded back
+    into the returned weights so they apply to raw vectors.
+
+    Args:
+        matrix (np.ndarray): One row per loan, ``VECTOR_FIELDS`` columns.
+        labels (np.ndarray): 1 for fraud, 0 otherwise.
+        l2 (float): Penalty on the standardized coefficients.
+        iterations (int): Maximum Newton steps.
+        tolerance (float): Stop once the step is smaller than this.
+
+    Returns:
+        np.ndarray: Intercept followed by one coefficient per column.
+    """
+    mean = matrix.mean(axis=0)
+    scale = matrix.std(axis=0)
+    scale[scale == 0] = 1.0
+    design = np.hstack(
+        [np.ones((len(matrix), 1)), (matrix - mean) / scale]
+    )
+    penalty = np.full(design.shape[1], l2)
+    penalty[0] = 0.0  # The intercept is not penalized
+    weights = np.zeros(design.shape[1])
+    for _ in range(iterations):
+        prob = sigmoid(design @ weights)
+        gradient = design.T @ (prob - labels) + penalty * weights
+        hessian = (design.T * (prob * (1 - prob))) @ design
+        step = np.linalg.solve(hessian + np.diag(penalty + 1e-9), gradient)
+        weights -= step
+        if np.abs(step).max() < tolerance:
+            break
+    coefficients = weights[1:] / scale
+    intercept = weights[0] - coefficients @ mean
+    return np.concatenate([[intercept], coefficients])
+
+
+def save_weights(weights: np.ndarray, path: str) -> None:
+    """Write weights beside ``path`` and move them into place, so
+    running workers keep their mapping until they see the new file."""
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, np.asarray(weights, dtype=np.float64))
+    os.replace(tmp_path, path)
+
+
+def _recorded_features(
+    loans: Sequence[LoanApplication],
+) -> Dict[int, Dict[str, Any]]:
+    """Features of each loan's first decision record holding every
+    ``SCORE_INPUTS`` entry, keyed by loan pk."""
+    recorded: Dict[int, Dict[str, Any]] = {}
+    records = (
+        FraudDecisionRecord.objects.filter(loan__in=loans)
+        .order_by("loan_id", "pk")
+        .values_list("loan_id", "features")
+    )
+    for loan_id, features in records:
+        if loan_id not in recorded and all(
+            name in features for name in SCORE_INPUTS
+        ):
+            recorded[loan_id] = features
+    return recorded
+
+
+def load_training_data(
+    chunk_size: int = 2000,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Feature matrix and labels of every APPROVED or REJECTED loan.
+
+    Each loan's features come from its first decision record, as the
+    engine saw them before an admin decided it. Loans without a usable
+    record (evaluated before records existed) fall back to features
+    loaded from current data, which can include later information such
+    as the decision itself; their number is returned so callers can
+    report it.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, int]: ``VECTOR_FIELDS`` matrix,
+        0/1 labels (1 for REJECTED) and the number of loans whose
+        features were loaded from current data.
+    """
+    from .features import load_features_many
+
+    rows: List[List[float]] = []
+    labels: List[float] = []
+    current = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            LoanApplication.objects.filter(
+                status__in=LABELS, pk__gt=last_pk
+            ).order_by("pk")[:chunk_size]
+        )
+        if not chunk:
+            break
+        table: Dict[int, Mapping[str, Any]] = dict(_recorded_features(chunk))
+        missing = [loan for loan in chunk if loan.pk not in table]
+        if missing:
+            table.update(load_features_many(missing, SCORE_INPUTS))
+            current += len(missing)
+        for loan in chunk:
+            rows.append(vectorize(table[loan.pk]))
+            labels.append(LABELS[loan.status])
+        last_pk = chunk[-1].pk
+    matrix = np.array(rows, dtype=np.float64).reshape(-1, len(VECTOR_FIELDS))
+    return matrix, np.array(labels, dtype=np.float64), current
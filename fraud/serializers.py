@@ -14,11 +14,24 @@ logger: logging.Logger = logging.getLogger(__name__)
 
 
 class FraudFlagSerializer(serializers.ModelSerializer):
-    """Serializer for FraudFlag instances to expose reason and timestamp."""
+    """Serializer for FraudFlag instances to expose reason and timestamp.
+
+    ``reason`` is the reason text and ``code`` its FraudReason code;
+    ``detail`` holds an admin's explanation for manual flags.
+    """
+
+    reason = serializers.CharField(source="reason.text", read_only=True)
+    code = serializers.IntegerField(source="reason_id", read_only=True)
 
     class Meta:
         model = FraudFlag
-        fields: tuple[str, ...] = ("id", "reason", "flagged_at")
+        fields: tuple[str, ...] = (
+            "id",
+            "reason",
+            "code",
+            "detail",
+            "flagged_at",
+        )
 
 
 class FlaggedLoanSerializer(serializers.ModelSerializer):
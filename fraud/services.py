@@ -2,25 +2,117 @@
 Module: Fraud detection services with rule-based checks.
 
 This module implements the core fraud detection logic for
-loan applications.
+loan applications. Individual rules live in fraud.rules and are
+evaluated by the cost-ordered engine in fraud.engine.
 """
 
-import datetime
 import logging
-from typing import List, Optional
+import time
+from typing import Any, Dict, Iterable, List, Optional
 
-from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.core.mail import send_mail
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import Case, F, Value, When
 
 from loan.models import LoanApplication
 
-from .models import FraudFlag
+from .config import current_engine
+from .decisions import build_records
+from .engine import FraudDecision, FraudEngine
+from .lanes import user_lane
+from .models import FraudDecisionRecord, FraudFlag
+from .notifications import queue_flag_alerts
+from .reasons import is_engine_reason, reason_codes
+from .risk_features import apply_status_changes, record_status_change
+from .sidecar import request_decision
 
-CACHE_TTL_5_MIN: int = 300  # Cache TTL for 5 minutes
 logger: logging.Logger = logging.getLogger(__name__)
-User = get_user_model()
+
+
+def get_engine() -> FraudEngine:
+    """Return this worker's engine for the current rule configuration
+    (settings plus admin-edited ``FraudRuleConfig`` rows)."""
+    return current_engine()
+
+
+def invalidate_loan_caches(loans: Iterable[LoanApplication]) -> None:
+    """Drop cached list, detail and serializer entries for loans whose
+    status may have changed outside the create request."""
+    keys: List[str] = ["loan_list.all"]
+    for loan in loans:
+        keys += [
+            f"loan_list.user_{loan.user_id}",
+            f"serializer_loan_{loan.pk}",
+            f"loan_detail_{loan.pk}",
+        ]
+    cache.delete_many(keys)
+
+
+def reconcile_flags(
+    reasons_by_loan: Dict[int, List[str]],
+) -> Dict[int, List[str]]:
+    """Make each loan's engine FraudFlag rows match its current reasons.
+
+    Reads the existing flags once, then deletes stale ones with one
+    filtered DELETE and inserts missing ones with one ``bulk_create``.
+    Unchanged flags keep their row and ``flagged_at``; conflicting
+    inserts from a concurrent evaluation are ignored thanks to the
+    unique (loan, reason) constraint. Reason texts are stored as their
+    FraudReason codes. Flags the engine never produces, such as an
+    admin's manual flag, are kept whatever the reasons.
+
+    Args:
+        reasons_by_loan (Dict[int, List[str]]): Reasons keyed by loan id;
+            an empty list removes all of the loan's engine flags.
+
+    Returns:
+        Dict[int, List[str]]: Kept non-engine reasons of each loan that
+        has any; such a loan stays FLAGGED.
+    """
+    existing = FraudFlag.objects.filter(
+        loan_id__in=reasons_by_loan
+    ).values_list("id", "loan_id", "reason__text")
+    stale: List[int] = []
+    present = set()
+    kept: Dict[int, List[str]] = {}
+    for flag_id, loan_id, reason in existing:
+        if reason in reasons_by_loan[loan_id]:
+            present.add((loan_id, reason))
+        elif is_engine_reason(reason):
+            stale.append(flag_id)
+        else:
+            kept.setdefault(loan_id, []).append(reason)
+    missing = [
+        (loan_id, reason)
+        for loan_id, reasons in reasons_by_loan.items()
+        for reason in dict.fromkeys(reasons)
+        if (loan_id, reason) not in present
+    ]
+    if stale:
+        FraudFlag.objects.filter(pk__in=stale).delete()
+    if missing:
+        codes = reason_codes(reason for _, reason in missing)
+        FraudFlag.objects.bulk_create(
+            [
+                FraudFlag(loan_id=loan_id, reason_id=codes[reason])
+                for loan_id, reason in missing
+            ],
+            ignore_conflicts=True,
+        )
+    return kept
+
+
+def _score_changes(
+    loans: Iterable[LoanApplication], decisions: Dict[int, FraudDecision]
+) -> List[LoanApplication]:
+    """Set each loan's new model score; return the loans that changed."""
+    changed: List[LoanApplication] = []
+    for loan in loans:
+        score = decisions[loan.pk].features.get("fraud_score")
+        if score is not None and score != loan.fraud_score:
+            loan.fraud_score = score
+            changed.append(loan)
+    return changed
 
 
 def run_fraud_checks(loan: LoanApplication) -> List[str]:
@@ -31,81 +123,190 @@ def run_fraud_checks(loan: LoanApplication) -> List[str]:
       - Requested amount exceeds NGN 5,000,000
       - User’s email domain is used by more than 10 different users
 
+    Rules run cheapest-first; with ``FRAUD_SHORT_CIRCUIT`` enabled the
+    remaining rules are skipped once one of them flags the loan. All
+    database-backed features arrive in one annotated query, and flags,
+    status, the decision record and the admin alert are written in one
+    transaction.
+
+    Evaluation and writes run in the applicant's lane (see
+    fraud.lanes), so concurrent checks of one user's loans take turns
+    and each sees the outcome of the previous one.
+
+    With ``FRAUD_SIDECAR_SOCKET`` set, the rules run on the
+    ``fraud_server`` sidecar (see fraud.sidecar); the loan is evaluated
+    in process whenever the sidecar cannot answer.
+
     Args:
         loan (LoanApplication): The loan application to examine.
 
     Returns:
         list[str]: Reasons for which fraud flags were created.
     """
-    # Clear existing flags for a fresh evaluation
-    FraudFlag.objects.filter(loan=loan).delete()
+    with user_lane(loan.user_id):
+        return _check_loan(loan)
 
-    reasons: List[str] = []
 
-    # Rule: more than 3 loans in the past 24 hours
-    one_day_ago: datetime.datetime = (
-        timezone.now() - datetime.timedelta(days=1)
+def _check_loan(loan: LoanApplication) -> List[str]:
+    """Evaluate one loan and persist the outcome; see run_fraud_checks."""
+    engine = get_engine()
+    started = time.perf_counter()
+    # Features the sidecar client loads are reused if it cannot answer
+    features: Dict[str, Any] = {}
+    decision = request_decision(engine, loan, features) or engine.evaluate(
+        loan, features
     )
-    cache_key_recent = f"fraud.recent_loans.user_{loan.user_id}"
-    recent_loan_count = LoanApplication.objects.filter(
-        user_id=loan.user_id, created_at__gte=one_day_ago
-    ).count()
-    cache.set(cache_key_recent, recent_loan_count, CACHE_TTL_5_MIN)
-    if recent_loan_count > 3:
-        reasons.append("More than 3 loans in 24 hours")
-
-    # Rule: amount exceeds threshold
-    if loan.amount > 5000000:
-        reasons.append("Amount exceeds threshold")
-
-    # Rule: email domain usage
-    domain: str = loan.user.email.split("@")[-1]  # type: ignore[attr-defined]
-    cache_key_domain: str = f"fraud.domain_user_count_{domain}"
-    domain_user_count: Optional[int] = cache.get(cache_key_domain)
-    if domain_user_count is None:
-        # Compute fresh domain user count and cache it
-        domain_user_count = (
-            User.objects.filter(email__iendswith=domain)
-            .distinct()
-            .count()
-        )
-        cache.set(cache_key_domain, domain_user_count, CACHE_TTL_5_MIN)
-    if domain_user_count > 10:
-        reasons.append("Email domain used by more than 10 users")
+    elapsed_us = int((time.perf_counter() - started) * 1e6)
+    reasons: List[str] = decision.reasons
 
-    # Persist flags
+    # Persist flags, status and the admin alert atomically
     if reasons:
         logger.warning("Loan id=%s flagged for reasons: %s", loan.id, reasons)
-    for reason in reasons:
-        FraudFlag.objects.create(loan=loan, reason=reason)
-
-    # Update loan status based on fraud detection results
-    if reasons:
-        logger.info("Setting status FLAGGED for loan id=%s", loan.id)
-        loan.status = "FLAGGED"
-        loan.save(update_fields=["status"])
-        # Mock email notification to admin when a loan is flagged
-        send_mail(
-            subject=f"Loan {loan.id} Flagged",
-            message=(
-                f"Loan {loan.id} flagged for reasons: "
-                f"{', '.join(reasons)}"
-            ),
-            from_email=None,
-            recipient_list=["admin@example.com"],
-            fail_silently=True,
+    # The model score rides along with the status write
+    previous = loan.status
+    fields: List[str] = []
+    score: Optional[float] = decision.features.get("fraud_score")
+    if score is not None and score != loan.fraud_score:
+        loan.fraud_score = score
+        fields.append("fraud_score")
+    with transaction.atomic():
+        kept = reconcile_flags({loan.id: reasons})
+        if decision.status == "FLAGGED" or kept:
+            if loan.status != "FLAGGED":
+                logger.info("Setting status FLAGGED for loan id=%s", loan.id)
+                loan.status = "FLAGGED"
+                fields.append("status")
+                # Admin email goes out via the notification outbox
+                queue_flag_alerts([(loan.id, reasons or kept[loan.id])])
+        elif decision.status == "PENDING":
+            # Amount exceeds review threshold, keep pending for admin review
+            logger.info(
+                "Loan id=%s pending review by admin (amount > %s)",
+                loan.id,
+                engine.review_amount,
+            )
+            if loan.status != "PENDING":
+                loan.status = "PENDING"
+                fields.append("status")
+        else:
+            # Auto-approve loans with no flags and amount <= review threshold
+            logger.info(
+                "Auto-approving loan id=%s with no fraud flags", loan.id
+            )
+            loan.status = "APPROVED"
+            fields.append("status")
+        if fields:
+            loan.save(update_fields=fields)
+        if loan.status != previous:
+            record_status_change(loan, previous)
+        FraudDecisionRecord.objects.bulk_create(
+            build_records([loan], {loan.pk: decision}, engine, elapsed_us)
         )
-    elif loan.amount > 1000000:
-        # Loan amount exceeds review threshold, keep pending for admin review
-        logger.info(
-            "Loan id=%s pending review by admin (amount > %s)",
-            loan.id,
-            1000000,
-        )
-    else:
-        # Auto-approve loans with no fraud flags and amount <= review threshold
-        logger.info("Auto-approving loan id=%s with no fraud flags", loan.id)
-        loan.status = "APPROVED"
-        loan.save(update_fields=["status"])
 
     return reasons
+
+
+def run_fraud_checks_many(
+    loans: Iterable[LoanApplication], hold_flagged: bool = False
+) -> Dict[int, List[str]]:
+    """Run fraud checks on many loans with a fixed number of round trips.
+
+    Features are loaded with one aggregated query per feature, flags are
+    reconciled with one read, one DELETE and one ``bulk_create``, statuses
+    change in a single UPDATE (plus one for the applicants' status
+    counts), changed model scores in one
+    ``bulk_update``, decision records are written with one
+    ``bulk_create`` and admin alerts are queued with one more. Each
+    record's elapsed time is the batch's evaluation time divided
+    evenly among its loans. Outcomes match calling ``run_fraud_checks`` per
+    loan: only changed statuses are written and only loans newly
+    entering FLAGGED raise an alert, so re-scoring is quiet.
+
+    Args:
+        loans (Iterable[LoanApplication]): Loans to examine.
+        hold_flagged (bool): Leave FLAGGED loans the rules would now
+            clear untouched, flags included, for an admin to review.
+
+    Returns:
+        Dict[int, List[str]]: Flag reasons keyed by loan id.
+    """
+    loans = list(loans)
+    if not loans:
+        return {}
+    engine = get_engine()
+    started = time.perf_counter()
+    decisions = engine.evaluate_many(loans)
+    elapsed_us = int((time.perf_counter() - started) * 1e6 / len(loans))
+
+    previous: Dict[int, str] = {loan.pk: loan.status for loan in loans}
+    held = {
+        pk
+        for pk, decision in decisions.items()
+        if hold_flagged
+        and previous[pk] == "FLAGGED"
+        and decision.status != "FLAGGED"
+    }
+    with transaction.atomic():
+        kept = reconcile_flags(
+            {
+                pk: decision.reasons
+                for pk, decision in decisions.items()
+                if pk not in held
+            }
+        )
+        status: Dict[int, str] = {
+            pk: "FLAGGED" if pk in kept or pk in held else decision.status
+            for pk, decision in decisions.items()
+        }
+        new_status: Dict[int, str] = {
+            pk: value
+            for pk, value in status.items()
+            if value != previous[pk]
+        }
+        if new_status:
+            LoanApplication.objects.filter(pk__in=new_status).update(
+                status=Case(
+                    *(
+                        When(
+                            pk__in=[
+                                pk
+                                for pk, value in new_status.items()
+                                if value == target
+                            ],
+                            then=Value(target),
+                        )
+                        for target in set(new_status.values())
+                    ),
+                    default=F("status"),
+                )
+            )
+            apply_status_changes(
+                (
+                    loan.user_id,
+                    loan.amount,
+                    previous[loan.pk],
+                    new_status[loan.pk],
+                )
+                for loan in loans
+                if loan.pk in new_status
+            )
+        scored = _score_changes(loans, decisions)
+        if scored:
+            LoanApplication.objects.bulk_update(scored, ["fraud_score"])
+        FraudDecisionRecord.objects.bulk_create(
+            build_records(loans, decisions, engine, elapsed_us)
+        )
+        flagged = [loan.pk for loan in loans if status[loan.pk] == "FLAGGED"]
+        queue_flag_alerts(
+            [
+                (pk, decisions[pk].reasons or kept[pk])
+                for pk in flagged
+                if previous[pk] != "FLAGGED"
+            ]
+        )
+    for loan in loans:
+        loan.status = new_status.get(loan.pk, loan.status)
+    logger.info(
+        "Batch fraud checks: %s loans, %s flagged", len(loans), len(flagged)
+    )
+    return {pk: decision.reasons for pk, decision in decisions.items()}
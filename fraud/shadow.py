@@ -0,0 +1,157 @@
+"""
+Module: Shadow-mode evaluation of candidate fraud rules.
+
+Rules in shadow mode are left out of the live engine. After a loan's
+live decision, its id is handed to a bounded queue that one daemon
+thread per process drains in batches. Each batch loads its features with
+the batch loaders, evaluates every shadow rule, and bulk-inserts
+``ShadowRuleResult`` rows. ``submit`` never blocks: when the queue is
+full the loan is skipped and a warning is logged, so shadow evaluation
+cannot add latency to loan creation. Queue workers (async mode) call
+``run_shadow`` directly, as they are already off the request path.
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import close_old_connections
+from django.db.models import Count, Q
+
+from loan.models import LoanApplication
+
+from .config import current_shadow_engine
+from .features import FraudContext, load_features_many
+from .models import ShadowRuleResult
+
+QUEUE_SIZE: int = 10000  # Loans waiting for shadow evaluation, per process
+BATCH_SIZE: int = 200  # Loans evaluated per shadow batch
+logger: logging.Logger = logging.getLogger(__name__)
+
+_queue: "queue.Queue[int]" = queue.Queue(maxsize=QUEUE_SIZE)
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def run_shadow(loan_ids: Iterable[int]) -> int:
+    """Evaluate the shadow rules for the given loans and store results.
+
+    Args:
+        loan_ids: Loans whose live decision has been made.
+
+    Returns:
+        int: Number of ShadowRuleResult rows written.
+    """
+    engine = current_shadow_engine()
+    if engine is None:
+        return 0
+    loans = list(LoanApplication.objects.filter(pk__in=set(loan_ids)))
+    if not loans:
+        return 0
+    table = load_features_many(loans, engine.inputs())
+    results: List[ShadowRuleResult] = []
+    for loan in loans:
+        context = FraudContext(loan, table[loan.pk])
+        for rule in engine.rules:
+            results.append(
+                ShadowRuleResult(
+                    loan_id=loan.pk,
+                    rule=rule.name,
+                    flagged=rule.check(context.resolve(rule.inputs)),
+                    live_status=loan.status,
+                )
+            )
+    ShadowRuleResult.objects.bulk_create(results)
+    return len(results)
+
+
+def _drain() -> None:
+    """Background loop: evaluate queued loans in batches, forever."""
+    while True:
+        loan_ids = [_queue.get()]
+        while len(loan_ids) < BATCH_SIZE:
+            try:
+                loan_ids.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            close_old_connections()
+            run_shadow(loan_ids)
+        except Exception:
+            logger.exception("Shadow evaluation failed for %s", loan_ids)
+        finally:
+            close_old_connections()
+            for _ in loan_ids:
+                _queue.task_done()
+
+
+def _ensure_thread() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(
+                target=_drain, name="fraud-shadow", daemon=True
+            )
+            _thread.start()
+
+
+def submit(loan_ids: Iterable[int]) -> None:
+    """Queue loans for shadow evaluation without blocking.
+
+    Does nothing when no rule is in shadow mode.
+    """
+    if current_shadow_engine() is None:
+        return
+    _ensure_thread()
+    for loan_id in loan_ids:
+        try:
+            _queue.put_nowait(loan_id)
+        except queue.Full:
+            logger.warning("Shadow queue full; skipping loan id=%s", loan_id)
+
+
+def wait(timeout: Optional[float] = None) -> bool:
+    """Block until every queued loan has been evaluated.
+
+    Returns:
+        bool: False if ``timeout`` seconds passed first.
+    """
+    finished = threading.Event()
+
+    def join() -> None:
+        _queue.join()
+        finished.set()
+
+    threading.Thread(target=join, daemon=True).start()
+    return finished.wait(timeout)
+
+
+def compare_shadow_rules() -> List[Dict[str, Any]]:
+    """Compare every shadow rule's outcomes with the live decisions.
+
+    Returns:
+        List[Dict[str, Any]]: Per rule: evaluations, shadow and live
+        flag counts, the disagreement split and the agreement rate.
+    """
+    live = Q(live_status="FLAGGED")
+    rows = (
+        ShadowRuleResult.objects.order_by("rule")
+        .values("rule")
+        .annotate(
+            evaluations=Count("id"),
+            shadow_flagged=Count("id", filter=Q(flagged=True)),
+            live_flagged=Count("id", filter=live),
+            both_flagged=Count("id", filter=Q(flagged=True) & live),
+            shadow_only=Count("id", filter=Q(flagged=True) & ~live),
+            live_only=Count("id", filter=Q(flagged=False) & live),
+        )
+    )
+    report: List[Dict[str, Any]] = []
+    for row in rows:
+        disagreements = row["shadow_only"] + row["live_only"]
+        row["agreement"] = 1 - disagreements / row["evaluations"]
+        report.append(row)
+    return report
@@ -0,0 +1,362 @@
+"""
+Module: Out-of-process fraud evaluation over a local Unix socket.
+
+``manage.py fraud_server`` runs a sidecar holding the engine, the
+purpose LSH, the blocked-domain filter and the fraud model, so web
+workers do not each load them. ``run_fraud_checks`` asks the
+sidecar for a decision when ``FRAUD_SIDECAR_SOCKET`` is set and
+evaluates in process whenever the sidecar cannot answer.
+
+The client still loads the engine's prefetched features itself: the
+same single annotated query the in-process path runs, plus the
+cache-backed counts. They run in the caller's transaction and so see
+the loan just created, which the sidecar's own connection cannot yet
+see. The sidecar loads every other feature and runs the rules.
+
+Each message is a frame: a 4-byte big-endian length, then UTF-8 JSON.
+Decimals and datetimes are tagged so they arrive with their types.
+Requests arriving within a few milliseconds of each other (the
+server's batch window) are evaluated together with ``evaluate_many``,
+so batch loaders and the model score a whole batch at once.
+"""
+
+import datetime
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from loan.models import LoanApplication
+
+from .config import current_engine
+from .engine import FraudDecision, FraudEngine
+from .features import FraudContext
+
+HEADER: struct.Struct = struct.Struct("!I")  # Frame payload length
+MAX_FRAME: int = 1 << 20  # Largest accepted payload, in bytes
+BATCH_WINDOW: float = 0.002  # Seconds to wait for more requests
+MAX_BATCH: int = 64  # Requests evaluated together at most
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class ProtocolError(Exception):
+    """Raised on a malformed or oversized frame."""
+
+
+def _tag(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _untag(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "__decimal__" in obj:
+            return Decimal(obj["__decimal__"])
+        if "__datetime__" in obj:
+            return datetime.datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return datetime.date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def encode(message: Mapping[str, Any]) -> bytes:
+    """Frame a message for the socket.
+
+    Raises:
+        ProtocolError: If the payload exceeds ``MAX_FRAME``.
+    """
+    payload = json.dumps(message, default=_tag, separators=(",", ":"))
+    data = payload.encode()
+    if len(data) > MAX_FRAME:
+        raise ProtocolError(f"Frame of {len(data)} bytes is too large")
+    return HEADER.pack(len(data)) + data
+
+
+def _read_exact(sock: socket.socket, size: int) -> bytes:
+    chunks: List[bytes] = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError("Connection closed mid-frame")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Read one framed message, or None if the peer closed the
+    connection between frames.
+
+    Raises:
+        ProtocolError: If the frame is oversized or not JSON.
+    """
+    header = sock.recv(HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        header += _read_exact(sock, HEADER.size - len(header))
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME:
+        raise ProtocolError(f"Frame of {size} bytes is too large")
+    try:
+        return json.loads(_read_exact(sock, size), object_hook=_untag)
+    except ValueError as exc:
+        raise ProtocolError(str(exc)) from exc
+
+
+def socket_path() -> str:
+    """Sidecar socket path; empty when the sidecar is disabled."""
+    return getattr(settings, "FRAUD_SIDECAR_SOCKET", "")
+
+
+def _loan_fields(loan: LoanApplication) -> Dict[str, Any]:
+    return {
+        "id": loan.pk,
+        "user_id": loan.user_id,
+        "amount": loan.amount,
+        "purpose": loan.purpose,
+        "status": loan.status,
+        "created_at": loan.created_at,
+    }
+
+
+def request_decision(
+    engine: FraudEngine,
+    loan: LoanApplication,
+    features: Optional[Dict[str, Any]] = None,
+) -> Optional[FraudDecision]:
+    """Ask the sidecar to evaluate a loan.
+
+    Args:
+        engine: The caller's engine; a sidecar running another
+            configuration version does not answer for it.
+        loan: The loan to examine.
+        features: Features already known; the ones loaded for the
+            request are added to it, so an in-process fallback can pass
+            it to ``engine.evaluate`` instead of loading them again.
+
+    Returns:
+        Optional[FraudDecision]: The sidecar's decision, or None when the
+        sidecar is disabled, unreachable, failing or on another version.
+    """
+    path = socket_path()
+    if not path:
+        return None
+    known = features if features is not None else {}
+    known.setdefault("amount", loan.amount)
+    context = FraudContext(loan, known, engine.prefetch)
+    context.load_prefetched()
+    known.update(context.features)
+    request = {"loan": _loan_fields(loan), "features": context.features}
+    timeout = float(getattr(settings, "FRAUD_SIDECAR_TIMEOUT", 0.5))
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(encode(request))
+            reply = read_message(sock)
+    except (OSError, EOFError, ProtocolError) as exc:
+        logger.warning("Fraud sidecar at %s unavailable: %s", path, exc)
+        return None
+    if reply is None or "error" in reply:
+        logger.warning(
+            "Fraud sidecar failed on loan id=%s: %s",
+            loan.pk,
+            reply and reply["error"],
+        )
+        return None
+    if reply["version"] != engine.version:
+        logger.info(
+            "Fraud sidecar runs config %s, not %s; evaluating in process",
+            reply["version"],
+            engine.version,
+        )
+        return None
+    return FraudDecision(
+        status=reply["status"],
+        reasons=reply["reasons"],
+        features=reply["features"],
+        evaluated=reply["evaluated"],
+    )
+
+
+def evaluate_batch(
+    requests: List[Mapping[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Evaluate sidecar requests with one ``evaluate_many`` call.
+
+    Returns:
+        List[Dict[str, Any]]: One reply per request, in order.
+    """
+    engine = current_engine()
+    loans = [LoanApplication(**request["loan"]) for request in requests]
+    known = {
+        request["loan"]["id"]: request["features"] for request in requests
+    }
+    decisions = engine.evaluate_many(loans, known)
+    return [
+        {
+            "version": engine.version,
+            "status": decisions[loan.pk].status,
+            "reasons": decisions[loan.pk].reasons,
+            "features": decisions[loan.pk].features,
+            "evaluated": decisions[loan.pk].evaluated,
+        }
+        for loan in loans
+    ]
+
+
+class _Pending:
+    """A request waiting for its batch, and its reply once evaluated."""
+
+    def __init__(self, request: Mapping[str, Any]) -> None:
+        self.request = request
+        self.reply: Dict[str, Any] = {}
+        self.done = threading.Event()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serve framed requests on one connection until it closes."""
+
+    server: "SidecarServer"
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = read_message(self.request)
+            except (OSError, EOFError, ProtocolError) as exc:
+                logger.warning("Dropping fraud sidecar connection: %s", exc)
+                return
+            if request is None:
+                return
+            pending = _Pending(request)
+            self.server.pending.put(pending)
+            pending.done.wait()
+            try:
+                self.request.sendall(encode(pending.reply))
+            except (OSError, ProtocolError) as exc:
+                logger.warning("Could not answer fraud sidecar: %s", exc)
+                return
+
+
+class SidecarServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """Unix socket server micro-batching fraud evaluations.
+
+    Connection threads only read and write frames; a single batching
+    thread evaluates, so the sidecar holds one database connection.
+
+    Args:
+        path (str): Socket path; a stale socket file is replaced.
+        batch_window (float): Seconds to wait for more requests after
+            the first of a batch.
+        max_batch (int): Requests evaluated together at most.
+
+    Attributes:
+        path (str): The socket path, readable and writable by the
+            owner and group only.
+        batches (int): Batches evaluated so far.
+        evaluated (int): Requests evaluated so far, over all batches.
+        largest_batch (int): Size of the largest batch so far.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        batch_window: float = BATCH_WINDOW,
+        max_batch: int = MAX_BATCH,
+    ) -> None:
+        self.path: str = path
+        if os.path.exists(path):
+            os.unlink(path)
+        # Created without access for others, with no window before a chmod
+        previous = os.umask(0o117)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(previous)
+        self.batch_window: float = batch_window
+        self.max_batch: int = max_batch
+        self.batches: int = 0
+        self.evaluated: int = 0
+        self.largest_batch: int = 0
+        self.pending: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._batcher = threading.Thread(
+            target=self._run_batches, name="fraud-sidecar-batcher", daemon=True
+        )
+        self._batcher.start()
+
+    def _next_batch(self) -> Tuple[List[_Pending], bool]:
+        """Wait for a request, then gather those arriving within the
+        window; the flag is False once the server is closing."""
+        first = self.pending.get()
+        if first is None:
+            return [], False
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._answer(batch)
+                return [], False
+            batch.append(item)
+        return batch, True
+
+    def _run_batches(self) -> None:
+        running = True
+        while running:
+            batch, running = self._next_batch()
+            if batch:
+                self._answer(batch)
+        connection.close()
+
+    def _answer(self, batch: List[_Pending]) -> None:
+        close_old_connections()
+        try:
+            replies = evaluate_batch([item.request for item in batch])
+        except Exception as exc:
+            logger.exception("Fraud sidecar batch of %s failed", len(batch))
+            replies = [{"error": str(exc)}] * len(batch)
+        self.batches += 1
+        self.evaluated += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for item, reply in zip(batch, replies):
+            item.reply = reply
+            item.done.set()
+
+    def server_close(self) -> None:
+        """Stop the batching thread and remove the socket file."""
+        super().server_close()
+        self.pending.put(None)
+        self._batcher.join()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
@@ -1,6 +1,25 @@
 """
 Module: Signal handlers for fraud app.
 
-Signals disabled; fraud checks are run explicitly in API views
-to fit caching implementation.
+Loan fraud checks are run explicitly in API views to fit the caching
+implementation. The only receivers here publish rule configuration
+changes: saving or deleting a ``FraudRuleConfig`` bumps the config
+version once the transaction commits, so workers never reload a
+configuration that is not yet visible to them.
 """
+
+from typing import Any
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .config import bump_config_version
+from .models import FraudRuleConfig
+
+
+@receiver(post_save, sender=FraudRuleConfig)
+@receiver(post_delete, sender=FraudRuleConfig)
+def publish_rule_config(sender: Any, **kwargs: Any) -> None:
+    """Bump the config version after the change commits."""
+    transaction.on_commit(bump_config_version)
@@ -10,13 +10,20 @@ Endpoints:
     List all loans that have ever been flagged for fraud,
     regardless of current status. Returns a paginated response
     with `count`, `next`, `previous`, and `results` fields.
+- GET /fraud/stats/ (name='fraud-stats'):
+    Per-rule evaluation counts, hit rates and p50/p95/p99 latency,
+    plus feature cache hit ratios, for admin users.
+- GET /fraud/shadow/ (name='fraud-shadow'):
+    Per shadow rule: evaluations, shadow and live flag counts,
+    disagreements and agreement rate, for admin users.
 """
 
 from typing import List
 
 from django.urls import URLPattern, path
 
-from .views import FlaggedLoanHistoryListView, FlaggedLoanListView
+from .views import (FlaggedLoanHistoryListView, FlaggedLoanListView,
+                    FraudStatsView, ShadowRuleComparisonView)
 
 urlpatterns: List[URLPattern] = [
     path("flagged/", FlaggedLoanListView.as_view(), name="flagged-loans"),
@@ -25,4 +32,8 @@ urlpatterns: List[URLPattern] = [
         FlaggedLoanHistoryListView.as_view(),
         name="flagged-loans-history",
     ),
+    path("stats/", FraudStatsView.as_view(), name="fraud-stats"),
+    path(
+        "shadow/", ShadowRuleComparisonView.as_view(), name="fraud-shadow"
+    ),
 ]
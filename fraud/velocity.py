@@ -0,0 +1,412 @@
+"""
+Module: Sliding-window loan counters for the velocity fraud rule.
+
+Loan creations are recorded per user in the cache backend so the
+"loans in the past 24 hours" feature is answered without counting rows
+in the loans table. Two counter implementations are provided:
+
+- ``CacheBucketCounter`` keeps per-minute buckets of loan ids in one
+  cache entry per user; used with the locmem cache.
+- ``RedisSortedSetCounter`` keeps one sorted set per user scored by
+  creation time; used when the default cache is django-redis.
+
+Counters are idempotent per loan id. A per-user watermark records the
+highest loan id the counter has seen; evaluating a loan above the
+watermark (created outside the API, or after the cache was cleared)
+first catches the counter up from the database, so the counter never
+under-counts.
+
+``window_stats`` answers the multi-window velocity rule from the loans
+table instead: every window comes from one conditional aggregate,
+bounded by the widest window on the (user, created_at) index.
+``window_subqueries`` expresses the same windows as correlated
+subqueries, for annotating a loan's own row.
+
+Windows end at the evaluated loan's creation time, not at the time of
+evaluation, so re-scoring an old loan sees the history it was created
+in, and loans created after it never count against it.
+"""
+
+import datetime
+import logging
+import threading
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any, Dict, Mapping, Optional, Sequence, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (Count, DecimalField, OuterRef, Q, Subquery,
+                              Sum, Value)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from loan.models import LoanApplication
+
+VELOCITY_WINDOW: int = 86400  # Seconds covered by the velocity rule
+BUCKET_SECONDS: int = 60  # Granularity of CacheBucketCounter buckets
+# Loan-count windows of the multi-window velocity rule, in seconds
+COUNT_WINDOWS: Dict[str, int] = {"1h": 3600, "24h": 86400, "7d": 604800}
+AMOUNT_WINDOW: int = 86400  # Seconds covered by the amount-sum window
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class SlidingWindowCounter(ABC):
+    """Count distinct members added under a key within a time window.
+
+    Args:
+        retention (int): Seconds of history kept per key; the longest
+            window that can be counted.
+    """
+
+    def __init__(self, retention: int = VELOCITY_WINDOW) -> None:
+        self.retention: int = retention
+
+    @abstractmethod
+    def add(self, key: str, members: Mapping[int, float]) -> None:
+        """Record members (loan ids) with their epoch timestamps."""
+
+    @abstractmethod
+    def count(self, key: str, window: int, now: float) -> int:
+        """Return the number of members recorded in ``(now - window,
+        now]``."""
+
+
+class CacheBucketCounter(SlidingWindowCounter):
+    """Per-minute buckets of member ids stored in one cache entry per key.
+
+    Counting sums the buckets overlapping the window, so an event up to
+    one bucket older than the window may still be counted; the rule errs
+    on the side of flagging. Updates are serialized with a process-wide
+    lock, which matches the per-process scope of the locmem cache.
+    """
+
+    _lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        retention: int = VELOCITY_WINDOW,
+        bucket_seconds: int = BUCKET_SECONDS,
+    ) -> None:
+        super().__init__(retention)
+        self.bucket_seconds: int = bucket_seconds
+
+    def _cache_key(self, key: str) -> str:
+        return f"fraud.velocity.buckets.{key}"
+
+    def add(self, key: str, members: Mapping[int, float]) -> None:
+        cache_key = self._cache_key(key)
+        horizon = int(
+            (timezone.now().timestamp() - self.retention)
+            // self.bucket_seconds
+        )
+        with self._lock:
+            buckets: Dict[int, Set[int]] = cache.get(cache_key) or {}
+            for member, timestamp in members.items():
+                bucket = int(timestamp // self.bucket_seconds)
+                buckets.setdefault(bucket, set()).add(member)
+            buckets = {b: m for b, m in buckets.items() if b >= horizon}
+            cache.set(
+                cache_key, buckets, self.retention + self.bucket_seconds
+            )
+
+    def count(self, key: str, window: int, now: float) -> int:
+        buckets: Dict[int, Set[int]] = cache.get(self._cache_key(key)) or {}
+        start = int((now - window) // self.bucket_seconds)
+        return sum(len(m) for b, m in buckets.items() if b >= start)
+
+
+class RedisSortedSetCounter(SlidingWindowCounter):
+    """One Redis sorted set per key, members scored by timestamp.
+
+    Args:
+        client: Redis client; defaults to the django-redis connection of
+            the default cache.
+        retention (int): Seconds of history kept per key.
+    """
+
+    def __init__(
+        self, client: Any = None, retention: int = VELOCITY_WINDOW
+    ) -> None:
+        super().__init__(retention)
+        if client is None:
+            from django_redis import get_redis_connection
+
+            client = get_redis_connection("default")
+        self.client: Any = client
+
+    def _redis_key(self, key: str) -> str:
+        return f"fraud:velocity:{key}"
+
+    def add(self, key: str, members: Mapping[int, float]) -> None:
+        if not members:
+            return
+        redis_key = self._redis_key(key)
+        now = timezone.now().timestamp()
+        pipe = self.client.pipeline()
+        pipe.zadd(redis_key, {str(m): ts for m, ts in members.items()})
+        pipe.zremrangebyscore(redis_key, "-inf", now - self.retention)
+        pipe.expire(redis_key, self.retention)
+        pipe.execute()
+
+    def count(self, key: str, window: int, now: float) -> int:
+        return int(
+            self.client.zcount(self._redis_key(key), now - window, "+inf")
+        )
+
+
+_counter: Optional[SlidingWindowCounter] = None
+
+
+def get_counter() -> SlidingWindowCounter:
+    """Return the process-wide counter matching the default cache."""
+    global _counter
+    if _counter is None:
+        backend: str = settings.CACHES["default"]["BACKEND"]
+        if backend.startswith("django_redis."):
+            _counter = RedisSortedSetCounter()
+        else:
+            _counter = CacheBucketCounter()
+    return _counter
+
+
+def _user_key(user_id: int) -> str:
+    return f"user_{user_id}"
+
+
+def _watermark_key(user_id: int) -> str:
+    return f"fraud.velocity.seen.user_{user_id}"
+
+
+def created_at(loan: LoanApplication) -> datetime.datetime:
+    """End of the loan's velocity windows: its creation time, or now for
+    a loan not saved yet."""
+    return loan.created_at or timezone.now()
+
+
+def _count_from_db(loan: LoanApplication, window: int) -> int:
+    until = created_at(loan)
+    return LoanApplication.objects.filter(
+        user_id=loan.user_id,
+        created_at__gte=until - datetime.timedelta(seconds=window),
+        created_at__lte=until,
+    ).count()
+
+
+def _catch_up(
+    counter: SlidingWindowCounter, user_id: int, watermark: int
+) -> None:
+    """Add the user's recent loans above ``watermark`` to the counter."""
+    since = timezone.now() - datetime.timedelta(seconds=counter.retention)
+    rows = dict(
+        LoanApplication.objects.filter(
+            user_id=user_id, created_at__gte=since, pk__gt=watermark
+        )
+        .order_by()
+        .values_list("pk", "created_at")
+    )
+    counter.add(
+        _user_key(user_id),
+        {pk: created.timestamp() for pk, created in rows.items()},
+    )
+    cache.set(
+        _watermark_key(user_id),
+        max(rows, default=watermark),
+        counter.retention,
+    )
+
+
+def record_loan(loan: LoanApplication) -> None:
+    """Bump the applicant's counter for a newly created loan.
+
+    A cold counter is left alone; the next evaluation seeds it from the
+    database, including this loan.
+    """
+    counter = get_counter()
+    watermark_key = _watermark_key(loan.user_id)
+    try:
+        watermark: Optional[int] = cache.get(watermark_key)
+        if watermark is None:
+            return
+        counter.add(
+            _user_key(loan.user_id), {loan.pk: loan.created_at.timestamp()}
+        )
+        if loan.pk > watermark:
+            cache.set(watermark_key, loan.pk, counter.retention)
+    except Exception:
+        logger.warning(
+            "Velocity counter update failed for loan id=%s",
+            loan.pk,
+            exc_info=True,
+        )
+
+
+def recent_loan_count(
+    loan: LoanApplication, window: int = VELOCITY_WINDOW
+) -> int:
+    """Return how many loans the applicant created in the ``window``
+    seconds up to ``loan``, including it.
+
+    The counters only describe the present, so a loan created more than
+    a bucket ago (re-scored, or evaluated late by a worker) is counted
+    from the loans table. So is every loan when the counter backend
+    fails.
+    """
+    age = timezone.now() - created_at(loan)
+    if age > datetime.timedelta(seconds=BUCKET_SECONDS):
+        return _count_from_db(loan, window)
+    counter = get_counter()
+    try:
+        watermark: Optional[int] = cache.get(_watermark_key(loan.user_id))
+        if watermark is None or loan.pk > watermark:
+            _catch_up(counter, loan.user_id, watermark or 0)
+        return counter.count(
+            _user_key(loan.user_id), window, timezone.now().timestamp()
+        )
+    except Exception:
+        logger.warning(
+            "Velocity counter unavailable for user id=%s; counting rows",
+            loan.user_id,
+            exc_info=True,
+        )
+        return _count_from_db(loan, window)
+
+
+def recent_loan_counts(
+    loans: Sequence[LoanApplication], window: int = VELOCITY_WINDOW
+) -> Dict[int, int]:
+    """``recent_loan_count`` from the loans table for many loans, keyed
+    by loan pk; saved loans are counted with one annotated query."""
+    counts: Dict[int, int] = dict(
+        LoanApplication.objects.filter(pk__in=[loan.pk for loan in loans])
+        .annotate(n=count_subquery(timezone.now(), window))
+        .values_list("pk", "n")
+    )
+    for loan in loans:
+        if loan.pk not in counts:
+            counts[loan.pk] = _count_from_db(loan, window)
+    return counts
+
+
+def _window_aggregates(now: datetime.datetime) -> Dict[str, Any]:
+    def since(seconds: int) -> Q:
+        return Q(created_at__gte=now - datetime.timedelta(seconds=seconds))
+
+    aggregates: Dict[str, Any] = {
+        f"count_{label}": Count("id", filter=since(seconds))
+        for label, seconds in COUNT_WINDOWS.items()
+    }
+    aggregates["amount_24h"] = Sum("amount", filter=since(AMOUNT_WINDOW))
+    return aggregates
+
+
+def _window_queryset(now: datetime.datetime) -> Any:
+    widest = max(*COUNT_WINDOWS.values(), AMOUNT_WINDOW)
+    return LoanApplication.objects.filter(
+        created_at__gte=now - datetime.timedelta(seconds=widest),
+        created_at__lte=now,
+    ).order_by()
+
+
+def _clean(stats: Dict[str, Any]) -> Dict[str, Any]:
+    stats["amount_24h"] = stats["amount_24h"] or Decimal(0)
+    return stats
+
+
+def window_stats(
+    user_id: int, until: Optional[datetime.datetime] = None
+) -> Dict[str, Any]:
+    """Loan counts per window in ``COUNT_WINDOWS`` and the amount sum over
+    ``AMOUNT_WINDOW`` for one user, in a single query.
+
+    Args:
+        user_id: The applicant.
+        until: End of the windows; defaults to now.
+
+    Returns:
+        Dict[str, Any]: ``count_1h``, ``count_24h``, ``count_7d`` and
+        ``amount_24h``.
+    """
+    until = until or timezone.now()
+    return _clean(
+        _window_queryset(until)
+        .filter(user_id=user_id)
+        .aggregate(**_window_aggregates(until))
+    )
+
+
+def window_stats_many(
+    loans: Sequence[LoanApplication],
+) -> Dict[int, Dict[str, Any]]:
+    """``window_stats`` up to each loan's creation, keyed by loan pk.
+
+    Saved loans are answered by one query annotating their rows; loans
+    without a row cost one query each.
+    """
+    rows = (
+        LoanApplication.objects.filter(pk__in=[loan.pk for loan in loans])
+        .values("pk")
+        .annotate(**window_subqueries(timezone.now()))
+    )
+    stats = {row.pop("pk"): row for row in rows}
+    for loan in loans:
+        if loan.pk not in stats:
+            stats[loan.pk] = window_stats(loan.user_id, created_at(loan))
+    return stats
+
+
+def empty_window_stats() -> Dict[str, Any]:
+    """Window stats of a user without recent loans."""
+    stats: Dict[str, Any] = {f"count_{label}": 0 for label in COUNT_WINDOWS}
+    stats["amount_24h"] = Decimal(0)
+    return stats
+
+
+def _user_loans_before(seconds: int) -> Any:
+    return (
+        LoanApplication.objects.filter(
+            user_id=OuterRef("user_id"),
+            created_at__gte=OuterRef("created_at")
+            - datetime.timedelta(seconds=seconds),
+            created_at__lte=OuterRef("created_at"),
+        )
+        .order_by()
+        .values("user_id")
+    )
+
+
+def count_subquery(now: datetime.datetime, seconds: int) -> Coalesce:
+    """Expression counting the outer loan's user's loans created within
+    ``seconds`` up to the outer loan's creation.
+
+    ``now`` is unused; annotation builders all take it."""
+    return Coalesce(
+        Subquery(
+            _user_loans_before(seconds)
+            .annotate(n=Count("id"))
+            .values("n")[:1]
+        ),
+        0,
+    )
+
+
+def window_subqueries(now: datetime.datetime) -> Dict[str, Any]:
+    """Correlated subqueries yielding ``window_stats`` for the outer
+    loan's user up to its creation, keyed like ``window_stats``."""
+    expressions: Dict[str, Any] = {
+        f"count_{label}": count_subquery(now, seconds)
+        for label, seconds in COUNT_WINDOWS.items()
+    }
+    # Wider than LoanApplication.amount so sums never overflow it
+    total_field: DecimalField = DecimalField(max_digits=20, decimal_places=2)
+    expressions["amount_24h"] = Coalesce(
+        Subquery(
+            _user_loans_before(AMOUNT_WINDOW)
+            .annotate(total=Sum("amount"))
+            .values("total")[:1],
+            output_field=total_field,
+        ),
+        Value(Decimal(0)),
+        output_field=total_field,
+    )
+    return expressions
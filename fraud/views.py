@@ -1,20 +1,30 @@
 """
-Module: API views for fraud app, handling flagged loan endpoints.
+Module: API views for fraud app, handling flagged loan, rule metrics
+and shadow rule comparison endpoints.
 """
 
 import logging
 
 from django.core.cache import cache
+from django.db.models import Prefetch
 from django.db.models.query import QuerySet
 from rest_framework import generics
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from loan.models import LoanApplication
 
+from . import metrics
+from .models import FraudFlag
+from .shadow import compare_shadow_rules
 from .serializers import FlaggedLoanSerializer
 
 CACHE_TTL: int = 300  # Cache TTL in seconds for flagged list endpoints
+# Each page's flags and their reason texts in one extra query
+FLAGS_WITH_REASONS: Prefetch = Prefetch(
+    "fraud_flags", queryset=FraudFlag.objects.select_related("reason")
+)
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -50,7 +60,11 @@ class FlaggedLoanListView(generics.ListAPIView):
 
     def get_queryset(self) -> QuerySet[LoanApplication]:
         """Return queryset of loans flagged for fraud."""
-        return LoanApplication.objects.filter(status="FLAGGED").order_by("id")
+        return (
+            LoanApplication.objects.filter(status="FLAGGED")
+            .prefetch_related(FLAGS_WITH_REASONS)
+            .order_by("id")
+        )
 
 
 class FlaggedLoanHistoryListView(generics.ListAPIView):
@@ -87,5 +101,33 @@ class FlaggedLoanHistoryListView(generics.ListAPIView):
         return (
             LoanApplication.objects.filter(fraud_flags__isnull=False)
             .distinct()
+            .prefetch_related(FLAGS_WITH_REASONS)
             .order_by("id")
         )
+
+
+class FraudStatsView(APIView):
+    """Report per-rule latency percentiles, hit rates and feature cache
+    hit ratios aggregated across worker processes.
+
+    Admin users only.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """Return the current fraud metrics snapshot."""
+        return Response(metrics.snapshot())
+
+
+class ShadowRuleComparisonView(APIView):
+    """Compare each shadow rule's would-be outcomes with live decisions.
+
+    Admin users only.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """Return per-rule shadow/live agreement counts."""
+        return Response({"rules": compare_shadow_rules()})
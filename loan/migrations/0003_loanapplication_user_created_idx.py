@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to index LoanApplication on ('user', 'created_at').
+
+    The index bounds the per-user velocity window query used by the
+    'velocity_windows' fraud rule.
+    """
+
+    dependencies = [
+        ("loan", "0002_loanapplication_purpose"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loanapplication",
+            index=models.Index(
+                fields=["user", "created_at"], name="loan_user_created_idx"
+            ),
+        ),
+    ]
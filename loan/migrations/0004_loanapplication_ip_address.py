@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to record the address each loan was requested from.
+
+    This migration adds a nullable, indexed 'ip_address' to
+    'LoanApplication', used to link accounts into fraud clusters.
+    """
+
+    dependencies = [
+        ("loan", "0003_loanapplication_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loanapplication",
+            name="ip_address",
+            field=models.GenericIPAddressField(
+                blank=True, db_index=True, null=True
+            ),
+        ),
+    ]
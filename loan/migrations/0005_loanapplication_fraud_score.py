@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to store each loan's fraud model score.
+
+    This migration adds a nullable 'fraud_score' to 'LoanApplication',
+    written by the fraud checks when a model is deployed.
+    """
+
+    dependencies = [
+        ("loan", "0004_loanapplication_ip_address"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loanapplication",
+            name="fraud_score",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
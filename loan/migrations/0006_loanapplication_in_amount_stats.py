@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to mark loans folded into the fraud amount statistics.
+
+    This migration adds 'in_amount_stats' to 'LoanApplication'. Existing
+    loans start unmarked; `manage.py rebuild_amount_stats` recomputes the
+    statistics and marks them.
+    """
+
+    dependencies = [
+        ("loan", "0005_loanapplication_fraud_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loanapplication",
+            name="in_amount_stats",
+            field=models.BooleanField(default=False),
+        ),
+    ]
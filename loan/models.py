@@ -15,6 +15,11 @@ class LoanApplication(models.Model):
         status (str): Application status ('PENDING', 'APPROVED', 'REJECTED').
         created_at (datetime): Creation timestamp.
         updated_at (datetime): Last modification timestamp.
+        ip_address (str): Client address the loan was requested from, if
+            known.
+        fraud_score (float): Latest fraud model probability, if scored.
+        in_amount_stats (bool): Whether the amount is folded into the
+            applicant's fraud amount statistics.
     """
 
     STATUS_CHOICES = [
@@ -46,12 +51,23 @@ class LoanApplication(models.Model):
         default="",
         help_text="Purpose for applying for the loan",
     )
+    ip_address: models.GenericIPAddressField = models.GenericIPAddressField(
+        null=True, blank=True, db_index=True
+    )
+    fraud_score: models.FloatField = models.FloatField(null=True, blank=True)
+    in_amount_stats: models.BooleanField = models.BooleanField(default=False)
 
     class Meta:
         """Default ordering for LoanApplication queries to prevent pagination
-        warnings."""
+        warnings, and a (user, created_at) index bounding per-user velocity
+        windows."""
 
         ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"], name="loan_user_created_idx"
+            ),
+        ]
 
     def withdraw(self) -> None:
         """Withdraw a pending or flagged LoanApplication, changing its status
@@ -10,6 +10,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from fraud.models import FraudFlag
+from fraud.reasons import MANUAL_REASON, reason_code
+from fraud.risk_features import record_status_change
 from loan.models import LoanApplication
 from loan.serializers import LoanApplicationSerializer
 
@@ -37,6 +39,7 @@ class LoanApplicationWithdrawView(APIView):
             request.user.username,
             pk,
         )
+        previous = loan.status
         try:
             loan.withdraw()
         except ValueError as e:
@@ -50,6 +53,7 @@ class LoanApplicationWithdrawView(APIView):
                 {"detail": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        record_status_change(loan, previous)
         logger.info(
             "User %s successfully withdrew loan id=%s",
             request.user.username,
@@ -81,8 +85,10 @@ class LoanApplicationApproveView(APIView):
                 {"detail": "Only pending or flagged loans can be approved"},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        previous = loan.status
         loan.status = "APPROVED"
         loan.save(update_fields=["status"])
+        record_status_change(loan, previous)
         cache.delete(f"serializer_loan_{loan.pk}")
         serializer = LoanApplicationSerializer(loan)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -111,8 +117,10 @@ class LoanApplicationRejectView(APIView):
                 {"detail": "Only pending or flagged loans can be rejected"},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        previous = loan.status
         loan.status = "REJECTED"
         loan.save(update_fields=["status"])
+        record_status_change(loan, previous)
         cache.delete(f"serializer_loan_{loan.pk}")
         serializer = LoanApplicationSerializer(loan)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -131,21 +139,27 @@ class LoanApplicationFlagView(APIView):
         **kwargs: Any,
     ) -> Response:
         loan = get_object_or_404(LoanApplication, pk=pk)
-        reason = request.data.get("reason", "Manually flagged by admin")
+        detail = request.data.get("reason", "")
         logger.info(
             "Admin %s manually flagging loan id=%s for reason: %s",
             request.user.username,
             pk,
-            reason,
+            detail or MANUAL_REASON,
         )
         if loan.status != "PENDING":
             return Response(
                 {"detail": "Only pending loans can be flagged"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        FraudFlag.objects.create(loan=loan, reason=reason)
+        FraudFlag.objects.update_or_create(
+            loan=loan,
+            reason_id=reason_code(MANUAL_REASON),
+            defaults={"detail": detail},
+        )
+        previous = loan.status
         loan.status = "FLAGGED"
         loan.save(update_fields=["status"])
+        record_status_change(loan, previous)
         cache.delete(f"serializer_loan_{loan.pk}")
         serializer = LoanApplicationSerializer(loan)
         return Response(serializer.data, status=status.HTTP_200_OK)
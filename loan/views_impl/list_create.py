@@ -3,12 +3,22 @@ from decimal import Decimal
 from typing import Any, cast
 
 from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from fraud import shadow
+from fraud.amount_stats import record_loan_amount
+from fraud.clusters import client_ip, link_loan
+from fraud.jobs import enqueue_fraud_check, is_async_mode
+from fraud.lanes import user_lane
+from fraud.purpose_lsh import index_purpose
+from fraud.risk_features import record_application
 from fraud.services import run_fraud_checks
+from fraud.velocity import record_loan
 from loan.models import LoanApplication
 from loan.serializers import LoanApplicationSerializer
 
@@ -24,7 +34,11 @@ class LoanApplicationListCreateView(generics.ListCreateAPIView):
 
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Handle POST request to create a new LoanApplication for the
-        authenticated user."""
+        authenticated user.
+
+        In async fraud mode the loan is returned as PENDING with HTTP 202
+        and a ``status_url`` to poll while a worker evaluates it.
+        """
         purpose = request.data.get("purpose", "")
         amount = request.data.get("amount")
         logger.info(
@@ -32,18 +46,44 @@ class LoanApplicationListCreateView(generics.ListCreateAPIView):
             request.user.username,
             amount,
         )
-        loan = LoanApplication.objects.create(
-            user_id=cast(int, request.user.pk),
-            amount=Decimal(str(amount)),
-            purpose=purpose,
-        )
-        run_fraud_checks(loan)
-        loan.refresh_from_db()
+        async_mode = is_async_mode()
+        # Creation and evaluation take turns per user, so concurrent
+        # requests cannot all pass a velocity limit
+        with user_lane(cast(int, request.user.pk)):
+            with transaction.atomic():
+                loan = LoanApplication.objects.create(
+                    user_id=cast(int, request.user.pk),
+                    amount=Decimal(str(amount)),
+                    purpose=purpose,
+                    ip_address=client_ip(request),
+                )
+                record_loan_amount(loan)
+                index_purpose(loan)
+                link_loan(loan)
+                record_application(loan)
+                if async_mode:
+                    enqueue_fraud_check(loan)
+            record_loan(loan)
+            if not async_mode:
+                run_fraud_checks(loan)
+                loan.refresh_from_db()
+        if not async_mode:
+            # Non-blocking hand-off; shadow rules run in the background
+            shadow.submit([loan.pk])
         cache.delete("loan_list.all")
         cache.delete(f"loan_list.user_{request.user.pk}")
         cache.delete(f"serializer_loan_{loan.pk}")
         cache.delete(f"loan_detail_{loan.pk}")
         serializer = self.get_serializer(loan)
+        if async_mode:
+            status_url = request.build_absolute_uri(
+                reverse("loan-detail", args=[loan.pk])
+            )
+            return Response(
+                {**serializer.data, "status_url": status_url},
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Location": status_url},
+            )
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
@@ -182,6 +182,80 @@ if TESTING:
     # Store emails in memory during tests instead of sending
     EMAIL_BACKEND: str = "django.core.mail.backends.locmem.EmailBackend"
 
+# ------------------------------------------------------------------------------
+# Fraud detection
+# ------------------------------------------------------------------------------
+# FRAUD_SHORT_CIRCUIT: Stop evaluating rules once one flags the loan
+FRAUD_SHORT_CIRCUIT: bool = env.bool("FRAUD_SHORT_CIRCUIT", default=True)
+# FRAUD_RULE_THRESHOLDS: Per-rule threshold overrides keyed by rule name, e.g.
+# {"velocity_windows": {"max_loans_1h": 3, "max_amount_24h": 20000000}}
+FRAUD_RULE_THRESHOLDS: dict = env.json("FRAUD_RULE_THRESHOLDS", default={})
+# FRAUD_RULE_WORKERS: Threads for evaluating database-backed rules
+# concurrently; 0 evaluates rules one by one
+FRAUD_RULE_WORKERS: int = env.int("FRAUD_RULE_WORKERS", default=0)
+# FRAUD_RULE_TIMEOUT: Seconds a concurrently evaluated rule may take
+FRAUD_RULE_TIMEOUT: float = env.float("FRAUD_RULE_TIMEOUT", default=0.5)
+# FRAUD_RULE_TIMEOUT_OUTCOME: "pass" or "flag" for a rule that times out
+FRAUD_RULE_TIMEOUT_OUTCOME: str = env(
+    "FRAUD_RULE_TIMEOUT_OUTCOME", default="pass"
+)
+# FRAUD_CLUSTER_IGNORED_DOMAINS: Shared mail providers that do not link
+# accounts into fraud clusters
+FRAUD_CLUSTER_IGNORED_DOMAINS: list[str] = env.list(
+    "FRAUD_CLUSTER_IGNORED_DOMAINS",
+    default=[
+        "gmail.com",
+        "googlemail.com",
+        "yahoo.com",
+        "outlook.com",
+        "hotmail.com",
+        "live.com",
+        "icloud.com",
+        "aol.com",
+        "proton.me",
+        "protonmail.com",
+        "gmx.com",
+        "yandex.ru",
+        "mail.ru",
+    ],
+)
+# FRAUD_CLIENT_IP_HEADER: META key of the header a reverse proxy puts the
+# client address in (e.g. HTTP_X_FORWARDED_FOR, last entry); empty reads
+# REMOTE_ADDR. Without it, behind a proxy all accounts share one address
+FRAUD_CLIENT_IP_HEADER: str = env("FRAUD_CLIENT_IP_HEADER", default="")
+# FRAUD_EVALUATION_MODE: "sync" runs checks in the create request; "async"
+# queues them for `manage.py fraud_worker` and answers 202 Accepted
+FRAUD_EVALUATION_MODE: str = env("FRAUD_EVALUATION_MODE", default="sync")
+# FRAUD_LANE_LEASE: Seconds a per-user evaluation lane is held at most when
+# it is a cache lock (PostgreSQL uses transaction-scoped advisory locks)
+FRAUD_LANE_LEASE: float = env.float("FRAUD_LANE_LEASE", default=30)
+# FRAUD_LANE_LOCAL_CACHE: Allow those cache locks on a process-local cache
+# (locmem); only correct when a single process serves requests
+FRAUD_LANE_LOCAL_CACHE: bool = env.bool(
+    "FRAUD_LANE_LOCAL_CACHE", default=DEBUG or TESTING
+)
+# FRAUD_SIDECAR_SOCKET: Unix socket of `manage.py fraud_server`; empty
+# evaluates fraud checks in the web worker
+FRAUD_SIDECAR_SOCKET: str = env("FRAUD_SIDECAR_SOCKET", default="")
+# FRAUD_SIDECAR_TIMEOUT: Seconds to wait for the sidecar before evaluating
+# in process
+FRAUD_SIDECAR_TIMEOUT: float = env.float("FRAUD_SIDECAR_TIMEOUT", default=0.5)
+# FRAUD_ALERT_RECIPIENTS: Addresses emailed by `dispatch_notifications`
+FRAUD_ALERT_RECIPIENTS: list[str] = env.list(
+    "FRAUD_ALERT_RECIPIENTS", default=["admin@example.com"]
+)
+# FRAUD_DOMAIN_FILTER_PATH: Blocked-domain filter compiled by
+# `manage.py build_domain_filter`; the rule is inert while it is missing
+FRAUD_DOMAIN_FILTER_PATH: str = env(
+    "FRAUD_DOMAIN_FILTER_PATH",
+    default=str(BASE_DIR / "blocked_domains.bin"),
+)
+# FRAUD_MODEL_PATH: Logistic-regression weights written by
+# `manage.py train_fraud_model`; the model rule is inert while it is missing
+FRAUD_MODEL_PATH: str = env(
+    "FRAUD_MODEL_PATH", default=str(BASE_DIR / "fraud_model.npy")
+)
+
 # ------------------------------------------------------------------------------
 # Static files (CSS, JavaScript, Images)
 # ------------------------------------------------------------------------------
@@ -10,6 +10,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from fraud.models import FraudFlag
+from fraud.reasons import MANUAL_REASON
 from loan.models import LoanApplication
 
 
@@ -25,6 +26,6 @@ def test_admin_flag_pending_loan(admin_client: APIClient, user: Any) -> None:
     assert response.data.get("status") == "FLAGGED"
     flags = FraudFlag.objects.filter(loan=loan)
     assert flags.count() == 1
-    first_flag = flags.first()
-    assert first_flag is not None, "Expected a FraudFlag instance"
-    assert first_flag.reason == "suspected fraud"
+    assert list(flags.values_list("reason__text", "detail")) == [
+        (MANUAL_REASON, "suspected fraud")
+    ]
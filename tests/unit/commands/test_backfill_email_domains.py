@@ -0,0 +1,33 @@
+"""Module: Tests for the backfill_email_domains management command."""
+
+from io import StringIO
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from users.models import DomainUserCount, UserProfile
+
+User: Any = get_user_model()
+
+
+@pytest.mark.django_db
+def test_backfill_rebuilds_profiles_and_counts() -> None:
+    """Command should recreate profiles and counts in chunks."""
+    for i in range(5):
+        User.objects.create_user(
+            username=f"bf{i}", email=f"bf{i}@Back.fill", password="pw"
+        )
+    User.objects.create_user(username="nomail", password="pw")
+    UserProfile.objects.all().delete()
+    DomainUserCount.objects.all().delete()
+    DomainUserCount.objects.create(domain="stale.com", user_count=7)
+
+    out = StringIO()
+    call_command("backfill_email_domains", "--chunk-size", "2", stdout=out)
+
+    assert UserProfile.objects.count() == 6
+    counts = dict(DomainUserCount.objects.values_list("domain", "user_count"))
+    assert counts == {"back.fill": 5}
+    assert "Backfilled 6 profiles across 1 domains." in out.getvalue()
@@ -0,0 +1,164 @@
+"""Module: Tests for the fraud threshold backtest and its command."""
+
+import datetime
+from io import StringIO
+from typing import Any
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from fraud.backtest import (CLASS_APPROVED, CLASS_OTHER, CLASS_REJECTED,
+                            LoanColumns, ThresholdGrid, load_columns,
+                            run_backtest, velocity_counts)
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+HOUR: int = 3600 * 1_000_000
+
+
+def test_velocity_counts_match_brute_force() -> None:
+    """Counts include the loan itself, equal timestamps count only
+    earlier loans, and other users never leak into a window."""
+    rng = np.random.default_rng(7)
+    n = 500
+    users = rng.integers(0, 8, n)
+    times = rng.integers(0, 96, n) * HOUR // 2
+    window = 24 * HOUR
+    expected = np.array(
+        [
+            np.sum(
+                (users[:i] == users[i])
+                & (times[:i] >= times[i] - window)
+                & (times[:i] <= times[i])
+            )
+            + np.sum(
+                (users[i:] == users[i])
+                & (times[i:] >= times[i] - window)
+                & (times[i:] < times[i])
+            )
+            + 1
+            for i in range(n)
+        ]
+    )
+
+    assert velocity_counts(users, times).tolist() == expected.tolist()
+    assert velocity_counts(users[:0], times[:0]).tolist() == []
+
+
+def test_run_backtest_counts_every_combination() -> None:
+    columns = LoanColumns(
+        user_id=np.array([1, 1, 1, 2, 3]),
+        amount=np.array([100.0, 100.0, 100.0, 7000.0, 3000.0]),
+        created_at=np.array([0, HOUR, 2 * HOUR, 0, 0]),
+        domain_user_count=np.array([1, 1, 1, 1, 20]),
+        outcome=np.array(
+            [CLASS_OTHER, CLASS_OTHER, CLASS_REJECTED, CLASS_APPROVED,
+             CLASS_APPROVED],
+            dtype=np.int8,
+        ),
+    )
+    grid = ThresholdGrid(
+        max_loans=[2, 3],
+        max_amount=[5000],
+        max_users=[10, 30],
+        review_amount=[1000, 2000],
+    )
+
+    results = {
+        (r.max_loans, r.max_users, r.review_amount): r
+        for r in run_backtest(columns, grid)
+    }
+
+    assert len(results) == 8
+    strict = results[(2, 10, 1000)]
+    # Third loan of user 1, user 2's amount and user 3's domain flag.
+    assert strict.flag_rate == pytest.approx(3 / 5)
+    assert strict.approve_rate == pytest.approx(2 / 5)
+    assert strict.review_rate == 0.0
+    assert strict.agreement == pytest.approx(1 / 3)
+    assert strict.rejected_caught == 1.0
+    assert strict.approved_flagged == 1.0
+    lenient = results[(3, 30, 2000)]
+    assert lenient.flag_rate == pytest.approx(1 / 5)
+    assert lenient.review_rate == pytest.approx(1 / 5)
+    assert lenient.approve_rate == pytest.approx(3 / 5)
+    assert lenient.agreement == pytest.approx(1 / 3)
+    assert lenient.rejected_caught == 0.0
+
+
+def test_run_backtest_without_decisions_reports_none() -> None:
+    columns = LoanColumns(
+        user_id=np.array([1]),
+        amount=np.array([10.0]),
+        created_at=np.array([0]),
+        domain_user_count=np.array([0]),
+        outcome=np.array([CLASS_OTHER], dtype=np.int8),
+    )
+    (result,) = run_backtest(columns, ThresholdGrid([3], [5], [10], [20]))
+    assert result.agreement is None
+    assert result.flag_rate == 1.0
+
+
+@pytest.mark.django_db
+def test_load_columns_reads_history() -> None:
+    user = User.objects.create_user(
+        username="bt", email="bt@backtest.test", password="pw"
+    )
+    first = LoanApplication.objects.create(
+        user=user, amount=150, status="REJECTED"
+    )
+    second = LoanApplication.objects.create(
+        user=user, amount=250, status="APPROVED"
+    )
+    LoanApplication.objects.filter(pk=first.pk).update(
+        created_at=second.created_at - datetime.timedelta(hours=2)
+    )
+
+    columns = load_columns(LoanApplication.objects.order_by("id"))
+
+    assert len(columns) == 2
+    assert sorted(columns.amount.tolist()) == [150.0, 250.0]
+    assert columns.domain_user_count.tolist() == [1, 1]
+    assert sorted(columns.outcome.tolist()) == [
+        CLASS_APPROVED, CLASS_REJECTED
+    ]
+    assert abs(int(np.diff(np.sort(columns.created_at))[0])) == 2 * HOUR
+
+
+@pytest.mark.django_db
+def test_backtest_command_prints_ranked_grid() -> None:
+    user = User.objects.create_user(
+        username="bt2", email="bt2@backtest.test", password="pw"
+    )
+    LoanApplication.objects.create(user=user, amount=6000000,
+                                   status="REJECTED")
+    LoanApplication.objects.create(user=user, amount=100,
+                                   status="APPROVED",
+                                   created_at=timezone.now())
+    out = StringIO()
+
+    call_command(
+        "backtest_fraud",
+        "--max-loans=3",
+        "--max-amount=5000000,10000000",
+        "--max-users=10",
+        "--review-amount=1000000",
+        "--top=1",
+        stdout=out,
+    )
+
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith("Loaded 2 loans")
+    assert "2 combinations" in lines[0]
+    assert len(lines) == 3
+    assert lines[2].split()[:2] == ["3", "5000000"]
+    assert lines[2].split()[7] == "100.0%"
+
+
+def test_backtest_command_rejects_bad_list() -> None:
+    with pytest.raises(CommandError):
+        call_command("backtest_fraud", "--max-loans=a,b")
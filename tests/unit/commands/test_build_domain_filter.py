@@ -0,0 +1,34 @@
+"""Module: Tests for the build_domain_filter management command."""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from fraud.domain_filter import DomainFilter
+
+
+def test_builds_filter_from_lists(tmp_path, settings) -> None:
+    first = tmp_path / "a.txt"
+    first.write_text("# list\nmailinator.com\nYOPMAIL.com\n")
+    second = tmp_path / "b.txt"
+    second.write_text("yopmail.com\n")
+    settings.FRAUD_DOMAIN_FILTER_PATH = str(tmp_path / "out.bin")
+    out = StringIO()
+
+    call_command("build_domain_filter", str(first), str(second), stdout=out)
+
+    assert "Built filter of 2 domains" in out.getvalue()
+    domain_filter = DomainFilter.open(str(tmp_path / "out.bin"))
+    assert "yopmail.com" in domain_filter
+    assert "example.com" not in domain_filter
+
+
+def test_rejects_bad_input(tmp_path) -> None:
+    with pytest.raises(CommandError):
+        call_command("build_domain_filter", str(tmp_path / "missing.txt"))
+    with pytest.raises(CommandError):
+        call_command(
+            "build_domain_filter", str(tmp_path), "--error-rate=2"
+        )
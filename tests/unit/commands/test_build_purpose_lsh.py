@@ -0,0 +1,34 @@
+"""Module: Tests for the build_purpose_lsh management command."""
+
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from fraud.models import PurposeBucket
+from fraud.purpose_lsh import BANDS
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+def test_backfills_buckets_idempotently() -> None:
+    user = User.objects.create_user(username="lsh", password="pw")
+    for purpose in ("Home renovation for the kitchen and roof", "", "car"):
+        LoanApplication.objects.create(
+            user=user, amount=100, purpose=purpose
+        )
+    out = StringIO()
+
+    call_command("build_purpose_lsh", "--chunk-size=5", stdout=out)
+    call_command("build_purpose_lsh", stdout=StringIO())
+
+    assert "Indexed 1 loan purposes (16 buckets)" in out.getvalue()
+    assert PurposeBucket.objects.count() == BANDS
+
+    PurposeBucket.objects.update(bucket=0)
+    call_command("build_purpose_lsh", "--rebuild", stdout=StringIO())
+    assert not PurposeBucket.objects.filter(bucket=0).exists()
+    assert PurposeBucket.objects.count() == BANDS
@@ -0,0 +1,89 @@
+"""Module: Tests for the replay_decisions management command."""
+
+from io import StringIO
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from fraud import metrics
+from fraud.models import FraudDecisionRecord, FraudEngineConfig
+from fraud.services import run_fraud_checks, run_fraud_checks_many
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.fixture
+def records(db: Any) -> None:
+    """Flagged, pending and approved decisions of two users."""
+    first = User.objects.create_user(username="rp1", email="a@rp1.io")
+    second = User.objects.create_user(username="rp2", email="b@rp2.io")
+    run_fraud_checks(LoanApplication.objects.create(user=first, amount=1))
+    run_fraud_checks_many(
+        [
+            LoanApplication.objects.create(user=second, amount=amount)
+            for amount in (6000000, 2000000)
+        ]
+    )
+
+
+def _replay(*args: str) -> str:
+    out = StringIO()
+    call_command("replay_decisions", *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_replay_reproduces_decisions(
+    records: None, django_assert_num_queries: Any
+) -> None:
+    """Every record should match without writing anything or counting
+    rule metrics."""
+    metrics.flush()
+    before = dict(metrics._pending)
+    loans = list(LoanApplication.objects.values_list("pk", "status"))
+
+    # configs, reason codes, one chunk of records, the empty next chunk
+    with django_assert_num_queries(4):
+        output = _replay("--chunk-size=5")
+
+    assert "Replayed 3 decisions: 3 matched, 0 differed, 0 skipped" in output
+    assert "us per decision" in output
+    assert "All replayed decisions match." in output
+    assert dict(metrics._pending) == before
+    assert list(LoanApplication.objects.values_list("pk", "status")) == loans
+    assert FraudDecisionRecord.objects.count() == 3
+    first = FraudDecisionRecord.objects.order_by("pk").first()
+    assert first is not None
+    assert "Replayed 1 decisions" in _replay(
+        f"--after-id={first.pk}", "--limit=1"
+    )
+
+
+@pytest.mark.django_db
+def test_replay_reports_differences_and_skips(records: None) -> None:
+    """Altered outcomes should fail the command; records missing a
+    feature or their configuration are skipped without a query."""
+    first, second, third = FraudDecisionRecord.objects.order_by("pk")
+    first.status = "REJECTED"
+    first.save()
+    second.features.pop("amount")
+    second.save()
+    third.config_version = "gone"
+    third.save()
+
+    with pytest.raises(CommandError, match=rf"1 decisions differ.*{first.pk}"):
+        _replay()
+    FraudEngineConfig.objects.update(
+        config={
+            "rules": {"retired": {}},
+            "review_amount": 1,
+            "short_circuit": True,
+        }
+    )
+    with pytest.raises(CommandError, match="positive"):
+        _replay("--chunk-size=0")
+    assert "0 matched, 0 differed, 3 skipped" in _replay()
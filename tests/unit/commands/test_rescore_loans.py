@@ -0,0 +1,227 @@
+"""Module: Tests for the rescore_loans management command."""
+
+import json
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from fraud.models import FraudFlag, NotificationOutbox
+from fraud.reasons import MANUAL_REASON, reason_code
+from fraud.rescoring import Checkpoint, iter_id_ranges, rescore_queryset
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.fixture
+def loans(db: Any) -> List[LoanApplication]:
+    """Loans in assorted statuses owned by users on distinct domains."""
+    created: List[LoanApplication] = []
+    for i, (amount, status) in enumerate(
+        [
+            (6000000, "PENDING"),
+            (500, "FLAGGED"),
+            (2000000, "FLAGGED"),
+            (700, "PENDING"),
+            (6000000, "APPROVED"),
+        ]
+    ):
+        user = User.objects.create_user(
+            username=f"rs{i}", email=f"rs{i}@rs{i}.com", password="pw"
+        )
+        created.append(
+            LoanApplication.objects.create(
+                user=user, amount=amount, status=status
+            )
+        )
+    return created
+
+
+def _statuses(loans: List[LoanApplication]) -> List[str]:
+    return [
+        LoanApplication.objects.get(pk=loan.pk).status for loan in loans
+    ]
+
+
+@pytest.mark.django_db
+def test_rescore_updates_selected_loans(
+    loans: List[LoanApplication],
+) -> None:
+    """PENDING/FLAGGED loans are re-scored; others are left alone, and
+    FLAGGED loans the rules would clear are only reported."""
+    out = StringIO()
+    call_command(
+        "rescore_loans", "--workers", "0", "--chunk-size", "2", stdout=out
+    )
+    assert _statuses(loans) == [
+        "FLAGGED",
+        "FLAGGED",
+        "FLAGGED",
+        "APPROVED",
+        "APPROVED",
+    ]
+    assert FraudFlag.objects.filter(loan=loans[0]).exists()
+    assert NotificationOutbox.objects.count() == 1
+    assert "Rescored 4 loans" in out.getvalue()
+    assert "loans/sec" in out.getvalue()
+    assert "2 status changed" in out.getvalue()
+    assert "2 flagged loans would be cleared" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(loans: List[LoanApplication]) -> None:
+    """--dry-run reports would-be changes without touching rows."""
+    before = _statuses(loans)
+    out = StringIO()
+    call_command(
+        "rescore_loans", "--workers", "0", "--dry-run", stdout=out
+    )
+    assert _statuses(loans) == before
+    assert not FraudFlag.objects.exists()
+    assert "1 flagged, 2 status would change" in out.getvalue()
+    assert "2 flagged loans would be cleared" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_rescore_keeps_manual_flags_and_past_velocity() -> None:
+    """An admin's flag survives re-scoring, and velocity windows end at
+    each loan's creation rather than at the rescore."""
+    user = User.objects.create_user(username="rv", email="rv@rv.com")
+    manual = LoanApplication.objects.create(user=user, amount=100)
+    FraudFlag.objects.create(
+        loan=manual, reason_id=reason_code(MANUAL_REASON), detail="ID"
+    )
+    burst = [
+        LoanApplication.objects.create(user=user, amount=100)
+        for _ in range(4)
+    ]
+    LoanApplication.objects.filter(pk=manual.pk).update(
+        status="FLAGGED", created_at=timezone.now() - timedelta(days=30)
+    )
+    for minutes, loan in enumerate(burst):
+        LoanApplication.objects.filter(pk=loan.pk).update(
+            created_at=timezone.now() - timedelta(days=10, minutes=-minutes)
+        )
+    for _ in range(2):
+        call_command("rescore_loans", "--workers", "0", stdout=StringIO())
+
+    assert _statuses([manual, *burst]) == [
+        "FLAGGED", "APPROVED", "APPROVED", "FLAGGED", "FLAGGED"
+    ]
+    assert list(
+        FraudFlag.objects.filter(loan=manual).values_list(
+            "reason__text", "detail"
+        )
+    ) == [(MANUAL_REASON, "ID")]
+    assert FraudFlag.objects.filter(loan=burst[3]).exists()
+
+
+@pytest.mark.django_db
+def test_status_and_since_filters(loans: List[LoanApplication]) -> None:
+    """--status and --since narrow the selection."""
+    out = StringIO()
+    call_command(
+        "rescore_loans",
+        "--workers",
+        "0",
+        "--status",
+        "APPROVED",
+        "--since",
+        "2000-01-01",
+        stdout=out,
+    )
+    assert "Rescored 1 loans" in out.getvalue()
+    assert _statuses(loans)[4] == "FLAGGED"
+    err = StringIO()
+    call_command("rescore_loans", "--workers", "2", stdout=out, stderr=err)
+    assert "re-scoring in-process" in err.getvalue()
+    with pytest.raises(CommandError):
+        call_command("rescore_loans", "--since", "yesterday")
+
+
+@pytest.mark.django_db
+def test_checkpoint_resumes_after_last_id(
+    loans: List[LoanApplication], tmp_path: Path
+) -> None:
+    """An existing checkpoint skips ranges already done."""
+    path = tmp_path / "rescore.json"
+    Checkpoint(str(path)).save(loans[1].pk)
+    out = StringIO()
+    call_command(
+        "rescore_loans",
+        "--workers",
+        "0",
+        "--checkpoint",
+        str(path),
+        "-v",
+        "2",
+        stdout=out,
+    )
+    assert f"Resuming after loan id {loans[1].pk}." in out.getvalue()
+    assert "Rescored 2 loans" in out.getvalue()
+    assert _statuses(loans)[0] == "PENDING"
+    assert json.loads(path.read_text())["last_id"] == loans[3].pk
+
+
+@pytest.mark.django_db
+def test_iter_id_ranges_chunks(loans: List[LoanApplication]) -> None:
+    """Ranges cover every selected id in order."""
+    ranges = list(
+        iter_id_ranges(rescore_queryset(("PENDING", "FLAGGED")), 3)
+    )
+    assert ranges == [(loans[0].pk, loans[2].pk), (loans[3].pk, loans[3].pk)]
+
+
+class InlineExecutor:
+    """Synchronous stand-in for ProcessPoolExecutor."""
+
+    def __init__(self, max_workers: int, initializer: Any) -> None:
+        self.max_workers = max_workers
+
+    def __enter__(self) -> "InlineExecutor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def submit(self, fn: Any, *args: Any) -> Any:
+        from concurrent.futures import Future
+
+        future: Future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.mark.django_db
+def test_pool_path_keeps_checkpoint_order(
+    loans: List[LoanApplication], tmp_path: Path, monkeypatch: Any
+) -> None:
+    """Fan-out should record ranges in submission order."""
+    import fraud.management.commands.rescore_loans as command
+
+    monkeypatch.setattr(command, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(command.connections, "close_all", lambda: None)
+    monkeypatch.setattr(
+        command.connections["default"], "vendor", "postgresql"
+    )
+    path = tmp_path / "pool.json"
+    out = StringIO()
+    call_command(
+        "rescore_loans",
+        "--workers",
+        "1",
+        "--chunk-size",
+        "1",
+        "--checkpoint",
+        str(path),
+        stdout=out,
+    )
+    assert "Rescored 4 loans" in out.getvalue()
+    assert json.loads(path.read_text())["last_id"] == loans[3].pk
@@ -0,0 +1,102 @@
+"""Module: Tests for the train_fraud_model management command."""
+
+from io import StringIO
+from typing import Any
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from fraud.risk_features import empty_risk_features
+from fraud.scoring import (VECTOR_FIELDS, get_weights, load_training_data,
+                           score_many)
+from fraud.services import run_fraud_checks
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+def _decided(count: int, amount: int, status: str) -> None:
+    for index in range(count):
+        user = User.objects.create_user(username=f"{status}{index}")
+        LoanApplication.objects.create(
+            user=user, amount=amount + index, status=status
+        )
+
+
+@pytest.mark.django_db
+def test_trains_on_admin_decisions(tmp_path: Any, settings: Any) -> None:
+    """Rejected large loans should teach the model to score them high."""
+    _decided(15, 1000, "APPROVED")
+    _decided(15, 400000, "REJECTED")
+    _decided(3, 50000, "PENDING")
+    settings.FRAUD_MODEL_PATH = str(tmp_path / "model.npy")
+    out = StringIO()
+
+    call_command("train_fraud_model", "--chunk-size=7", stdout=out)
+
+    assert "Trained on 30 loans (15 rejected)" in out.getvalue()
+    assert "30 loans had no decision record" in out.getvalue()
+    weights = get_weights()
+    assert weights is not None
+    assert weights.shape == (len(VECTOR_FIELDS) + 1,)
+    stats = {"count": 0, "mean": 0.0, "std": 0.0}
+    cluster = {"size": 1, "loan_count": 1, "loan_amount": 0}
+    rows = [
+        {
+            "amount": amount,
+            "amount_stats": stats,
+            "domain_user_count": 0,
+            "cluster": cluster,
+            "blocked_domain": False,
+            "risk_features": empty_risk_features(),
+        }
+        for amount in (1000, 400000)
+    ]
+    scores = score_many(rows)
+    assert scores is not None
+    low, high = scores
+    assert low < 0.5 < high
+    assert np.isfinite([low, high]).all()
+
+
+@pytest.mark.django_db
+def test_trains_on_recorded_features(tmp_path: Any) -> None:
+    """Loans with a decision record are trained on the features the
+    engine saw, not on data written after the decision."""
+    for index in range(20):
+        user = User.objects.create_user(username=f"rec{index}")
+        loan = LoanApplication.objects.create(user=user, amount=1000)
+        run_fraud_checks(loan)
+        if index % 2:
+            LoanApplication.objects.filter(pk=loan.pk).update(
+                status="REJECTED"
+            )
+    # Recorded features say nothing was rejected when each was decided
+    matrix, labels, current = load_training_data(chunk_size=7)
+    assert (len(labels), int(labels.sum()), current) == (20, 10, 0)
+    rejected = VECTOR_FIELDS.index("log_rejected_loans")
+    assert not matrix[:, rejected].any()
+    out = StringIO()
+
+    call_command(
+        "train_fraud_model", f"--output={tmp_path / 'model.npy'}", stdout=out
+    )
+
+    assert "no decision record" not in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_rejects_unusable_history(tmp_path: Any) -> None:
+    """Too few samples, a single class or a bad penalty should fail."""
+    output = f"--output={tmp_path / 'model.npy'}"
+    with pytest.raises(CommandError, match="need 20"):
+        call_command("train_fraud_model", output)
+    _decided(20, 1000, "APPROVED")
+    with pytest.raises(CommandError, match="both"):
+        call_command("train_fraud_model", output)
+    with pytest.raises(CommandError, match="--l2"):
+        call_command("train_fraud_model", output, "--l2=-1")
+    assert not (tmp_path / "model.npy").exists()
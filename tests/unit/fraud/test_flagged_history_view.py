@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIRequestFactory, force_authenticate
 
 from fraud.models import FraudFlag
+from fraud.reasons import reason_code
 from fraud.views import FlaggedLoanHistoryListView
 from loan.models import LoanApplication
 
@@ -19,7 +20,9 @@ def test_flagged_history_view_get_queryset() -> None:
     )
     # Create two loans: one flagged, one not flagged
     loan_flagged = LoanApplication.objects.create(user=staff_user, amount=150)
-    FraudFlag.objects.create(loan=loan_flagged, reason="test reason")
+    FraudFlag.objects.create(
+        loan=loan_flagged, reason_id=reason_code("test reason")
+    )
     loan_not_flagged = LoanApplication.objects.create(
         user=staff_user,
         amount=250
@@ -0,0 +1,77 @@
+"""
+Module: Model-level tests for UserProfile email domains and
+DomainUserCount maintenance.
+"""
+
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from fraud.services import run_fraud_checks
+from loan.models import LoanApplication
+from users.models import DomainUserCount, UserProfile, normalize_email_domain
+
+User: Any = get_user_model()
+
+
+def _count(domain: str) -> int:
+    row = DomainUserCount.objects.filter(pk=domain).first()
+    return row.user_count if row else 0
+
+
+def test_normalize_email_domain() -> None:
+    """Domains should be lower-cased and stripped; no '@' means none."""
+    assert normalize_email_domain("Foo@GMail.COM ") == "gmail.com"
+    assert normalize_email_domain("a@b@corp.io") == "corp.io"
+    assert normalize_email_domain("") == ""
+    assert normalize_email_domain("nodomain") == ""
+
+
+@pytest.mark.django_db
+def test_registration_records_domain(api_client: APIClient) -> None:
+    """Registering should create the profile and bump the domain count."""
+    response = api_client.post(
+        reverse("register"),
+        {"username": "reg", "email": "reg@Corp.io", "password": "pw12345"},
+        format="json",
+    )
+    assert response.status_code == 201
+    profile = UserProfile.objects.get(user__username="reg")
+    assert profile.email_domain == "corp.io"
+    assert _count("corp.io") == 1
+
+
+@pytest.mark.django_db
+def test_email_change_and_delete_adjust_counts() -> None:
+    """Changing or deleting a user's email should move the counts."""
+    user = User.objects.create_user(
+        username="mover", email="mover@old.com", password="pw"
+    )
+    assert _count("old.com") == 1
+    user.email = "mover@new.com"
+    user.save()
+    assert _count("old.com") == 0
+    assert _count("new.com") == 1
+    user.save(update_fields=["last_login"])
+    assert _count("new.com") == 1
+    user.delete()
+    assert _count("new.com") == 0
+
+
+@pytest.mark.django_db
+def test_domain_rule_matches_exact_domain_only() -> None:
+    """xgmail.com must not be counted as gmail.com."""
+    for i in range(11):
+        User.objects.create_user(
+            username=f"g{i}", email=f"g{i}@gmail.com", password="pw"
+        )
+    outsider = User.objects.create_user(
+        username="x", email="x@xgmail.com", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=outsider, amount=1000)
+    assert run_fraud_checks(loan) == []
+    assert str(DomainUserCount.objects.get(pk="gmail.com")) == "gmail.com: 11"
+    assert str(outsider.profile) == f"Profile {outsider.pk} - xgmail.com"
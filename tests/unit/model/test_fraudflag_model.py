@@ -10,6 +10,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from fraud.models import FraudFlag
+from fraud.reasons import reason_code
 from loan.models import LoanApplication
 
 User: Any = get_user_model()
@@ -25,7 +26,9 @@ def test_fraudflag_related_name_and_str() -> None:
         password="password",
     )
     loan = LoanApplication.objects.create(user=user, amount=500)
-    flag = FraudFlag.objects.create(loan=loan, reason="Test reason")
+    flag = FraudFlag.objects.create(
+        loan=loan, reason_id=reason_code("Test reason")
+    )
     # Relationship via related_name
     flags_for_loan = list(loan.fraud_flags.all())
     assert flag in flags_for_loan
@@ -45,7 +48,9 @@ def test_fraudflag_timestamp_auto_now_add() -> None:
     )
     loan = LoanApplication.objects.create(user=user, amount=1000)
     before = timezone.now()
-    flag = FraudFlag.objects.create(loan=loan, reason="Timestamp test")
+    flag = FraudFlag.objects.create(
+        loan=loan, reason_id=reason_code("Timestamp test")
+    )
     after = timezone.now()
     # flagged_at should be between before and after timestamps
     assert before <= flag.flagged_at <= after
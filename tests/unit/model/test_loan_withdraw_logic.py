@@ -4,6 +4,7 @@ import pytest
 from django.contrib.auth import get_user_model
 
 from fraud.models import FraudFlag
+from fraud.reasons import reason_code
 from loan.models import LoanApplication
 
 User: Any = get_user_model()
@@ -49,7 +50,9 @@ def test_withdraw_flagged_loan() -> None:
         password="password",
     )
     loan = LoanApplication.objects.create(user=user, amount=500)
-    FraudFlag.objects.create(loan=loan, reason="fraud check failed")
+    FraudFlag.objects.create(
+        loan=loan, reason_id=reason_code("fraud check failed")
+    )
     loan.status = "FLAGGED"
     loan.save(update_fields=["status"])
     loan.withdraw()
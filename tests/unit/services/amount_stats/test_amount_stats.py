@@ -0,0 +1,180 @@
+"""Module: Unit tests for per-user Welford amount stats and the z-score
+rule."""
+
+import statistics
+from io import StringIO
+from typing import Any, List
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+
+from fraud.amount_stats import (STATS_FIELDS, prior_amount_stats,
+                                rebuild_amount_stats, record_loan_amount)
+from fraud.engine import FraudEngine
+from fraud.models import UserLoanStats
+from fraud.rules import AmountZScoreRule
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+AMOUNTS: List[int] = [1000, 1200, 900, 1100, 1050]
+
+
+def _history(user: Any, amounts: List[int]) -> List[LoanApplication]:
+    """Create and record one loan per amount."""
+    loans: List[LoanApplication] = []
+    for amount in amounts:
+        loan = LoanApplication.objects.create(user=user, amount=amount)
+        record_loan_amount(loan)
+        loans.append(loan)
+    return loans
+
+
+@pytest.mark.django_db
+def test_welford_update_matches_batch_statistics(
+    django_assert_num_queries: Any,
+) -> None:
+    """Each creation should be one UPDATE of the stats plus one marking
+    the loan; the row should hold the exact count, mean, M2 and max of
+    every amount."""
+    user = User.objects.create_user(username="welford", password="pw")
+    _history(user, AMOUNTS)
+    extra = LoanApplication.objects.create(user=user, amount=4000)
+    with django_assert_num_queries(2):
+        record_loan_amount(extra)
+    with django_assert_num_queries(0):
+        record_loan_amount(extra)  # Already folded in
+
+    values = [*AMOUNTS, 4000]
+    stats = UserLoanStats.objects.get(pk=user.pk)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.m2 / (stats.count - 1) == pytest.approx(
+        statistics.variance(values)
+    )
+    assert stats.max_amount == 4000
+    assert LoanApplication.objects.filter(in_amount_stats=True).count() == 6
+    assert "6 loans" in str(stats)
+
+
+@pytest.mark.django_db
+def test_prior_stats_exclude_evaluated_loan() -> None:
+    """The evaluated loan should be removed from its own baseline."""
+    user = User.objects.create_user(username="prior", password="pw")
+    loans = _history(user, [*AMOUNTS, 9000])
+    row = UserLoanStats.objects.values("count", "mean", "m2").get(pk=user.pk)
+
+    prior = prior_amount_stats(True, loans[-1].amount, row)
+
+    assert prior["count"] == len(AMOUNTS)
+    assert prior["mean"] == pytest.approx(statistics.fmean(AMOUNTS))
+    assert prior["std"] == pytest.approx(statistics.stdev(AMOUNTS))
+    # A loan the row has not seen is compared with the whole row
+    assert prior_amount_stats(False, 10, row)["count"] == 6
+    assert prior_amount_stats(False, 10, None)["count"] == 0
+    single = {"count": 1, "mean": 5.0, "m2": 0.0}
+    assert prior_amount_stats(True, 5, single)["count"] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_unrecorded_loans_are_not_subtracted(prefetch: bool) -> None:
+    """A loan created outside the create view is compared with the
+    whole row, even when older loans are in it."""
+    user = User.objects.create_user(username=f"u{prefetch}", password="pw")
+    _history(user, AMOUNTS)
+    imported = LoanApplication.objects.create(user=user, amount=1000)
+    engine = FraudEngine([AmountZScoreRule()], prefetch=prefetch)
+
+    stats = engine.evaluate(imported).features["amount_stats"]
+
+    assert stats["count"] == len(AMOUNTS)
+    assert stats["mean"] == pytest.approx(statistics.fmean(AMOUNTS))
+    assert engine.evaluate_many([imported])[imported.pk].features[
+        "amount_stats"
+    ] == stats
+
+
+@pytest.mark.django_db
+def test_rebuild_includes_every_loan() -> None:
+    """The rebuild should reproduce the incremental rows and fold in
+    loans the create view never recorded."""
+    user = User.objects.create_user(username="rebuild", password="pw")
+    idle = User.objects.create_user(username="idle", password="pw")
+    _history(user, AMOUNTS)
+    incremental = UserLoanStats.objects.values(*STATS_FIELDS).get(pk=user.pk)
+    out = StringIO()
+
+    call_command("rebuild_amount_stats", "--chunk-size=1", stdout=out)
+
+    rebuilt = UserLoanStats.objects.values(*STATS_FIELDS).get(pk=user.pk)
+    assert rebuilt == pytest.approx(incremental)
+    assert "Rebuilt amount stats of 2 users" in out.getvalue()
+    assert UserLoanStats.objects.get(pk=idle.pk).count == 0
+
+    LoanApplication.objects.create(user=user, amount=4000)
+    rebuild_amount_stats()
+    stats = UserLoanStats.objects.get(pk=user.pk)
+    assert (stats.count, stats.max_amount) == (6, 4000)
+    assert not LoanApplication.objects.filter(in_amount_stats=False).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_zscore_rule_flags_outlier(prefetch: bool) -> None:
+    """An amount far above the user's history should flag, a typical one
+    should not, whichever loader serves the stats."""
+    user = User.objects.create_user(username=f"z{prefetch}", password="pw")
+    _history(user, AMOUNTS)
+    engine = FraudEngine([AmountZScoreRule()], prefetch=prefetch)
+    typical, outlier = _history(user, [1150, 20000])
+
+    assert engine.evaluate(typical).reasons == []
+    decision = engine.evaluate(outlier)
+    assert decision.reasons == [AmountZScoreRule().reason_text]
+    assert decision.features["amount_stats"]["count"] == len(AMOUNTS) + 1
+
+
+@pytest.mark.django_db
+def test_zscore_rule_batch_matches_single() -> None:
+    """Batch evaluation should read the stats in one query with the same
+    outcomes."""
+    user = User.objects.create_user(username="zbatch", password="pw")
+    loans = _history(user, [*AMOUNTS, 20000])
+    engine = FraudEngine([AmountZScoreRule()])
+
+    decisions = engine.evaluate_many(loans)
+
+    assert [decisions[loan.pk].status for loan in loans] == [
+        *["APPROVED"] * len(AMOUNTS),
+        "FLAGGED",
+    ]
+
+
+def test_zscore_rule_needs_history_and_spread() -> None:
+    """Short histories never flag; identical amounts use the spread
+    floor."""
+    rule = AmountZScoreRule()
+    short = {"count": 2, "mean": 100.0, "std": 1.0}
+    flat = {"count": 9, "mean": 100.0, "std": 0.0}
+    zero = {"count": 9, "mean": 0.0, "std": 0.0}
+    assert not rule.check({"amount": 10000, "amount_stats": short})
+    assert not rule.check({"amount": 120, "amount_stats": flat})
+    assert rule.check({"amount": 140, "amount_stats": flat})
+    assert not rule.check({"amount": 140, "amount_stats": zero})
+
+
+@pytest.mark.django_db
+def test_create_endpoint_records_amount(auth_client: Any, user: Any) -> None:
+    """POST /api/loan/ should fold the amount into the user's stats."""
+    url = reverse("loan-list-create")
+    for amount in (1000, 3000):
+        response = auth_client.post(url, {"amount": amount}, format="json")
+        assert response.status_code == 201
+
+    stats = UserLoanStats.objects.get(pk=user.pk)
+    assert stats.count == 2
+    assert stats.mean == pytest.approx(2000)
+    assert stats.max_amount == 3000
@@ -0,0 +1,272 @@
+"""Module: Unit tests for linked-account clustering (union-find)."""
+
+from decimal import Decimal
+from io import StringIO
+from typing import Any, Dict, FrozenSet, Set
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import fraud.clusters as clusters
+from fraud.clusters import (DisjointSet, client_ip, cluster_stats,
+                            find_roots, union)
+from fraud.config import current_shadow_engine
+from fraud.engine import FraudEngine
+from fraud.models import UserCluster
+from fraud.rules import AccountClusterRule
+from fraud.services import get_engine
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+PUBLIC_IP = "81.2.69.142"
+PURPOSE = "Buying refurbished laptops to resell at the weekend market"
+
+
+def _user(name: str, email: str = "") -> Any:
+    return User.objects.create_user(
+        username=name, email=email or f"{name}@{name}.test", password="pw"
+    )
+
+
+def _chain(*users: Any) -> None:
+    """Store a deliberately deep tree: each user under the next."""
+    for child, parent in zip(users, users[1:]):
+        UserCluster.objects.create(user=child, parent=parent.pk)
+    root = users[-1]
+    UserCluster.objects.create(
+        user=root,
+        parent=root.pk,
+        size=len(users),
+        loan_count=2,
+        loan_amount=Decimal("300"),
+    )
+
+
+def _partition() -> Set[FrozenSet[int]]:
+    groups: Dict[int, Set[int]] = {}
+    roots = find_roots(User.objects.values_list("pk", flat=True))
+    for user_id, root in roots.items():
+        groups.setdefault(root.pk, set()).add(user_id)
+    return {frozenset(group) for group in groups.values()}
+
+
+def test_in_memory_union_by_size_and_compression() -> None:
+    forest = DisjointSet()
+    for item in range(5):
+        forest.add(item)
+    forest.union(0, 1)
+    forest.union(2, 3)
+    forest.union(3, 4)
+    forest.union(1, 4)
+    assert forest.find(0) == forest.find(4) == 2
+    assert forest.size[2] == 5
+    assert forest.parent[0] == 2
+
+
+@pytest.mark.django_db
+def test_find_compresses_path(django_assert_num_queries: Any) -> None:
+    """Walking a deep tree costs one query per level plus one update, and
+    leaves every node pointing at the root."""
+    a, b, c, root = (_user(name) for name in "abcr")
+    _chain(a, b, c, root)
+
+    with django_assert_num_queries(5):
+        stats = cluster_stats([a.pk])
+    assert stats[a.pk] == {
+        "size": 4,
+        "loan_count": 2,
+        "loan_amount": Decimal("300"),
+    }
+    parents = dict(UserCluster.objects.values_list("pk", "parent"))
+    assert parents == dict.fromkeys([a.pk, b.pk, c.pk, root.pk], root.pk)
+    assert str(UserCluster.objects.get(pk=a.pk)) == (
+        f"User {a.pk} -> {root.pk}"
+    )
+
+
+@pytest.mark.django_db
+def test_union_attaches_smaller_tree_and_merges_totals() -> None:
+    big = [_user(f"big{i}") for i in range(3)]
+    small = [_user(f"small{i}") for i in range(2)]
+    assert union(big[0].pk, big[1].pk) is not None
+    union(big[1].pk, big[2].pk)
+    union(small[0].pk, small[1].pk)
+    big_root = find_roots([big[0].pk])[big[0].pk].pk
+
+    assert union(small[1].pk, big[2].pk) == big_root
+    assert union(small[0].pk, big[0].pk) == big_root
+    assert cluster_stats([small[0].pk])[small[0].pk]["size"] == 5
+
+
+@pytest.mark.django_db
+def test_orphaned_node_becomes_root() -> None:
+    child, parent = _user("child"), _user("parent")
+    UserCluster.objects.create(user=child, parent=parent.pk + 1000)
+    assert find_roots([child.pk])[child.pk].pk == child.pk
+    assert UserCluster.objects.get(pk=child.pk).parent == child.pk
+
+
+def test_client_ip_rejects_malformed_addresses() -> None:
+    factory = RequestFactory()
+    assert client_ip(factory.get("/", REMOTE_ADDR="::1")) == "::1"
+    assert client_ip(factory.get("/", REMOTE_ADDR="nonsense")) is None
+
+
+def test_client_ip_reads_the_proxy_header(settings: Any) -> None:
+    """Behind a proxy the address the proxy appended is the client's;
+    earlier entries are whatever the client sent."""
+    settings.FRAUD_CLIENT_IP_HEADER = "HTTP_X_FORWARDED_FOR"
+    request = RequestFactory().get(
+        "/",
+        REMOTE_ADDR="10.0.0.1",
+        HTTP_X_FORWARDED_FOR=f"1.2.3.4, {PUBLIC_IP}",
+    )
+    assert client_ip(request) == PUBLIC_IP
+    assert client_ip(RequestFactory().get("/")) is None
+
+
+@pytest.mark.django_db
+def test_registration_links_by_domain_and_public_address() -> None:
+    """Shared company domains and public addresses link accounts; free
+    mail providers and private addresses do not."""
+    client = APIClient()
+
+    def register(name: str, email: str, address: str) -> int:
+        response = client.post(
+            reverse("register"),
+            {"username": name, "email": email, "password": "pw12345"},
+            format="json",
+            REMOTE_ADDR=address,
+        )
+        assert response.status_code == 201
+        return response.data["user"]["id"]
+
+    first = register("r1", "r1@ring.io", "10.0.0.1")
+    second = register("r2", "r2@ring.io", "10.0.0.1")
+    third = register("r3", "r3@gmail.com", PUBLIC_IP)
+    fourth = register("r4", "r4@gmail.com", PUBLIC_IP)
+    loner = register("r5", "r5@gmail.com", "10.0.0.1")
+
+    assert {
+        frozenset({first, second}),
+        frozenset({third, fourth}),
+        frozenset({loner}),
+    } <= _partition()
+
+
+@pytest.mark.django_db
+def test_loans_link_by_purpose_and_address_and_flag_cluster() -> None:
+    """Copied purposes and a shared public address merge the applicants;
+    the rule then sees the cluster's size and loan totals."""
+    users = [_user(f"ring{i}") for i in range(4)]
+    client = APIClient()
+    for i, user in enumerate(users):
+        client.force_authenticate(user)
+        response = client.post(
+            reverse("loan-list-create"),
+            {"amount": 1000, "purpose": PURPOSE if i < 3 else "Other"},
+            format="json",
+            REMOTE_ADDR=PUBLIC_IP if i == 3 else "127.0.0.1",
+        )
+        assert response.status_code == 201
+    assert LoanApplication.objects.filter(ip_address=PUBLIC_IP).count() == 1
+
+    stats = cluster_stats([users[0].pk])[users[0].pk]
+    assert stats["size"] == 3
+    assert stats["loan_count"] == 3
+    assert stats["loan_amount"] == Decimal("3000")
+
+    loan = LoanApplication.objects.filter(user=users[0]).get()
+    for prefetch in (True, False):
+        engine = FraudEngine(
+            [AccountClusterRule(max_users=2)], prefetch=prefetch
+        )
+        assert engine.evaluate(loan).status == "FLAGGED"
+    loner = LoanApplication.objects.get(user=users[3])
+    assert engine.evaluate(loner).status == "APPROVED"
+
+
+@pytest.mark.django_db
+def test_feature_query_walks_deep_trees() -> None:
+    """When the applicant's parent is not a root, the prefetched feature
+    falls back to walking the tree."""
+    a, b, root = (_user(name) for name in ("d1", "d2", "d3"))
+    _chain(a, b, root)
+    loans = [
+        LoanApplication.objects.create(user=user, amount=100)
+        for user in (a, _user("nobody"))
+    ]
+    engine = FraudEngine([AccountClusterRule(max_users=2)])
+    assert engine.evaluate(loans[0]).features["cluster"]["size"] == 3
+    assert engine.evaluate(loans[1]).features["cluster"]["size"] == 1
+    decisions = engine.evaluate_many(loans)
+    assert [decisions[loan.pk].status for loan in loans] == [
+        "FLAGGED",
+        "APPROVED",
+    ]
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_forest() -> None:
+    """Rebuilding from scratch should reproduce the incremental clusters
+    and totals."""
+    client = APIClient()
+    for i in range(5):
+        user = _user(f"rb{i}", email=f"rb{i}@{'team' if i < 2 else i}.io")
+        client.force_authenticate(user)
+        client.post(
+            reverse("loan-list-create"),
+            {
+                "amount": 500 * (i + 1),
+                "purpose": PURPOSE if i >= 3 else f"purpose {i}",
+            },
+            format="json",
+            REMOTE_ADDR=PUBLIC_IP if i in (1, 2) else "127.0.0.1",
+        )
+    # Same domain; registration would have linked them
+    union(
+        User.objects.get(username="rb0").pk,
+        User.objects.get(username="rb1").pk,
+    )
+    before = _partition()
+    totals = cluster_stats(User.objects.values_list("pk", flat=True))
+    out = StringIO()
+
+    call_command("rebuild_clusters", stdout=out)
+
+    assert _partition() == before
+    assert cluster_stats(User.objects.values_list("pk", flat=True)) == totals
+    assert "Rebuilt 2 clusters over 5 accounts" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_rebuild_skips_crowded_purpose_buckets(monkeypatch: Any) -> None:
+    """Buckets shared by too many users are not compared pairwise."""
+    client = APIClient()
+    for i in range(2):
+        client.force_authenticate(_user(f"crowd{i}"))
+        client.post(
+            reverse("loan-list-create"),
+            {"amount": 500, "purpose": PURPOSE},
+            format="json",
+        )
+    assert len(_partition()) == 1
+    monkeypatch.setattr(clusters, "MAX_BUCKET_USERS", 1)
+
+    call_command("rebuild_clusters", stdout=StringIO())
+
+    assert len(_partition()) == 2
+
+
+@pytest.mark.django_db
+def test_cluster_rule_ships_in_shadow_mode() -> None:
+    """Until its limits are calibrated the rule never blocks a loan."""
+    assert "account_cluster" not in {r.name for r in get_engine().rules}
+    shadow = current_shadow_engine()
+    assert shadow is not None
+    assert "account_cluster" in {r.name for r in shadow.rules}
@@ -0,0 +1,78 @@
+"""Module: Unit tests for fraud decision records."""
+
+import datetime
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from fraud.decisions import plain
+from fraud.engine import FraudEngine
+from fraud.models import FraudDecisionRecord, FraudEngineConfig, FraudReason
+from fraud.services import get_engine, run_fraud_checks, run_fraud_checks_many
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.mark.django_db
+def test_checks_record_inputs_and_outcome() -> None:
+    """Single and batch checks should each write one record per loan
+    under the stored engine configuration."""
+    user = User.objects.create_user(username="dr", email="dr@dr.io")
+    big = LoanApplication.objects.create(user=user, amount=6000000)
+    run_fraud_checks(big)
+
+    record = FraudDecisionRecord.objects.get(loan=big)
+    engine = get_engine()
+    assert record.status == "FLAGGED"
+    assert FraudReason.objects.get(pk=record.reasons[0]).text == (
+        "Amount exceeds threshold"
+    )
+    assert record.features["amount"] == 6000000.0
+    assert record.config_version == engine.version
+    stored = FraudEngineConfig.objects.get(pk=engine.version)
+    assert stored.config == engine.describe()
+    assert str(stored).startswith(f"Config {engine.version} (")
+    assert str(record) == f"Loan {big.pk}: FLAGGED (config {engine.version})"
+
+    small = LoanApplication.objects.create(user=user, amount=100)
+    run_fraud_checks_many([big, small])
+    records = FraudDecisionRecord.objects.filter(loan=small)
+    assert [r.reasons for r in records] == [[]]
+    assert FraudDecisionRecord.objects.count() == 3
+    assert FraudEngineConfig.objects.count() == 1
+
+
+def test_engine_description_round_trips() -> None:
+    """Rebuilding an engine from its description should keep its
+    version; changing a threshold should change it."""
+    engine = FraudEngine.from_registry(review_amount=500)
+    rebuilt = FraudEngine.from_description(engine.describe())
+    assert rebuilt.version == engine.version
+    assert [r.name for r in rebuilt.rules] == [r.name for r in engine.rules]
+    tuned = FraudEngine.from_registry(
+        thresholds={"amount_threshold": {"max_amount": 1}}, review_amount=500
+    )
+    assert tuned.version != engine.version
+
+
+def test_plain_features_are_compact_json() -> None:
+    """Decimals, times, integer keys and sets should become JSON."""
+    moment = datetime.datetime(2026, 1, 2, 3, 4, 5)
+    assert plain(
+        {
+            "amount": Decimal("12.50"),
+            "at": moment,
+            "matches": {7: 4},
+            "seen": {1},
+            "flag": True,
+        }
+    ) == {
+        "amount": 12.5,
+        "at": "2026-01-02T03:04:05",
+        "matches": {"7": 4},
+        "seen": [1],
+        "flag": True,
+    }
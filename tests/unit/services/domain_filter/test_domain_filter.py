@@ -0,0 +1,118 @@
+import os
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from fraud.domain_filter import (DomainFilter, get_domain_filter,
+                                 is_blocked_domain, read_domain_list,
+                                 write_filter)
+from fraud.engine import FraudEngine
+from fraud.services import run_fraud_checks
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.fixture
+def filter_path(tmp_path, settings) -> str:
+    """Point the rule at a filter listing two disposable domains."""
+    path = str(tmp_path / "blocked.bin")
+    settings.FRAUD_DOMAIN_FILTER_PATH = path
+    write_filter({"mailinator.com", "trashmail.io"}, path).close()
+    return path
+
+
+def test_read_domain_list_normalizes_entries() -> None:
+    lines = ["# disposable\n", "Mailinator.COM.\n", "@yopmail.com # x\n", "\n"]
+    assert read_domain_list(lines) == {"mailinator.com", "yopmail.com"}
+
+
+def test_false_positives_never_match(tmp_path) -> None:
+    """Bloom hits on unlisted domains are rejected by the exact check."""
+    listed = {f"listed{i}.test" for i in range(50)}
+    domain_filter = write_filter(
+        listed, str(tmp_path / "f.bin"), error_rate=0.3
+    )
+    probes = [f"other{i}.test" for i in range(2000)]
+
+    assert all(domain in domain_filter for domain in listed)
+    assert any(domain_filter.might_contain(p.encode()) for p in probes)
+    assert not any(probe in domain_filter for probe in probes)
+    assert len(domain_filter) == 50
+    assert 42 not in domain_filter
+
+
+def test_empty_filter_and_bad_file(tmp_path) -> None:
+    domain_filter = write_filter([], str(tmp_path / "empty.bin"))
+    assert "a.test" not in domain_filter
+    with pytest.raises(ValueError):
+        DomainFilter(b"\0" * 64)
+    with pytest.raises(ValueError):
+        DomainFilter(open(tmp_path / "empty.bin", "rb").read()[:-8])
+
+
+def test_parent_domains_match(filter_path: str) -> None:
+    assert is_blocked_domain("mailinator.com")
+    assert is_blocked_domain("eu.mailinator.com")
+    assert not is_blocked_domain("notmailinator.com")
+    assert not is_blocked_domain("com")
+    assert not is_blocked_domain("")
+
+
+def test_replaced_file_is_remapped(filter_path: str, monkeypatch) -> None:
+    first = get_domain_filter()
+    assert first is not None
+    assert get_domain_filter() is first
+    write_filter({"new.test"}, filter_path).close()
+    os.utime(filter_path, ns=(1, 1))
+    # Not stat'ed again until STAT_INTERVAL has passed
+    assert get_domain_filter() is first
+
+    monkeypatch.setattr("fraud.domain_filter.STAT_INTERVAL", 0.0)
+    assert is_blocked_domain("new.test")
+    assert not is_blocked_domain("mailinator.com")
+    with pytest.raises(ValueError):  # The old mapping was closed
+        first.matches("mailinator.com")
+
+
+def test_missing_or_corrupt_file_disables_rule(tmp_path, settings) -> None:
+    settings.FRAUD_DOMAIN_FILTER_PATH = str(tmp_path / "missing.bin")
+    assert get_domain_filter() is None
+    corrupt = tmp_path / "corrupt.bin"
+    corrupt.write_bytes(b"x" * 64)
+    settings.FRAUD_DOMAIN_FILTER_PATH = str(corrupt)
+    assert not is_blocked_domain("mailinator.com")
+
+
+@pytest.mark.django_db
+def test_blocked_domain_flags_loan(filter_path: str) -> None:
+    user = User.objects.create_user(
+        username="burner", email="x@eu.mailinator.com", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=user, amount=100)
+
+    reasons = run_fraud_checks(loan)
+
+    assert reasons == ["Email domain is disposable or blocked"]
+    assert loan.status == "FLAGGED"
+
+
+@pytest.mark.django_db
+def test_blocked_domain_batch_matches_single(filter_path: str) -> None:
+    loans = [
+        LoanApplication.objects.create(
+            user=User.objects.create_user(
+                username=f"u{i}", email=email, password="pw"
+            ),
+            amount=100,
+        )
+        for i, email in enumerate(["a@trashmail.io", "b@example.org"])
+    ]
+    engine = FraudEngine.from_registry()
+
+    decisions = engine.evaluate_many(loans)
+
+    assert decisions[loans[0].pk].status == "FLAGGED"
+    assert decisions[loans[0].pk].features["blocked_domain"] is True
+    assert decisions[loans[1].pk].status == "APPROVED"
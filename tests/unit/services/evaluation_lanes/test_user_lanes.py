@@ -0,0 +1,200 @@
+"""Module: Unit tests for per-user fraud evaluation lanes."""
+
+import threading
+import time
+from typing import Any, List
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from fraud import lanes
+from fraud.lanes import (LANE_LOCK_CLASS, check_lane_cache, user_lane,
+                         user_lanes)
+from fraud.models import FraudRuleConfig
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_creates_cannot_slip_under_the_limit() -> None:
+    """Concurrent POSTs by one user should be evaluated one after the
+    other, so every loan past the third is flagged."""
+    # No shadow rules: their background writes would contend for the
+    # in-memory SQLite tables
+    for rule in ("account_cluster", "purpose_ring"):
+        FraudRuleConfig.objects.create(rule=rule, enabled=False)
+    # Only recent_loans should decide; the burst is within the hour
+    FraudRuleConfig.objects.create(
+        rule="velocity_windows", thresholds={"max_loans_1h": 3}
+    )
+    user = User.objects.create_user(username="burst", email="b@burst.io")
+    gate = threading.Barrier(6)
+    errors: List[BaseException] = []
+
+    def post() -> None:
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            gate.wait()
+            response = client.post(
+                reverse("loan-list-create"), {"amount": 100}, format="json"
+            )
+            assert response.status_code == 201
+        except BaseException as exc:  # Surface failures from the thread
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=post) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    statuses = list(
+        LoanApplication.objects.order_by("pk").values_list(
+            "status", flat=True
+        )
+    )
+    assert statuses == ["APPROVED"] * 3 + ["FLAGGED"] * 3
+
+
+def test_lanes_of_different_users_run_in_parallel() -> None:
+    """Only the same user's lane should wait; re-entering never does."""
+    holding = threading.Event()
+    release = threading.Event()
+    order: List[str] = []
+
+    def hold() -> None:
+        with user_lane(1):
+            with user_lane(1):  # Re-entrant
+                holding.set()
+                release.wait(5)
+                order.append("first released")
+
+    def enter(user_id: int, label: str) -> None:
+        with user_lane(user_id):
+            order.append(label)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert holding.wait(5)
+    same = threading.Thread(target=enter, args=(1, "same user"))
+    same.start()
+    other = threading.Thread(target=enter, args=(2, "other user"))
+    other.start()
+    other.join(5)
+    assert order == ["other user"]
+    release.set()
+    for thread in (holder, same):
+        thread.join(5)
+    assert order == ["other user", "first released", "same user"]
+    assert cache.get("fraud.lane.user_1") is None
+
+
+def test_expired_holder_does_not_block(settings: Any, caplog: Any) -> None:
+    """A lane left behind by a crashed holder is given up after the
+    lease, and its entry is not deleted by the late waiter."""
+    settings.FRAUD_LANE_LEASE = 0.05
+    cache.add("fraud.lane.user_7", "crashed", 60)
+    with user_lane(7):
+        pass
+    assert "still held after 0.05s" in caplog.text
+    assert cache.get("fraud.lane.user_7") == "crashed"
+
+
+@pytest.mark.parametrize("failure", ["ignored", "raised"])
+def test_failing_cache_does_not_wait(
+    settings: Any, monkeypatch: Any, caplog: Any, failure: str
+) -> None:
+    """A cache backend that cannot add (django-redis answers None when
+    it ignores the error) should skip the lane at once."""
+    settings.FRAUD_LANE_LEASE = 5
+
+    def add(*args: Any) -> None:
+        if failure == "raised":
+            raise ConnectionError("redis down")
+        return None
+
+    monkeypatch.setattr(cache, "add", add)
+    started = time.monotonic()
+    with user_lane(8):
+        pass
+    assert time.monotonic() - started < 1
+    assert "unavailable; cache failed" in caplog.text
+
+
+def test_process_local_cache_refused(settings: Any) -> None:
+    """Without PostgreSQL, a locmem cache cannot serialize several
+    server processes and must be allowed explicitly; the system check
+    refuses it at startup."""
+    settings.FRAUD_LANE_LOCAL_CACHE = False
+    errors = run_checks(tags=["caches"])
+    assert [e.id for e in errors] == ["fraud.E001"]
+    assert "FRAUD_LANE_LOCAL_CACHE" in (errors[0].hint or "")
+
+
+def test_lane_check_passes_when_allowed(settings: Any) -> None:
+    """Declaring a single-process server, or a shared cache, passes."""
+    settings.FRAUD_LANE_LOCAL_CACHE = True
+    assert check_lane_cache(None) == []
+    settings.FRAUD_LANE_LOCAL_CACHE = False
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": "/tmp/fraud-lane-check",
+        }
+    }
+    assert check_lane_cache(None) == []
+
+
+def test_user_lanes_holds_each_user_once() -> None:
+    """Several lanes are held together, duplicates included."""
+    with user_lanes([3, 2, 3]):
+        assert cache.get("fraud.lane.user_2")
+        assert cache.get("fraud.lane.user_3")
+    assert cache.get("fraud.lane.user_2") is None
+    assert cache.get("fraud.lane.user_3") is None
+
+
+@pytest.mark.django_db
+def test_postgresql_uses_transaction_advisory_lock(monkeypatch: Any) -> None:
+    """On PostgreSQL the lane should be an advisory lock held by a
+    transaction around the block."""
+    executed: List[Any] = []
+
+    class Cursor:
+        def __enter__(self) -> "Cursor":
+            return self
+
+        def __exit__(self, *exc: Any) -> None:
+            return None
+
+        def execute(self, sql: str, params: List[int]) -> None:
+            depth = len(connection.savepoint_ids)
+            executed.append((sql, params, depth))
+
+    class Postgres:
+        vendor = "postgresql"
+
+        def cursor(self) -> Cursor:
+            return Cursor()
+
+    monkeypatch.setattr(lanes, "connection", Postgres())
+    depth = len(connection.savepoint_ids)
+    with user_lane(42):
+        pass
+    assert executed == [
+        (
+            "SELECT pg_advisory_xact_lock(%s, %s)",
+            [LANE_LOCK_CLASS, 42],
+            depth + 1,
+        )
+    ]
@@ -0,0 +1,252 @@
+"""Module: Unit tests for concurrent rule evaluation."""
+
+import threading
+import time
+from typing import Any, ClassVar, Iterator, List, Mapping, Tuple
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from fraud.config import current_engine
+from fraud.engine import FraudEngine
+from fraud.features import FEATURE_LOADERS, FraudContext
+from fraud.rules import (COST_CACHE, COST_QUERY, AmountThresholdRule,
+                         FraudRule)
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+DELAY: float = 0.05  # Seconds each slow rule spends "waiting on I/O"
+
+
+class SlowRule(FraudRule):
+    """Unregistered rule that sleeps, then flags amounts over a limit."""
+
+    name = "slow"
+    reason = "Slow rule flagged"
+    cost = COST_CACHE
+    inputs: ClassVar[Tuple[str, ...]] = ("amount",)
+    thresholds = {"max_amount": 1000, "delay": DELAY}
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        time.sleep(self.params["delay"])
+        return features["amount"] > self.params["max_amount"]
+
+
+def _slow_rules(count: int, **overrides: Any) -> List[FraudRule]:
+    rules: List[FraudRule] = []
+    for i in range(count):
+        rule_cls = type(f"Slow{i}", (SlowRule,), {"name": f"slow_{i}"})
+        rules.append(rule_cls(**overrides))
+    return rules
+
+
+class BlockingRule(SlowRule):
+    """Unregistered rule that waits for an event before passing, and
+    signals once it has returned."""
+
+    name = "blocking"
+    release: ClassVar[threading.Event]
+    finished: ClassVar[threading.Event]
+
+    def check(self, features: Mapping[str, Any]) -> bool:
+        finished = self.finished  # The fixture swaps them between tests
+        try:
+            return not self.release.wait(5)
+        finally:
+            finished.set()
+
+
+@pytest.fixture
+def blocking() -> Iterator[type]:
+    """``BlockingRule`` with fresh events; released at teardown."""
+    BlockingRule.release = threading.Event()
+    BlockingRule.finished = threading.Event()
+    yield BlockingRule
+    BlockingRule.release.set()
+
+
+def test_pooled_rules_overlap() -> None:
+    """Pooled rules should all be running at once: each waits at a
+    barrier only passable when every rule has reached it."""
+    gate = threading.Barrier(4, timeout=5)
+
+    class MeetingRule(SlowRule):
+        def check(self, features: Mapping[str, Any]) -> bool:
+            gate.wait()
+            return False
+
+    rules = [
+        type(f"Meeting{i}", (MeetingRule,), {"name": f"meeting_{i}"})()
+        for i in range(4)
+    ]
+    engine = FraudEngine(rules, prefetch=False, max_workers=4, timeout=10)
+    decision = engine.evaluate(LoanApplication(pk=1, amount=500))
+    assert decision.reasons == []
+    assert decision.evaluated == [rule.name for rule in rules]
+
+
+def test_concurrent_matches_sequential_decision() -> None:
+    """Concurrent evaluation should report reasons in cost order and
+    short-circuit like the sequential path."""
+    loan = LoanApplication(pk=1, amount=5000)
+    rules = _slow_rules(3, delay=0)
+    for short_circuit in (True, False):
+        sequential = FraudEngine(rules, short_circuit=short_circuit)
+        concurrent = FraudEngine(
+            rules, short_circuit=short_circuit, max_workers=2
+        )
+        expected = sequential.evaluate(loan)
+        decision = concurrent.evaluate(loan)
+        assert decision.reasons == expected.reasons
+        assert decision.evaluated == expected.evaluated
+        assert decision.status == "FLAGGED"
+
+
+def test_memory_rules_decide_without_the_pool() -> None:
+    """An in-memory rule that flags should skip the pooled rules."""
+    loan = LoanApplication(pk=1, amount=6000000)
+    engine = FraudEngine(
+        [AmountThresholdRule(), *_slow_rules(2)], max_workers=2
+    )
+    decision = engine.evaluate(loan)
+    assert decision.evaluated == ["amount_threshold"]
+    assert decision.reasons == ["Amount exceeds threshold"]
+
+
+@pytest.mark.parametrize(
+    "outcome, status, reasons",
+    [
+        ("pass", "APPROVED", []),
+        ("flag", "FLAGGED", ["Fraud rule slow_0 timed out"]),
+    ],
+)
+def test_timeout_applies_fallback_outcome(
+    blocking: type, outcome: str, status: str, reasons: List[str]
+) -> None:
+    """A rule slower than its timeout should resolve to the configured
+    fallback without waiting for it."""
+    class Blocked(BlockingRule):
+        name = "slow_0"
+
+    loan = LoanApplication(pk=1, amount=500)
+    engine = FraudEngine(
+        [Blocked()],
+        max_workers=1,
+        timeout=DELAY,
+        timeout_outcome=outcome,
+    )
+    decision = engine.evaluate(loan)
+    assert not Blocked.finished.is_set()  # Decided without waiting
+    assert decision.status == status
+    assert decision.reasons == reasons
+
+
+def test_rule_timeout_overrides_engine_defaults(blocking: type) -> None:
+    """Per-rule timeout settings should take precedence."""
+
+    class Strict(BlockingRule):
+        name = "strict"
+        timeout: ClassVar[float] = DELAY
+        timeout_outcome: ClassVar[str] = "flag"
+
+    loan = LoanApplication(pk=1, amount=500)
+    engine = FraudEngine([Strict()], max_workers=1, timeout=5.0)
+    decision = engine.evaluate(loan)
+    assert decision.reasons == ["Fraud rule strict timed out"]
+
+
+def test_timed_out_rule_cannot_change_decision_features(
+    blocking: type,
+) -> None:
+    """Features a rule resolves after its timeout stay out of the
+    decision; those of rules that finished are kept."""
+    loaded = threading.Event()
+
+    def late(context: FraudContext) -> Any:
+        BlockingRule.release.wait(5)
+        loaded.set()
+        return "late"
+
+    class Late(SlowRule):
+        name = "late"
+        inputs = ("amount", "late_feature")
+
+    class Quick(SlowRule):
+        name = "quick"
+        inputs = ("amount", "quick_feature")
+        timeout: ClassVar[float] = 5.0
+
+    FEATURE_LOADERS["late_feature"] = late
+    FEATURE_LOADERS["quick_feature"] = lambda context: "quick"
+    try:
+        engine = FraudEngine(
+            [Quick(delay=0), Late(delay=0)], max_workers=2, timeout=DELAY
+        )
+        decision = engine.evaluate(LoanApplication(pk=1, amount=500))
+        BlockingRule.release.set()
+        assert loaded.wait(5)
+    finally:
+        del FEATURE_LOADERS["late_feature"], FEATURE_LOADERS["quick_feature"]
+    assert decision.reasons == []
+    assert decision.features["quick_feature"] == "quick"
+    assert "late_feature" not in decision.features
+
+
+def test_unknown_timeout_outcome_rejected() -> None:
+    """Only "pass" and "flag" are valid fallbacks."""
+    with pytest.raises(ValueError, match="timeout outcome"):
+        FraudEngine([], timeout_outcome="maybe")
+
+
+def test_features_load_once_across_threads() -> None:
+    """Rules sharing a feature on different threads should load it
+    once."""
+    calls: List[str] = []
+    gate = threading.Barrier(4)
+
+    def worker(context: FraudContext) -> None:
+        gate.wait()
+        context.get("amount")
+
+    original = FEATURE_LOADERS["amount"]
+
+    def counting(context: FraudContext) -> Any:
+        calls.append(threading.current_thread().name)
+        time.sleep(0.01)
+        return original(context)
+
+    FEATURE_LOADERS["amount"] = counting
+    try:
+        context = FraudContext(LoanApplication(pk=1, amount=1))
+        threads = [
+            threading.Thread(target=worker, args=(context,))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        FEATURE_LOADERS["amount"] = original
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_registry_rules_concurrently_from_settings(settings: Any) -> None:
+    """With FRAUD_RULE_WORKERS set, the live engine should evaluate
+    database-backed rules on the pool with the same outcome."""
+    settings.FRAUD_RULE_WORKERS = 2
+    user = User.objects.create_user(
+        username="pooled", email="pooled@example.com", password="pw"
+    )
+    loans = [
+        LoanApplication.objects.create(user=user, amount=1000)
+        for _ in range(4)
+    ]
+    engine = current_engine()
+    assert engine.max_workers == 2
+    assert any(rule.cost == COST_QUERY for rule in engine.rules)
+    decision = engine.evaluate(loans[-1])
+    assert decision.status == "FLAGGED"
+    assert decision.reasons == ["More than 3 loans in 24 hours"]
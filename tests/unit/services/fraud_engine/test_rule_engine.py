@@ -0,0 +1,94 @@
+"""Module: Unit tests for the cost-ordered fraud rule engine."""
+
+from typing import Any, Mapping
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from fraud.engine import FraudEngine
+from fraud.rules import (COST_MEMORY, RULE_REGISTRY, AmountThresholdRule,
+                         FraudRule, RecentLoansRule, register_rule)
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+def test_registry_rules_ordered_cheapest_first() -> None:
+    """Engine should sort registered rules by declared cost."""
+    engine = FraudEngine.from_registry()
+    costs = [rule.cost for rule in engine.rules]
+    assert costs == sorted(costs)
+    assert engine.rules[0].name == "amount_threshold"
+    assert {rule.name for rule in engine.rules} == set(RULE_REGISTRY)
+
+
+@pytest.mark.django_db
+def test_amount_rule_short_circuits_before_any_query(
+    django_assert_num_queries: Any,
+) -> None:
+    """A 5M+ amount should decide the loan without loading other
+    features."""
+    user = User.objects.create_user(
+        username="bigspender", email="big@example.com", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=user, amount=6000000)
+    loan = LoanApplication.objects.get(pk=loan.pk)
+    engine = FraudEngine.from_registry(short_circuit=True)
+    with django_assert_num_queries(0):
+        decision = engine.evaluate(loan)
+    assert decision.status == "FLAGGED"
+    assert decision.reasons == ["Amount exceeds threshold"]
+    assert decision.evaluated == ["amount_threshold"]
+    assert "recent_loan_count" not in decision.features
+
+
+@pytest.mark.django_db
+def test_without_short_circuit_all_rules_run() -> None:
+    """Disabling short-circuit should evaluate every rule."""
+    user = User.objects.create_user(
+        username="fullrun", email="full@example.com", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=user, amount=6000000)
+    decision = FraudEngine.from_registry(short_circuit=False).evaluate(loan)
+    assert len(decision.evaluated) == len(RULE_REGISTRY)
+    assert decision.features["recent_loan_count"] == 1
+
+
+@pytest.mark.django_db
+def test_prefilled_features_are_not_reloaded(
+    django_assert_num_queries: Any,
+) -> None:
+    """Features passed by the caller should be used as-is."""
+    user = User.objects.create_user(
+        username="prefill", email="prefill@example.com", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=user, amount=1000)
+    features = {"domain_user_count": 1, "recent_loan_count": 5}
+    with django_assert_num_queries(0):
+        decision = FraudEngine.from_registry().evaluate(loan, features)
+    assert decision.reasons == ["More than 3 loans in 24 hours"]
+
+
+def test_threshold_overrides_bind_reason_text() -> None:
+    """Overrides should change both the check and the reason text."""
+    rule = RecentLoansRule(max_loans=5)
+    assert rule.reason_text == "More than 5 loans in 24 hours"
+    assert not rule.check({"recent_loan_count": 5})
+    assert rule.check({"recent_loan_count": 6})
+    with pytest.raises(ValueError):
+        AmountThresholdRule(bogus=1)
+
+
+def test_register_rule_rejects_duplicates() -> None:
+    """Registering a rule name twice should raise ValueError."""
+
+    class DuplicateRule(FraudRule):
+        name = "amount_threshold"
+        cost = COST_MEMORY
+
+        def check(self, features: Mapping[str, Any]) -> bool:
+            return False
+
+    with pytest.raises(ValueError):
+        register_rule(DuplicateRule)
+    assert RULE_REGISTRY["amount_threshold"] is AmountThresholdRule
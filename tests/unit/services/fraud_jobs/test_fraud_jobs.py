@@ -0,0 +1,163 @@
+"""Module: Unit tests for asynchronous fraud evaluation via FraudJob."""
+
+from io import StringIO
+from typing import Any, List
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+import fraud.jobs as jobs
+from fraud.jobs import process_jobs
+from fraud.models import FraudJob
+from loan.models import LoanApplication
+
+
+@pytest.fixture
+def async_mode(settings: Any) -> None:
+    """Switch fraud evaluation to the job queue."""
+    settings.FRAUD_EVALUATION_MODE = "async"
+
+
+@pytest.mark.django_db
+def test_async_create_returns_202_and_worker_decides(
+    async_mode: None, auth_client: APIClient
+) -> None:
+    """Async create should answer 202 PENDING; the worker then decides."""
+    url = reverse("loan-list-create")
+    resp = auth_client.post(url, {"amount": "6000000.00"}, format="json")
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+    assert resp.data["status"] == "PENDING"
+    loan_id = resp.data["id"]
+    detail_url = reverse("loan-detail", args=[loan_id])
+    assert resp.data["status_url"].endswith(detail_url)
+    assert resp["Location"] == resp.data["status_url"]
+    job = FraudJob.objects.get(loan_id=loan_id)
+    assert job.status == "QUEUED"
+    assert str(job) == f"FraudJob {job.id} (QUEUED) - loan {loan_id}"
+    # Poll once so the PENDING detail is cached, then run the worker
+    assert auth_client.get(detail_url).data["status"] == "PENDING"
+
+    out = StringIO()
+    call_command("fraud_worker", "--once", stdout=out)
+
+    assert "Processed 1 jobs." in out.getvalue()
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ("DONE", 1)
+    assert auth_client.get(detail_url).data["status"] == "FLAGGED"
+
+
+@pytest.mark.django_db
+def test_withdrawn_loan_is_skipped(async_mode: None, user: Any) -> None:
+    """Loans withdrawn while queued should not be evaluated."""
+    loan = LoanApplication.objects.create(
+        user=user, amount=1000, status="WITHDRAWN"
+    )
+    FraudJob.objects.create(loan=loan)
+    assert process_jobs() == 1
+    loan.refresh_from_db()
+    assert loan.status == "WITHDRAWN"
+    assert process_jobs() == 0
+
+
+@pytest.mark.django_db
+def test_worker_holds_applicant_lanes(monkeypatch: Any, user: Any) -> None:
+    """The worker should evaluate inside the applicants' lanes, like
+    the synchronous create endpoint."""
+    held: List[Any] = []
+
+    def check(loans: Any) -> None:
+        held.append(cache.get(f"fraud.lane.user_{user.pk}"))
+
+    monkeypatch.setattr(jobs, "run_fraud_checks_many", check)
+    loan = LoanApplication.objects.create(user=user, amount=1000)
+    FraudJob.objects.create(loan=loan)
+    assert process_jobs() == 1
+    assert held and held[0]
+    assert cache.get(f"fraud.lane.user_{user.pk}") is None
+
+
+@pytest.mark.django_db
+def test_failures_retry_then_fail(monkeypatch: Any, user: Any) -> None:
+    """A failing batch should be re-queued until MAX_ATTEMPTS."""
+
+    def boom(loans: Any) -> None:
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(jobs, "run_fraud_checks_many", boom)
+    loan = LoanApplication.objects.create(user=user, amount=1000)
+    job = FraudJob.objects.create(loan=loan)
+    for _ in range(jobs.MAX_ATTEMPTS):
+        assert process_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == "FAILED"
+    assert job.attempts == jobs.MAX_ATTEMPTS
+    assert job.last_error == "db down"
+    assert process_jobs() == 0
+
+
+@pytest.mark.django_db
+def test_bad_job_fails_alone(
+    monkeypatch: Any, user: Any, settings: Any
+) -> None:
+    """A loan that breaks its batch should not hold back the others:
+    the jobs are retried one by one and only the bad one fails."""
+    settings.FRAUD_RULE_THRESHOLDS = {"velocity_windows": {"max_loans_1h": 3}}
+    real = jobs.run_fraud_checks_many
+    loans = [
+        LoanApplication.objects.create(user=user, amount=amount)
+        for amount in (1000, 666, 2000)
+    ]
+
+    def picky(batch: Any) -> Any:
+        if any(loan.amount == 666 for loan in batch):
+            raise RuntimeError("bad loan")
+        return real(batch)
+
+    monkeypatch.setattr(jobs, "run_fraud_checks_many", picky)
+    for loan in loans:
+        FraudJob.objects.create(loan=loan)
+    for _ in range(jobs.MAX_ATTEMPTS):
+        process_jobs()
+    states = {
+        amount: (job_status, attempts)
+        for amount, job_status, attempts in FraudJob.objects.values_list(
+            "loan__amount", "status", "attempts"
+        )
+    }
+    assert states == {
+        1000: ("DONE", 1),
+        666: ("FAILED", jobs.MAX_ATTEMPTS),
+        2000: ("DONE", 1),
+    }
+    statuses = LoanApplication.objects.order_by("pk").values_list(
+        "status", flat=True
+    )
+    assert list(statuses) == ["APPROVED", "PENDING", "APPROVED"]
+
+
+@pytest.mark.django_db
+def test_loan_deleted_mid_batch(monkeypatch: Any, user: Any) -> None:
+    """A loan deleted while its batch runs must not leave the other
+    jobs of the batch RUNNING."""
+    real = jobs.run_fraud_checks_many
+    loans = [
+        LoanApplication.objects.create(user=user, amount=amount)
+        for amount in (1000, 666, 2000)
+    ]
+
+    def deleting(batch: Any) -> Any:
+        if len(batch) > 1:
+            LoanApplication.objects.filter(amount=666).delete()
+            raise RuntimeError("loan vanished")
+        return real(batch)
+
+    monkeypatch.setattr(jobs, "run_fraud_checks_many", deleting)
+    for loan in loans:
+        FraudJob.objects.create(loan=loan)
+    assert process_jobs() == 3
+    states = FraudJob.objects.values_list("loan__amount", "status")
+    assert dict(states) == {1000: "DONE", 2000: "DONE"}
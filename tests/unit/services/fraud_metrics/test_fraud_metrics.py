@@ -0,0 +1,134 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from fraud import metrics
+from fraud.engine import FraudEngine
+from fraud.rules import AmountThresholdRule
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start every test from empty pending and shared counters."""
+    metrics.reset()
+
+
+def test_percentiles_use_bucket_upper_bounds() -> None:
+    """p50/p99 report the bound of the bucket holding the quantile."""
+    for _ in range(98):
+        metrics.record_rule("amount_threshold", False, 0.00002)  # 20µs
+    metrics.record_rule("amount_threshold", True, 0.004)  # 4ms
+    metrics.record_rule("amount_threshold", True, 5.0)  # overflow
+
+    stats = metrics.snapshot()["rules"]["amount_threshold"]
+
+    assert stats["count"] == 100
+    assert stats["hits"] == 2
+    assert stats["hit_rate"] == 0.02
+    assert stats["p50_us"] == 25
+    assert stats["p95_us"] == 25
+    assert stats["p99_us"] == 5000
+    assert stats["outcomes"]["hit"]["p99_us"] is None
+    assert stats["outcomes"]["pass"]["count"] == 98
+
+
+def test_flush_accumulates_across_processes() -> None:
+    """Counters are added to, not overwritten, by successive flushes."""
+    metrics.record_cache("domain_user_count", True, 3)
+    metrics.flush()
+    metrics.record_cache("domain_user_count", False)
+    metrics.flush()
+
+    stats = metrics.snapshot()["cache"]["domain_user_count"]
+
+    assert stats == {"hits": 3, "misses": 1, "hit_ratio": 0.75}
+
+
+def test_flush_failure_is_logged(monkeypatch) -> None:
+    """A broken cache never breaks fraud evaluation."""
+    def boom(*args, **kwargs):
+        raise ConnectionError("cache down")
+
+    monkeypatch.setattr(cache, "incr", boom)
+    metrics.record_rule("recent_loans", False, 0.001)
+    metrics.flush()
+
+
+def test_failed_flush_keeps_counts(monkeypatch) -> None:
+    """Counts a failed flush could not write are added by the next one."""
+    metrics.record_cache("domain_user_count", True, 2)
+    with monkeypatch.context() as patch:
+        patch.setattr(cache, "incr", lambda *a, **k: 1 / 0)
+        metrics.flush()
+    metrics.record_cache("domain_user_count", True)
+    metrics.flush()
+
+    assert metrics.snapshot()["cache"]["domain_user_count"]["hits"] == 3
+
+
+def test_empty_snapshot_has_no_rates() -> None:
+    stats = metrics.snapshot()
+    assert stats["rules"]["email_domain"]["hit_rate"] is None
+    assert stats["rules"]["email_domain"]["p50_us"] is None
+    assert stats["cache"]["domain_user_count"]["hit_ratio"] is None
+
+
+@pytest.mark.django_db
+def test_engine_records_rules_and_domain_cache() -> None:
+    """Evaluation times every rule it runs and counts cache lookups."""
+    user = User.objects.create_user(
+        username="m1", email="m1@metrics.test", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=user, amount=100)
+    engine = FraudEngine.from_registry()
+    engine.evaluate(loan)
+    engine.evaluate(loan)
+    engine.evaluate_many([loan])
+
+    stats = metrics.snapshot()
+
+    for name in engine.rules:
+        assert stats["rules"][name.name]["count"] == 3
+        assert stats["rules"][name.name]["hits"] == 0
+    assert stats["cache"]["domain_user_count"]["misses"] == 1
+    assert stats["cache"]["domain_user_count"]["hits"] == 2
+
+
+@pytest.mark.django_db
+def test_short_circuit_records_only_evaluated_rules() -> None:
+    user = User.objects.create_user(username="m2", password="pw")
+    loan = LoanApplication.objects.create(user=user, amount=6000000)
+    engine = FraudEngine([AmountThresholdRule()])
+    engine.evaluate(loan)
+
+    stats = metrics.snapshot()["rules"]
+    assert stats["amount_threshold"]["hits"] == 1
+    assert stats["recent_loans"]["count"] == 0
+
+
+@pytest.mark.django_db
+def test_record_flushes_after_interval(monkeypatch) -> None:
+    monkeypatch.setattr(metrics, "FLUSH_INTERVAL", 0.0)
+    metrics.record_rule("recent_loans", False, 0.0001)
+    assert cache.get(metrics._rule_key("recent_loans", "pass", 3)) == 1
+
+
+@pytest.mark.django_db
+def test_stats_endpoint_rejects_non_admin(auth_client) -> None:
+    assert auth_client.get("/api/fraud/stats/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_stats_endpoint_reports_metrics(admin_client) -> None:
+    metrics.record_rule("email_domain", True, 0.0003)
+
+    response = admin_client.get("/api/fraud/stats/")
+
+    assert response.status_code == 200
+    rule = response.data["rules"]["email_domain"]
+    assert rule["hits"] == 1
+    assert rule["p50_us"] == 500
+    assert "domain_user_count" in response.data["cache"]
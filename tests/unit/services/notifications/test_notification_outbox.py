@@ -0,0 +1,194 @@
+"""Module: Unit tests for the fraud alert outbox and its dispatcher."""
+
+import datetime
+from io import StringIO
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+import fraud.notifications as notifications
+from fraud.models import NotificationOutbox
+from fraud.notifications import dispatch_outbox
+from fraud.services import run_fraud_checks
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+@pytest.fixture
+def flagged_loans(db: Any) -> list:
+    """Three loans flagged for a high amount, alerts queued."""
+    user = User.objects.create_user(
+        username="alerts", email="alerts@example.com", password="pw"
+    )
+    loans = [
+        LoanApplication.objects.create(user=user, amount=6000000)
+        for _ in range(3)
+    ]
+    for loan in loans:
+        run_fraud_checks(loan)
+    return loans
+
+
+@pytest.mark.django_db
+def test_flagging_queues_instead_of_sending(flagged_loans: list) -> None:
+    """Flagging should write outbox rows and send nothing inline."""
+    assert mail.outbox == []
+    row = NotificationOutbox.objects.get(loan=flagged_loans[0])
+    assert row.subject == f"Loan {flagged_loans[0].pk} Flagged"
+    assert row.recipients == ["admin@example.com"]
+    assert str(row) == f"Notification {row.pk} - {row.subject}"
+
+
+@pytest.mark.django_db
+def test_dispatch_sends_each_alert_once(flagged_loans: list) -> None:
+    """Dispatcher should send pending rows in batches exactly once."""
+    out = StringIO()
+    call_command(
+        "dispatch_notifications", "--once", "--batch-size", "2", stdout=out
+    )
+    assert "Sent 3 alerts." in out.getvalue()
+    assert len(mail.outbox) == 3
+    assert not NotificationOutbox.objects.filter(
+        sent_at__isnull=True
+    ).exists()
+    assert dispatch_outbox() == 0
+
+
+@pytest.mark.django_db
+def test_digest_coalesces_closed_windows(flagged_loans: list) -> None:
+    """Alerts in a closed window should become one digest email."""
+    assert dispatch_outbox(digest_window=3600) == 0  # window still open
+    NotificationOutbox.objects.update(
+        created_at=timezone.now() - datetime.timedelta(hours=2)
+    )
+    assert dispatch_outbox(digest_window=3600) == 3
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject.startswith(
+        "Fraud alert digest: 3 loans flagged"
+    )
+    assert mail.outbox[0].body.count("flagged for reasons") == 3
+
+
+class FlakyConnection:
+    """Mail connection failing on messages whose subject it knows."""
+
+    def __init__(self, failing: Any = ()) -> None:
+        self.failing = set(failing)
+
+    def open(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    def send_messages(self, messages: Any) -> int:
+        for message in messages:
+            if message.subject in self.failing:
+                raise OSError("mailbox unavailable")
+            mail.outbox.append(message)
+        return len(messages)
+
+
+@pytest.mark.django_db
+def test_send_failure_keeps_rows_pending(
+    flagged_loans: list, monkeypatch: Any
+) -> None:
+    """A mail error should leave rows pending and record the error."""
+
+    class BrokenConnection(FlakyConnection):
+        def send_messages(self, messages: Any) -> int:
+            raise OSError("smtp down")
+
+    monkeypatch.setattr(
+        notifications,
+        "get_connection",
+        lambda fail_silently: BrokenConnection(),
+    )
+    assert dispatch_outbox() == 0
+    row = NotificationOutbox.objects.first()
+    assert row is not None
+    assert (row.sent_at, row.attempts, row.last_error) == (
+        None,
+        1,
+        "smtp down",
+    )
+
+
+@pytest.mark.django_db
+def test_partial_failure_never_resends(
+    flagged_loans: list, monkeypatch: Any
+) -> None:
+    """Emails sent before a failure should be marked sent at once, so
+    the next batch only retries the failed and unsent rows."""
+    failing = f"Loan {flagged_loans[1].pk} Flagged"
+    connection = FlakyConnection([failing])
+    monkeypatch.setattr(
+        notifications, "get_connection", lambda fail_silently: connection
+    )
+    assert dispatch_outbox() == 1
+    connection.failing.clear()
+    assert dispatch_outbox() == 2
+    subjects = [message.subject for message in mail.outbox]
+    assert subjects == [
+        f"Loan {loan.pk} Flagged" for loan in flagged_loans
+    ]
+
+
+@pytest.mark.django_db
+def test_failing_row_is_given_up(
+    flagged_loans: list, monkeypatch: Any
+) -> None:
+    """A row failing MAX_ATTEMPTS times should be dead-lettered so the
+    rows queued after it go out."""
+    failing = f"Loan {flagged_loans[0].pk} Flagged"
+    monkeypatch.setattr(
+        notifications,
+        "get_connection",
+        lambda fail_silently: FlakyConnection([failing]),
+    )
+    for _ in range(notifications.MAX_ATTEMPTS):
+        assert dispatch_outbox() == 0
+    head = NotificationOutbox.objects.get(loan=flagged_loans[0])
+    assert head.failed_at is not None
+    assert head.attempts == notifications.MAX_ATTEMPTS
+    assert dispatch_outbox() == 2
+    assert dispatch_outbox() == 0
+    assert len(mail.outbox) == 2
+
+
+@pytest.mark.django_db
+def test_claimed_rows_are_skipped_until_the_claim_expires(
+    flagged_loans: list, monkeypatch: Any
+) -> None:
+    """While one dispatcher sends, another finds nothing to claim; rows
+    claimed by a dispatcher that died are picked up later."""
+    nested: list = []
+
+    class ReentrantConnection(FlakyConnection):
+        def send_messages(self, messages: Any) -> int:
+            if not nested:
+                nested.append(dispatch_outbox())
+            return super().send_messages(messages)
+
+    monkeypatch.setattr(
+        notifications,
+        "get_connection",
+        lambda fail_silently: ReentrantConnection(),
+    )
+    assert dispatch_outbox() == 3
+    assert nested == [0]
+
+    stranded = NotificationOutbox.objects.filter(loan=flagged_loans[0])
+    stranded.update(sent_at=None, claimed_at=timezone.now())
+    assert dispatch_outbox() == 0
+    stranded.update(
+        claimed_at=timezone.now()
+        - datetime.timedelta(seconds=notifications.CLAIM_SECONDS + 1)
+    )
+    assert dispatch_outbox() == 1
+    assert len(mail.outbox) == 4
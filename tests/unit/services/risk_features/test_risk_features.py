@@ -0,0 +1,202 @@
+"""Module: Unit tests for the per-user fraud feature store and its
+write-path hooks."""
+
+import datetime
+from io import StringIO
+from typing import Any, Dict
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from fraud.engine import FraudEngine
+from fraud.features import load_features_many
+from fraud.models import UserRiskFeatures
+from fraud.risk_features import (FEATURE_FIELDS, _add_application,
+                                 apply_status_changes, decay,
+                                 prior_risk_features, rebuild_features,
+                                 record_application)
+from fraud.rules import FraudRule
+from fraud.services import run_fraud_checks_many
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+class RiskProbeRule(FraudRule):
+    """Reads the feature store and never flags."""
+
+    name = "risk_probe"
+    inputs = ("risk_features",)
+
+    def check(self, features: Any) -> bool:
+        return False
+
+
+def _stored(user_id: int) -> Dict[str, Any]:
+    return UserRiskFeatures.objects.values(*FEATURE_FIELDS).get(pk=user_id)
+
+
+@pytest.mark.django_db
+def test_hooks_track_the_loan_lifecycle(admin_client: APIClient) -> None:
+    """Registration, creation, admin decisions and withdrawal should keep
+    the row equal to a rebuild from the loans."""
+    client = APIClient()
+    response = client.post(
+        reverse("register"),
+        {"username": "life", "email": "Life@Store.IO", "password": "pw12345"},
+        format="json",
+    )
+    user = User.objects.get(pk=response.data["user"]["id"])
+    assert _stored(user.pk)["email_domain"] == "store.io"
+
+    client.force_authenticate(user)
+    ids = [
+        client.post(
+            reverse("loan-list-create"), {"amount": amount}, format="json"
+        ).data["id"]
+        for amount in (100, 2000000, 3000000)
+    ]
+    admin_client.post(reverse("loan-approve", args=[ids[1]]))
+    admin_client.post(reverse("loan-reject", args=[ids[2]]))
+    client.post(reverse("loan-withdraw", args=[ids[1]]))  # Not allowed
+    loan = LoanApplication.objects.create(user=user, amount=50)
+    record_application(loan)
+    admin_client.post(reverse("loan-flag", args=[loan.pk]), {"reason": "x"})
+    client.post(reverse("loan-withdraw", args=[loan.pk]))
+
+    stored = _stored(user.pk)
+    assert stored["approved_count"] == 2
+    assert stored["rejected_count"] == 1
+    assert stored["withdrawn_count"] == 1
+    assert stored["pending_count"] == stored["flagged_count"] == 0
+    assert stored["approved_exposure"] == 2000100
+    assert stored["application_rate"] == pytest.approx(4, rel=1e-3)
+
+    out = StringIO()
+    call_command("rebuild_features", stdout=out)
+    rebuilt = _stored(user.pk)
+    assert rebuilt.pop("application_rate") == pytest.approx(
+        stored.pop("application_rate")
+    )
+    assert rebuilt == stored
+    assert "Rebuilt risk features of 2 users" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_rebuild_repairs_rows_in_place() -> None:
+    """Each chunk should update drifted rows and create missing ones
+    without dropping the table."""
+    drifted = User.objects.create_user(username="rb1", email="a@one.io")
+    missing = User.objects.create_user(username="rb2", email="b@two.io")
+    LoanApplication.objects.create(user=drifted, amount=100)
+    LoanApplication.objects.create(user=missing, amount=200)
+    UserRiskFeatures.objects.update_or_create(
+        pk=drifted.pk, defaults={"pending_count": 7}
+    )
+    UserRiskFeatures.objects.filter(pk=missing.pk).delete()
+
+    assert rebuild_features(chunk_size=1) == 2
+
+    assert _stored(drifted.pk)["pending_count"] == 1
+    assert _stored(missing.pk)["pending_count"] == 1
+    assert _stored(missing.pk)["email_domain"] == "two.io"
+
+
+def test_rate_halves_every_half_life() -> None:
+    """Each application should weigh half as much a day later."""
+    now = timezone.now()
+    day = datetime.timedelta(days=1)
+    row = UserRiskFeatures()
+    _add_application(row, now - day)
+    _add_application(row, now)
+    assert row.application_rate == pytest.approx(1.5)
+    _add_application(row, now - 2 * day)  # Out of order
+    assert row.application_rate == pytest.approx(1.75)
+    assert row.last_applied_at == now
+    assert decay(1.75, now, now + 2 * day) == pytest.approx(0.4375)
+    assert decay(1.0, None, now) == 1.0
+
+
+@pytest.mark.django_db
+def test_status_changes_apply_in_one_update(
+    django_assert_num_queries: Any,
+) -> None:
+    """Changes for many users should be one UPDATE that never drives a
+    count or the exposure below zero."""
+    first = User.objects.create_user(username="sc1")
+    second = User.objects.create_user(username="sc2")
+    UserRiskFeatures.objects.create(user=first, pending_count=2)
+    UserRiskFeatures.objects.create(user=second)  # Missed its writes
+
+    with django_assert_num_queries(1):
+        apply_status_changes(
+            [
+                (first.pk, 100, "PENDING", "APPROVED"),
+                (first.pk, 300, "PENDING", "FLAGGED"),
+                (second.pk, 500, "APPROVED", "REJECTED"),
+                (second.pk, 500, "PENDING", "PENDING"),
+            ]
+        )
+    with django_assert_num_queries(0):
+        apply_status_changes([(first.pk, 1, "FLAGGED", "FLAGGED")])
+
+    one, two = _stored(first.pk), _stored(second.pk)
+    assert (one["pending_count"], one["approved_count"]) == (0, 1)
+    assert (one["flagged_count"], one["approved_exposure"]) == (1, 100)
+    assert (two["approved_count"], two["rejected_count"]) == (0, 1)
+    assert two["approved_exposure"] == 0
+
+
+def test_prior_features_exclude_the_evaluated_loan() -> None:
+    """The evaluated loan's status and exposure should not count."""
+    now = timezone.now()
+    row: Dict[str, Any] = {field: 0 for field in FEATURE_FIELDS}
+    row.update(
+        approved_count=3,
+        approved_exposure=900,
+        last_applied_at=now - datetime.timedelta(days=1),
+        application_rate=2.0,
+        email_domain="x.io",
+    )
+    prior = prior_risk_features(row, "APPROVED", 400, now)
+    assert prior["approved_count"] == 2
+    assert prior["approved_exposure"] == 500.0
+    assert prior["application_rate"] == pytest.approx(1.0)
+    assert prior_risk_features(None, "PENDING", 1)["pending_count"] == 0
+    # A loan the row never counted leaves it at zero
+    assert prior_risk_features(row, "PENDING", 1, now)["pending_count"] == 0
+
+
+@pytest.mark.django_db
+def test_loaders_agree_and_batch_checks_move_counts() -> None:
+    """Prefetched, per-loan and batch loaders should read the same row;
+    batch status changes should move the counts."""
+    user = User.objects.create_user(username="ld", email="ld@ld.io")
+    loans = []
+    for amount in (100, 200):
+        loan = LoanApplication.objects.create(user=user, amount=amount)
+        record_application(loan)
+        loans.append(loan)
+
+    features = [
+        FraudEngine([RiskProbeRule()], prefetch=prefetch)
+        .evaluate(loans[0])
+        .features["risk_features"]
+        for prefetch in (True, False)
+    ]
+    batch = load_features_many(loans, ["risk_features"])
+    assert features[0]["pending_count"] == 1
+    for other in (features[1], batch[loans[0].pk]["risk_features"]):
+        assert other.pop("application_rate") == pytest.approx(
+            features[0]["application_rate"], rel=1e-3
+        )
+    features[0].pop("application_rate")
+    assert features[0] == features[1] == batch[loans[0].pk]["risk_features"]
+
+    run_fraud_checks_many(loans)
+    assert _stored(user.pk)["approved_count"] == 2
+    assert _stored(user.pk)["approved_exposure"] == 300
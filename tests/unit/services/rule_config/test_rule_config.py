@@ -0,0 +1,130 @@
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from fraud.config import CONFIG_VERSION_KEY, config_version
+from fraud.models import FraudRuleConfig
+from fraud.services import get_engine, run_fraud_checks
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+def _save(callbacks: Any, **fields: Any) -> FraudRuleConfig:
+    """Save a config row and run its on-commit version bump."""
+    with callbacks(execute=True):
+        return FraudRuleConfig.objects.create(**fields)
+
+
+@pytest.mark.django_db
+def test_engine_cached_until_version_changes(
+    django_assert_num_queries: Any,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    engine = get_engine()
+    # Steady state: one cache read, no query
+    with django_assert_num_queries(0):
+        assert get_engine() is engine
+
+    _save(
+        django_capture_on_commit_callbacks,
+        rule="amount_threshold",
+        thresholds={"max_amount": 100},
+    )
+
+    reloaded = get_engine()
+    assert reloaded is not engine
+    rule = next(r for r in reloaded.rules if r.name == "amount_threshold")
+    assert rule.params["max_amount"] == 100
+
+
+@pytest.mark.django_db
+def test_uncommitted_change_does_not_bump(
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    version = config_version()
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        FraudRuleConfig.objects.create(rule="recent_loans")
+    assert config_version() == version
+    assert len(callbacks) == 1
+
+
+@pytest.mark.django_db
+def test_disabled_rules_and_review_cutoff_apply(
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    _save(django_capture_on_commit_callbacks, rule="amount_threshold",
+          enabled=False)
+    _save(django_capture_on_commit_callbacks, rule="review",
+          thresholds={"amount": 10000000})
+    user = User.objects.create_user(username="cfg", password="pw")
+    loan = LoanApplication.objects.create(user=user, amount=6000000)
+
+    assert "amount_threshold" not in [r.name for r in get_engine().rules]
+    assert get_engine().review_amount == 10000000
+    assert run_fraud_checks(loan) == []
+    assert loan.status == "APPROVED"
+
+
+@pytest.mark.django_db
+def test_database_overrides_settings(
+    settings: Any, django_capture_on_commit_callbacks: Any
+) -> None:
+    settings.FRAUD_RULE_THRESHOLDS = {
+        "velocity_windows": {"max_loans_1h": 1, "max_loans_7d": 5}
+    }
+    _save(django_capture_on_commit_callbacks, rule="velocity_windows",
+          thresholds={"max_loans_1h": 2})
+
+    rule = next(r for r in get_engine().rules if r.name == "velocity_windows")
+
+    assert rule.params["max_loans_1h"] == 2
+    assert rule.params["max_loans_7d"] == 5
+
+
+@pytest.mark.django_db
+def test_invalid_rows_are_rejected_and_ignored() -> None:
+    with pytest.raises(ValidationError):
+        FraudRuleConfig(rule="nope").full_clean()
+    with pytest.raises(ValidationError):
+        FraudRuleConfig(rule="recent_loans", thresholds={"x": 1}).full_clean()
+    with pytest.raises(ValidationError):
+        FraudRuleConfig(rule="review", thresholds={"x": 1}).full_clean()
+    with pytest.raises(ValidationError):
+        FraudRuleConfig(rule="review", thresholds=[1]).full_clean()
+    FraudRuleConfig(rule="review", thresholds={"amount": 5}).full_clean()
+    for rule, thresholds in [
+        ("recent_loans", {"max_loans": "5"}),
+        ("recent_loans", {"max_loans": 2.5}),
+        ("recent_loans", {"max_loans": True}),
+        ("review", {"amount": "5"}),
+    ]:
+        with pytest.raises(ValidationError, match="must be int"):
+            FraudRuleConfig(rule=rule, thresholds=thresholds).full_clean()
+    FraudRuleConfig(
+        rule="amount_zscore", thresholds={"max_zscore": 4}
+    ).full_clean()
+
+    # Bypassing validation must not break evaluation
+    FraudRuleConfig.objects.create(rule="recent_loans", thresholds={"x": 1})
+    FraudRuleConfig.objects.create(
+        rule="amount_threshold", thresholds={"max_amount": "5"}
+    )
+    FraudRuleConfig.objects.create(rule="review", thresholds={"amount": "1"})
+    cache.delete(CONFIG_VERSION_KEY)
+    engine = get_engine()
+    assert "recent_loans" in [r.name for r in engine.rules]
+    amount_rule = next(
+        r for r in engine.rules if r.name == "amount_threshold"
+    )
+    assert amount_rule.params["max_amount"] == 5000000
+    assert engine.review_amount == 1000000
+    user = User.objects.create_user(username="typo", password="pw")
+    loan = LoanApplication.objects.create(user=user, amount=100)
+    assert run_fraud_checks(loan) == []
+    assert str(FraudRuleConfig.objects.first()) == (
+        "amount_threshold (enabled)"
+    )
@@ -29,7 +29,7 @@ def test_run_fraud_checks_flags_many_users_same_domain() -> None:
     reasons = run_fraud_checks(loan)
     assert "Email domain used by more than 10 users" in reasons
     flags = FraudFlag.objects.filter(
-        loan=loan, reason="Email domain used by more than 10 users"
+        loan=loan, reason__text="Email domain used by more than 10 users"
     )
     assert flags.exists()
     loan.refresh_from_db()
@@ -0,0 +1,150 @@
+"""Module: Unit tests for diff-based FraudFlag reconciliation."""
+
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+
+from fraud.models import FraudFlag, FraudReason
+from fraud.reasons import (MANUAL_REASON, REASON_CODES_CACHE_KEY, reason_code,
+                           reason_codes)
+from fraud.services import reconcile_flags, run_fraud_checks
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+@pytest.fixture
+def loan(db: Any) -> LoanApplication:
+    user = User.objects.create_user(
+        username="recon", email="recon@example.com", password="pw"
+    )
+    return LoanApplication.objects.create(user=user, amount=6000000)
+
+
+@pytest.mark.django_db
+def test_reevaluation_keeps_unchanged_flags(loan: LoanApplication) -> None:
+    """Re-running checks should not recreate an unchanged flag."""
+    run_fraud_checks(loan)
+    first = FraudFlag.objects.get(loan=loan)
+    with CaptureQueriesContext(connection) as ctx:
+        reconcile_flags({loan.id: ["Amount exceeds threshold"]})
+    assert len(ctx.captured_queries) == 1
+    run_fraud_checks(loan)
+    again = FraudFlag.objects.get(loan=loan)
+    assert (again.pk, again.flagged_at) == (first.pk, first.flagged_at)
+
+
+@pytest.mark.django_db
+def test_reconcile_applies_diff(loan: LoanApplication) -> None:
+    """Stale engine reasons are deleted and new ones inserted; flags
+    the engine never produces are kept."""
+    keep, stale, new = (
+        "Amount exceeds threshold",
+        "More than 3 loans in 24 hours",
+        "Email domain used by more than 10 users",
+    )
+    kept = FraudFlag.objects.create(loan=loan, reason_id=reason_code(keep))
+    FraudFlag.objects.create(loan=loan, reason_id=reason_code(stale))
+    FraudFlag.objects.create(loan=loan, reason_id=reason_code(MANUAL_REASON))
+    assert reconcile_flags({loan.id: [keep, new, new]}) == {
+        loan.id: [MANUAL_REASON]
+    }
+    reasons = set(
+        FraudFlag.objects.filter(loan=loan).values_list(
+            "reason__text", flat=True
+        )
+    )
+    assert reasons == {keep, new, MANUAL_REASON}
+    assert FraudFlag.objects.filter(pk=kept.pk).exists()
+    reconcile_flags({loan.id: []})
+    assert list(
+        FraudFlag.objects.filter(loan=loan).values_list(
+            "reason__text", flat=True
+        )
+    ) == [MANUAL_REASON]
+
+
+@pytest.mark.django_db
+def test_unique_loan_reason_constraint(loan: LoanApplication) -> None:
+    """The database should reject duplicate (loan, reason) flags."""
+    FraudFlag.objects.create(loan=loan, reason_id=reason_code("dup"))
+    with pytest.raises(IntegrityError):
+        FraudFlag.objects.create(loan=loan, reason_id=reason_code("dup"))
+
+
+@pytest.mark.django_db
+def test_reason_codes_are_cached_after_commit(
+    django_capture_on_commit_callbacks: Any,
+    django_assert_num_queries: Any,
+) -> None:
+    """New reasons get one row each; committed codes cost no query."""
+    with django_capture_on_commit_callbacks(execute=False):
+        first = reason_codes(["a", "b", "a"])
+    assert cache.get(REASON_CODES_CACHE_KEY) is None  # Not committed
+    assert FraudReason.objects.count() == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert reason_codes(["b", "a"]) == first
+    with django_assert_num_queries(0):
+        assert reason_code("a") == first["a"]
+    assert str(FraudReason.objects.get(pk=first["a"])) == f"{first['a']}: a"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_converts_texts_to_codes() -> None:
+    """Engine reason texts should become shared codes and free-text
+    admin reasons the manual reason with the text as detail, one flag
+    per loan; reversing restores the texts."""
+    executor = MigrationExecutor(connection)
+    # Loans keep their latest schema; only the fraud app moves
+    loan_leaf = executor.loader.graph.leaf_nodes("loan")
+    before = [("fraud", "0011_fraudreason"), *loan_leaf]
+    after = [("fraud", "0013_fraudflag_reason_fk"), *loan_leaf]
+    executor.migrate(before)
+    apps = executor.loader.project_state(before).apps
+    user = apps.get_model(settings.AUTH_USER_MODEL).objects.create(
+        username="mig"
+    )
+    loans = apps.get_model("loan", "LoanApplication").objects
+    Flag = apps.get_model("fraud", "FraudFlag")
+    ids = []
+    for amount in (1, 2):
+        loan = loans.create(user=user, amount=amount)
+        ids.append(loan.pk)
+        Flag.objects.create(loan=loan, reason="Amount exceeds threshold")
+        Flag.objects.create(loan=loan, reason=f"manual {amount}")
+    Flag.objects.create(loan_id=ids[0], reason="called the applicant")
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(after)
+    codes = dict(FraudReason.objects.values_list("text", "id"))
+    assert codes.keys() == {"Amount exceeds threshold", MANUAL_REASON}
+    rows = FraudFlag.objects.values_list("loan_id", "reason_id", "detail")
+    assert set(rows) == {
+        (ids[0], codes["Amount exceeds threshold"], ""),
+        (ids[0], codes[MANUAL_REASON], "manual 1; called the applicant"),
+        (ids[1], codes["Amount exceeds threshold"], ""),
+        (ids[1], codes[MANUAL_REASON], "manual 2"),
+    }
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(before)
+    apps = executor.loader.project_state(before).apps
+    texts = apps.get_model("fraud", "FraudFlag").objects.values_list(
+        "reason", flat=True
+    )
+    assert sorted(texts) == [
+        "Amount exceeds threshold",
+        "Amount exceeds threshold",
+        "manual 1; called the applicant",
+        "manual 2",
+    ]
+    MigrationExecutor(connection).migrate(
+        MigrationExecutor(connection).loader.graph.leaf_nodes()
+    )
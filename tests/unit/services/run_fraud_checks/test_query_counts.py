@@ -0,0 +1,119 @@
+"""Exact query budgets of run_fraud_checks per outcome.
+
+Every database-backed feature comes from one annotated query, issued
+only when a rule needs it. The cache-backed features are not part of
+it: the applicant's first evaluation seeds the velocity counter with
+one query, and a domain count missing from the cache costs one
+primary-key lookup. The writes happen inside one atomic block,
+which shows up as a SAVEPOINT/RELEASE pair within the test transaction.
+A status change also moves the loan between the applicant's
+UserRiskFeatures counts, with one UPDATE, and every evaluation inserts
+its FraudDecisionRecord.
+The engine's rule configuration is loaded once per config version, not
+per request, and reason codes and stored engine configurations are
+cached once committed, so all three are warmed up before counting.
+"""
+
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from fraud.decisions import store_engine_config
+from fraud.reasons import reason_codes
+from fraud.services import get_engine, run_fraud_checks
+from fraud.velocity import record_loan
+from loan.models import LoanApplication
+from users.models import DomainUserCount
+
+User: Any = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def warm_engine(db: Any, django_capture_on_commit_callbacks: Any) -> None:
+    """Load the rule configuration, store it and the flag reason codes
+    outside the counted blocks."""
+    with django_capture_on_commit_callbacks(execute=True):
+        store_engine_config(get_engine())
+        reason_codes(
+            [
+                "Amount exceeds threshold",
+                "Email domain used by more than 10 users",
+            ]
+        )
+
+
+def _fresh_loan(amount: int, email: str = "qc@example.com") -> Any:
+    """A loan loaded without its user, as workers and rescoring see it."""
+    user = User.objects.create_user(username="qc", email=email, password="pw")
+    loan = LoanApplication.objects.create(user=user, amount=amount)
+    return LoanApplication.objects.get(pk=loan.pk)
+
+
+@pytest.mark.django_db
+def test_approved_loan_queries(django_assert_num_queries: Any) -> None:
+    loan = _fresh_loan(100)
+    # domain count, counter seed, features, savepoint, existing flags,
+    # status update, risk feature counts, decision record, release
+    with django_assert_num_queries(9):
+        assert run_fraud_checks(loan) == []
+    assert loan.status == "APPROVED"
+
+
+@pytest.mark.django_db
+def test_pending_loan_queries(django_assert_num_queries: Any) -> None:
+    loan = _fresh_loan(2000000)
+    # domain count, counter seed, features, savepoint, existing flags,
+    # decision record, release; status unchanged
+    with django_assert_num_queries(7):
+        assert run_fraud_checks(loan) == []
+    assert loan.status == "PENDING"
+
+
+@pytest.mark.django_db
+def test_amount_flag_needs_no_feature_query(
+    django_assert_num_queries: Any,
+) -> None:
+    loan = _fresh_loan(6000000)
+    # savepoint, existing flags, flag insert, status update, outbox
+    # insert, risk feature counts, decision record, release
+    with django_assert_num_queries(8):
+        assert run_fraud_checks(loan) == ["Amount exceeds threshold"]
+    assert loan.status == "FLAGGED"
+
+
+@pytest.mark.django_db
+def test_domain_flag_queries(django_assert_num_queries: Any) -> None:
+    loan = _fresh_loan(100, email="qc@crowded.test")
+    DomainUserCount.objects.filter(pk="crowded.test").update(user_count=50)
+    # Feature query for the email, domain count, counter seed, then the
+    # FLAGGED writes
+    with django_assert_num_queries(11):
+        reasons = run_fraud_checks(loan)
+    assert reasons == ["Email domain used by more than 10 users"]
+
+
+@pytest.mark.django_db
+def test_feature_query_joins_email(django_assert_num_queries: Any) -> None:
+    """The applicant's email arrives in the feature query, never through
+    a separate user fetch."""
+    loan = _fresh_loan(100)
+    with django_assert_num_queries(9) as captured:
+        run_fraud_checks(loan)
+    feature_sql = captured.captured_queries[0]["sql"]
+    assert '"auth_user"."email"' in feature_sql
+    assert "users_domainusercount" not in feature_sql
+    assert feature_sql.count("SELECT") > 4
+
+
+@pytest.mark.django_db
+def test_warm_caches_cost_no_query(django_assert_num_queries: Any) -> None:
+    """Once the counter and the domain count are cached, an approval
+    costs the feature query and the writes only."""
+    loan = _fresh_loan(100)
+    run_fraud_checks(loan)
+    second = LoanApplication.objects.create(user_id=loan.user_id, amount=50)
+    record_loan(second)  # As the create endpoint does
+    second = LoanApplication.objects.get(pk=second.pk)
+    with django_assert_num_queries(7):
+        assert run_fraud_checks(second) == []
@@ -28,7 +28,7 @@ def test_run_fraud_checks_flags_many_loans_after_cache_clear() -> None:
     reasons = run_fraud_checks(last_loan)
     assert "More than 3 loans in 24 hours" in reasons
     flags = FraudFlag.objects.filter(
-        loan=last_loan, reason="More than 3 loans in 24 hours"
+        loan=last_loan, reason__text="More than 3 loans in 24 hours"
     )
     assert flags.exists()
     last_loan.refresh_from_db()
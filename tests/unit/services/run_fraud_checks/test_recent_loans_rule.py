@@ -30,7 +30,7 @@ def test_run_fraud_checks_flags_many_recent_loans() -> None:
     assert "More than 3 loans in 24 hours" in reasons4
     flags = FraudFlag.objects.filter(
         loan=loan4,
-        reason="More than 3 loans in 24 hours"
+        reason__text="More than 3 loans in 24 hours"
     )
     assert flags.exists()
     loan4.refresh_from_db()
@@ -3,7 +3,7 @@ Module: Additional unit tests for fraud services,
 run_fraud_checks branch coverage.
 """
 
-from typing import Optional, cast
+from typing import Any, Optional, cast
 
 import pytest
 from django.contrib.auth import get_user_model
@@ -32,8 +32,9 @@ def test_auto_approve_small_amount() -> None:
 
 
 @pytest.mark.django_db
-def test_recent_loans_no_flag_for_few_loans() -> None:
+def test_recent_loans_no_flag_for_few_loans(settings: Any) -> None:
     """run_fraud_checks should not flag when user has <=3 loans in 24 hours."""
+    settings.FRAUD_RULE_THRESHOLDS = {"velocity_windows": {"max_loans_1h": 3}}
     cache.clear()
     user = User.objects.create_user(
         username="user_recent", email="recent@example.com", password="pw"
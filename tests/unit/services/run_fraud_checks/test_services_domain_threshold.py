@@ -52,5 +52,5 @@ def test_domain_threshold_flags_on_eleventh_user() -> None:
     assert loan11.status == "FLAGGED"
     # FraudFlag record must exist
     assert FraudFlag.objects.filter(
-        loan=loan11, reason="Email domain used by more than 10 users"
+        loan=loan11, reason__text="Email domain used by more than 10 users"
     ).exists()
@@ -19,10 +19,9 @@ def test_run_fraud_checks_flags_high_amount() -> None:
     reasons = run_fraud_checks(loan)
     assert reasons == ["Amount exceeds threshold"]
     flags = FraudFlag.objects.filter(loan=loan)
-    assert flags.count() == 1
-    flag = flags.first()
-    assert flag is not None
-    assert flag.reason == "Amount exceeds threshold"
+    assert list(flags.values_list("reason__text", flat=True)) == [
+        "Amount exceeds threshold"
+    ]
 
 
 @pytest.mark.django_db
@@ -0,0 +1,85 @@
+"""Module: Unit tests for batch fraud evaluation (run_fraud_checks_many)."""
+
+from typing import Any, List
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from fraud.decisions import store_engine_config
+from fraud.models import FraudFlag, NotificationOutbox
+from fraud.services import get_engine, run_fraud_checks_many
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+def _make_loans(prefix: str, count: int) -> List[LoanApplication]:
+    """Create ``count`` users on distinct domains with one small loan
+    each."""
+    loans: List[LoanApplication] = []
+    for i in range(count):
+        user = User.objects.create_user(
+            username=f"{prefix}{i}",
+            email=f"{prefix}{i}@{prefix}{i}.com",
+            password="pw",
+        )
+        loans.append(LoanApplication.objects.create(user=user, amount=1000))
+    return loans
+
+
+@pytest.mark.django_db
+def test_batch_outcomes_match_single_rules() -> None:
+    """Batch evaluation should flag, approve and keep pending like the
+    per-loan path."""
+    user = User.objects.create_user(
+        username="batcher", email="batch@example.com", password="pw"
+    )
+    busy = [
+        LoanApplication.objects.create(user=user, amount=1000)
+        for _ in range(4)
+    ]
+    big = LoanApplication.objects.create(user=user, amount=6000000)
+    other = User.objects.create_user(
+        username="calm", email="calm@calm.com", password="pw"
+    )
+    small = LoanApplication.objects.create(user=other, amount=500)
+    review = LoanApplication.objects.create(user=other, amount=2000000)
+
+    results = run_fraud_checks_many([busy[-1], big, small, review])
+
+    assert results[busy[-1].pk] == ["More than 3 loans in 24 hours"]
+    assert results[big.pk] == ["Amount exceeds threshold"]
+    assert results[small.pk] == []
+    assert results[review.pk] == []
+    statuses = dict(LoanApplication.objects.values_list("pk", "status"))
+    assert statuses[busy[-1].pk] == "FLAGGED"
+    assert statuses[big.pk] == "FLAGGED"
+    assert statuses[small.pk] == "APPROVED"
+    assert statuses[review.pk] == "PENDING"
+    assert FraudFlag.objects.filter(loan=big).count() == 1
+    assert NotificationOutbox.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_batch_round_trips_do_not_grow_with_loans(
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    """Query count should be the same for 2 and 6 loans."""
+    # Rule config loads and is stored once per version, not per batch
+    with django_capture_on_commit_callbacks(execute=True):
+        store_engine_config(get_engine())
+    counts: List[int] = []
+    for prefix, size in (("small", 2), ("large", 6)):
+        loans: Any = _make_loans(prefix, size)
+        with CaptureQueriesContext(connection) as ctx:
+            run_fraud_checks_many(loans)
+        counts.append(len(ctx.captured_queries))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_batch_empty_input() -> None:
+    """An empty batch should do nothing."""
+    assert run_fraud_checks_many([]) == {}
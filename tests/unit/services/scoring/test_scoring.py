@@ -0,0 +1,160 @@
+"""Module: Unit tests for the fraud scoring model and its rule."""
+
+import math
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+
+from fraud import scoring
+from fraud.engine import FraudEngine
+from fraud.risk_features import empty_risk_features
+from fraud.rules import ModelScoreRule
+from fraud.scoring import (VECTOR_FIELDS, fit_logistic, get_weights,
+                           save_weights, score, score_many, vectorize)
+from fraud.services import run_fraud_checks, run_fraud_checks_many
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+# Scores 0.5 at an amount of e**10 (about 22,000) and rises with amount
+AMOUNT_MODEL = np.array([-20.0, 2.0, *[0] * (len(VECTOR_FIELDS) - 1)])
+
+
+def _features(amount: float = 1000, **overrides: Any) -> Dict[str, Any]:
+    features: Dict[str, Any] = {
+        "amount": amount,
+        "amount_stats": {"count": 4, "mean": 500.0, "std": 100.0},
+        "domain_user_count": 3,
+        "cluster": {"size": 2, "loan_count": 5, "loan_amount": 4000},
+        "blocked_domain": False,
+        "risk_features": {
+            **empty_risk_features(),
+            "rejected_count": 1,
+            "approved_exposure": 2000.0,
+        },
+    }
+    features.update(overrides)
+    return features
+
+
+@pytest.fixture
+def model(tmp_path: Any, settings: Any) -> str:
+    """Deploy ``AMOUNT_MODEL`` at a temporary FRAUD_MODEL_PATH."""
+    path = str(tmp_path / "model.npy")
+    settings.FRAUD_MODEL_PATH = path
+    save_weights(AMOUNT_MODEL, path)
+    return path
+
+
+def test_vectorize_orders_fields() -> None:
+    """Each entry should follow VECTOR_FIELDS, with the z-score clipped."""
+    vector = vectorize(_features())
+    assert len(vector) == len(VECTOR_FIELDS)
+    assert vector == pytest.approx(
+        [
+            math.log1p(1000),
+            5.0,
+            math.log1p(4),
+            math.log1p(3),
+            math.log1p(1),
+            math.log1p(5),
+            0.0,
+            math.log1p(1),
+            0.0,
+            math.log1p(2000),
+        ]
+    )
+    assert vectorize(_features(amount=10**6))[1] == scoring.ZSCORE_CLIP
+    short = {"count": 1, "mean": 500.0, "std": 0.0}
+    assert vectorize(_features(amount_stats=short))[1] == 0.0
+
+
+def test_weights_are_memory_mapped_and_reloaded(
+    model: str, tmp_path: Any, settings: Any, monkeypatch: Any
+) -> None:
+    """Weights should be mapped once and re-mapped when replaced; a
+    changed path is read at once."""
+    weights = get_weights()
+    assert isinstance(weights, np.memmap)
+    assert get_weights() is weights
+
+    save_weights(AMOUNT_MODEL * 2, model)
+    # Not stat'ed again until STAT_INTERVAL has passed
+    assert get_weights() is weights
+    monkeypatch.setattr(scoring, "STAT_INTERVAL", 0.0)
+    reloaded = get_weights()
+    assert reloaded is not None
+    assert reloaded[0] == -40.0
+
+    settings.FRAUD_MODEL_PATH = str(tmp_path / "missing.npy")
+    assert get_weights() is None
+    assert score(_features()) is None
+    assert score_many([_features()]) is None
+
+    np.save(tmp_path / "short.npy", np.zeros(3))
+    settings.FRAUD_MODEL_PATH = str(tmp_path / "short.npy")
+    assert get_weights() is None
+    (tmp_path / "broken.npy").write_bytes(b"not numpy")
+    settings.FRAUD_MODEL_PATH = str(tmp_path / "broken.npy")
+    assert get_weights() is None
+
+
+def test_batch_matches_single(model: str) -> None:
+    """One matrix multiply should score a batch exactly as one-by-one
+    calls do."""
+    rows = [_features(amount=100 * i + 1) for i in range(1000)]
+    scores = score_many(rows)
+    singles = [score(row) for row in rows]
+
+    assert scores is not None
+    assert scores == pytest.approx(singles)
+    assert scores[0] < 0.01 and scores[-1] > 0.9
+
+
+def test_fit_logistic_separates_classes() -> None:
+    """Weights fitted on raw vectors should rank fraud above the rest."""
+    rng = np.random.default_rng(7)
+    good = rng.normal(7, 0.5, (200, len(VECTOR_FIELDS)))
+    bad = rng.normal(9, 0.5, (200, len(VECTOR_FIELDS)))
+    bad[:, -1] = good[:, -1] = 0  # A constant column must not break it
+    matrix = np.vstack([good, bad])
+    labels = np.repeat([0.0, 1.0], 200)
+
+    weights = fit_logistic(matrix, labels)
+
+    predicted = scoring.score_matrix(weights, matrix) > 0.5
+    assert np.mean(predicted == labels.astype(bool)) > 0.95
+    assert weights[-1] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_rule_flags_high_scores(model: str, prefetch: bool) -> None:
+    """The rule should flag scores above the threshold and ignore loans
+    while no model is deployed."""
+    user = User.objects.create_user(username=f"m{prefetch}", password="pw")
+    engine = FraudEngine([ModelScoreRule()], prefetch=prefetch)
+    small = LoanApplication.objects.create(user=user, amount=1000)
+    large = LoanApplication.objects.create(user=user, amount=1000000)
+
+    assert engine.evaluate(small).reasons == []
+    decision = engine.evaluate(large)
+    assert decision.reasons == [ModelScoreRule().reason_text]
+    assert decision.features["fraud_score"] > 0.9
+    assert not ModelScoreRule().check({"fraud_score": None})
+
+
+@pytest.mark.django_db
+def test_scores_are_persisted(model: str, user: Any) -> None:
+    """Single and batch checks should store the score on the loan."""
+    loan = LoanApplication.objects.create(user=user, amount=1000)
+    run_fraud_checks(loan)
+    loan.refresh_from_db()
+    assert loan.fraud_score == pytest.approx(score(_features()), rel=0.1)
+
+    other = LoanApplication.objects.create(user=user, amount=30000)
+    run_fraud_checks_many([loan, other])
+    other.refresh_from_db()
+    assert 0.5 < other.fraud_score < 0.9
@@ -0,0 +1,180 @@
+import queue
+from typing import Any
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import fraud.shadow as shadow
+from fraud.config import current_engine, current_shadow_engine
+from fraud.jobs import enqueue_fraud_check, process_jobs
+from fraud.models import FraudRuleConfig, ShadowRuleResult
+from fraud.shadow import compare_shadow_rules, run_shadow
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.fixture
+def no_default_shadow(
+    db: Any, django_capture_on_commit_callbacks: Any
+) -> None:
+    """Disable the rules that ship in shadow mode."""
+    with django_capture_on_commit_callbacks(execute=True):
+        for rule in ("account_cluster", "purpose_ring"):
+            FraudRuleConfig.objects.create(rule=rule, enabled=False)
+
+
+@pytest.fixture
+def shadow_amount(
+    no_default_shadow: None, django_capture_on_commit_callbacks: Any
+) -> None:
+    """Trial a stricter amount rule as the only shadow rule."""
+    with django_capture_on_commit_callbacks(execute=True):
+        FraudRuleConfig.objects.create(
+            rule="amount_threshold",
+            shadow=True,
+            thresholds={"max_amount": 1000},
+        )
+
+
+def test_no_shadow_engine_without_shadow_rules(
+    no_default_shadow: None,
+) -> None:
+    assert current_shadow_engine() is None
+    assert run_shadow([1]) == 0
+    shadow.submit([1])
+    assert shadow._queue.empty()
+
+
+def test_shadow_rules_leave_live_engine(shadow_amount: None) -> None:
+    assert "amount_threshold" not in [r.name for r in current_engine().rules]
+    shadow_engine = current_shadow_engine()
+    assert shadow_engine is not None
+    assert [r.name for r in shadow_engine.rules] == ["amount_threshold"]
+
+
+def test_run_shadow_records_and_compares(shadow_amount: None) -> None:
+    user = User.objects.create_user(
+        username="sh", email="sh@example.com", password="pw"
+    )
+    loans = [
+        LoanApplication.objects.create(user=user, amount=amount,
+                                       status=status)
+        for amount, status in [
+            (5000, "APPROVED"),
+            (5000, "FLAGGED"),
+            (10, "FLAGGED"),
+            (10, "APPROVED"),
+        ]
+    ]
+
+    assert run_shadow(loan.pk for loan in loans) == 4
+    assert run_shadow([]) == 0
+
+    results = {r.loan_id: r for r in ShadowRuleResult.objects.all()}
+    assert results[loans[0].pk].flagged is True
+    assert results[loans[0].pk].live_status == "APPROVED"
+    assert str(results[loans[3].pk]) == (
+        f"amount_threshold on loan {loans[3].pk}: pass"
+    )
+    (report,) = compare_shadow_rules()
+    assert report == {
+        "rule": "amount_threshold",
+        "evaluations": 4,
+        "shadow_flagged": 2,
+        "live_flagged": 2,
+        "both_flagged": 1,
+        "shadow_only": 1,
+        "live_only": 1,
+        "agreement": 0.5,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_create_view_hands_off_to_background_thread(
+    auth_client: APIClient,
+) -> None:
+    """Loan creation returns its live decision; the shadow result is
+    written by the background thread."""
+    for rule in ("account_cluster", "purpose_ring"):
+        FraudRuleConfig.objects.create(rule=rule, enabled=False)
+    FraudRuleConfig.objects.create(
+        rule="amount_threshold", shadow=True, thresholds={"max_amount": 1}
+    )
+    url = reverse("loan-list-create")
+
+    resp = auth_client.post(url, {"amount": "100.00"}, format="json")
+
+    assert resp.status_code == 201
+    assert resp.data["status"] == "APPROVED"
+    assert shadow.wait(timeout=10)
+    result = ShadowRuleResult.objects.get(loan_id=resp.data["id"])
+    assert result.flagged is True
+    assert result.live_status == "APPROVED"
+
+
+def test_submit_never_blocks_when_full(
+    shadow_amount: None, monkeypatch: Any, caplog: Any
+) -> None:
+    monkeypatch.setattr(shadow, "_queue", queue.Queue(maxsize=1))
+    monkeypatch.setattr(shadow, "_ensure_thread", lambda: None)
+
+    shadow.submit([1, 2])
+
+    assert shadow._queue.qsize() == 1
+    assert "Shadow queue full; skipping loan id=2" in caplog.text
+
+
+def test_drain_survives_failures(
+    shadow_amount: None, monkeypatch: Any
+) -> None:
+    """A failing batch is logged and the thread keeps going."""
+    calls = []
+
+    def flaky(loan_ids: Any) -> int:
+        calls.append(list(loan_ids))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        raise SystemExit  # Stop the loop after the second batch
+
+    monkeypatch.setattr(shadow, "_queue", queue.Queue())
+    monkeypatch.setattr(shadow, "run_shadow", flaky)
+    for loan_id in (1, 2):
+        shadow._queue.put(loan_id)
+    monkeypatch.setattr(shadow, "BATCH_SIZE", 1)
+
+    with pytest.raises(SystemExit):
+        shadow._drain()
+
+    assert calls == [[1], [2]]
+    assert shadow._queue.unfinished_tasks == 0
+    assert shadow.wait(timeout=1)
+
+
+def test_worker_runs_shadow_inline(shadow_amount: None, monkeypatch) -> None:
+    user = User.objects.create_user(username="shw", password="pw")
+    loan = LoanApplication.objects.create(user=user, amount=5000)
+    enqueue_fraud_check(loan)
+
+    assert process_jobs() == 1
+
+    assert ShadowRuleResult.objects.get(loan=loan).flagged is True
+    # Shadow failures never fail the job
+    monkeypatch.setattr(
+        "fraud.jobs.run_shadow", lambda ids: 1 / 0
+    )
+    other = LoanApplication.objects.create(user=user, amount=10)
+    enqueue_fraud_check(other)
+    assert process_jobs() == 1
+    assert other.fraud_jobs.get().status == "DONE"
+
+
+def test_comparison_endpoint_is_admin_only(
+    shadow_amount: None, admin_client: APIClient
+) -> None:
+    url = reverse("fraud-shadow")
+    assert admin_client.get(url).data == {"rules": []}
+    admin_client.credentials()
+    assert admin_client.get(url).status_code == 401
@@ -0,0 +1,160 @@
+"""Module: Unit tests for the out-of-process fraud sidecar."""
+
+import datetime
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator, List
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from fraud import features
+from fraud.models import FraudDecisionRecord
+from fraud.services import get_engine, run_fraud_checks
+from fraud.sidecar import (HEADER, MAX_FRAME, ProtocolError, SidecarServer,
+                           encode, read_message, request_decision)
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+@pytest.fixture
+def sidecar(settings: Any) -> Iterator[SidecarServer]:
+    """A sidecar on a short temporary socket path, batching for 200ms."""
+    folder = tempfile.mkdtemp(prefix="fs")
+    path = str(Path(folder) / "fraud.sock")
+    server = SidecarServer(path, batch_window=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.FRAUD_SIDECAR_SOCKET = path
+    settings.FRAUD_SIDECAR_TIMEOUT = 5
+    yield server
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(folder)
+
+
+def test_socket_is_private_and_removed_on_close() -> None:
+    """The socket is created owner and group only, and the process
+    umask is restored."""
+    folder = tempfile.mkdtemp(prefix="fs")
+    path = str(Path(folder) / "fraud.sock")
+    before = os.umask(0o022)
+    try:
+        server = SidecarServer(path)
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+        assert os.umask(0o022) == 0o022
+        server.server_close()
+        assert not os.path.exists(path)
+    finally:
+        os.umask(before)
+        shutil.rmtree(folder)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_checks_run_on_the_sidecar(sidecar: SidecarServer) -> None:
+    """Outcomes and decision records should match in-process checks."""
+    user = User.objects.create_user(username="sc", email="sc@sc.io")
+    big = LoanApplication.objects.create(user=user, amount=6000000)
+    small = LoanApplication.objects.create(user=user, amount=100)
+
+    assert run_fraud_checks(big) == ["Amount exceeds threshold"]
+    assert run_fraud_checks(small) == []
+
+    assert (sidecar.batches, sidecar.evaluated) == (2, 2)
+    big.refresh_from_db()
+    small.refresh_from_db()
+    assert (big.status, small.status) == ("FLAGGED", "APPROVED")
+    record = FraudDecisionRecord.objects.get(loan=small)
+    assert record.features["amount"] == 100.0
+    assert record.config_version == get_engine().version
+
+
+@pytest.mark.django_db(transaction=True)
+def test_close_requests_share_one_batch(sidecar: SidecarServer) -> None:
+    """Requests arriving within the window are evaluated together."""
+    user = User.objects.create_user(username="sb", email="sb@sb.io")
+    loans = [
+        LoanApplication.objects.create(user=user, amount=amount)
+        for amount in (100, 2000000, 6000000)
+    ]
+    engine = get_engine()
+    gate = threading.Barrier(len(loans))
+    statuses: List[str] = []
+
+    def ask(loan: LoanApplication) -> None:
+        try:
+            gate.wait()
+            decision = request_decision(engine, loan)
+            statuses.append(decision.status if decision else "none")
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=ask, args=(loan,)) for loan in loans]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (sidecar.batches, sidecar.largest_batch) == (1, 3)
+    assert sorted(statuses) == ["APPROVED", "FLAGGED", "PENDING"]
+
+
+@pytest.mark.django_db
+def test_unavailable_sidecar_falls_back(settings: Any, caplog: Any) -> None:
+    """Without a listening socket the loan is evaluated in process."""
+    settings.FRAUD_SIDECAR_SOCKET = "/nonexistent/fraud.sock"
+    user = User.objects.create_user(username="fb", email="fb@fb.io")
+    loan = LoanApplication.objects.create(user=user, amount=6000000)
+
+    assert run_fraud_checks(loan) == ["Amount exceeds threshold"]
+    assert "Fraud sidecar at /nonexistent/fraud.sock unavailable" in (
+        caplog.text
+    )
+
+
+def test_frames_keep_decimals_and_times() -> None:
+    """Tagged values should round-trip; oversized frames are refused."""
+    message = {
+        "amount": Decimal("12.50"),
+        "at": datetime.datetime(2026, 1, 2, 3, 4, 5),
+        "seen": {1},
+    }
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(encode(message))
+        assert read_message(right) == {**message, "seen": [1]}
+        left.sendall(HEADER.pack(MAX_FRAME + 1))
+        with pytest.raises(ProtocolError):
+            read_message(right)
+    with pytest.raises(ProtocolError):
+        encode({"blob": "x" * MAX_FRAME})
+
+
+@pytest.mark.django_db
+def test_fallback_reuses_client_features(
+    settings: Any, monkeypatch: Any
+) -> None:
+    """Features the client loaded for the sidecar are not loaded again
+    by the in-process fallback."""
+    settings.FRAUD_SIDECAR_SOCKET = "/nonexistent/fraud.sock"
+    calls: List[Any] = []
+    original = features.load_query_features
+
+    def counting(*args: Any) -> Any:
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(features, "load_query_features", counting)
+    user = User.objects.create_user(username="fr", email="fr@fr.io")
+    loan = LoanApplication.objects.create(user=user, amount=100)
+
+    assert run_fraud_checks(loan) == []
+    assert len(calls) == 1
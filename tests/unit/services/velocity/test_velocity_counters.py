@@ -0,0 +1,154 @@
+"""Module: Unit tests for sliding-window velocity counters."""
+
+from typing import Any, Dict, List, Mapping
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+import fraud.velocity as velocity
+from fraud.velocity import (CacheBucketCounter, RedisSortedSetCounter,
+                            record_loan, recent_loan_count)
+from loan.models import LoanApplication
+
+User = get_user_model()
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the sorted-set commands used."""
+
+    def __init__(self) -> None:
+        self.zsets: Dict[str, Dict[str, float]] = {}
+        self.expiry: Dict[str, int] = {}
+
+    def pipeline(self) -> "FakeRedis":
+        return self
+
+    def execute(self) -> List[Any]:
+        return []
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> None:
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key: str, low: str, high: float) -> None:
+        zset = self.zsets.get(key, {})
+        for member in [m for m, s in zset.items() if s <= high]:
+            del zset[member]
+
+    def expire(self, key: str, seconds: int) -> None:
+        self.expiry[key] = seconds
+
+    def zcount(self, key: str, low: float, high: str) -> int:
+        return sum(1 for s in self.zsets.get(key, {}).values() if s >= low)
+
+
+def test_bucket_counter_counts_window_and_dedupes() -> None:
+    """Bucket counter should ignore duplicates and old buckets."""
+    counter = CacheBucketCounter(retention=3600, bucket_seconds=60)
+    now = timezone.now().timestamp()
+    counter.add("k", {1: now - 10, 2: now - 20})
+    counter.add("k", {2: now - 20, 3: now - 1800})
+    assert counter.count("k", 3600, now) == 3
+    assert counter.count("k", 600, now) == 2
+    assert counter.count("missing", 600, now) == 0
+
+
+def test_redis_counter_uses_sorted_set() -> None:
+    """Redis counter should add, trim and count via sorted-set commands."""
+    client = FakeRedis()
+    counter = RedisSortedSetCounter(client=client, retention=3600)
+    now = timezone.now().timestamp()
+    counter.add("k", {1: now - 10, 2: now - 7200})
+    counter.add("k", {})
+    assert counter.count("k", 3600, now) == 1
+    assert client.expiry["fraud:velocity:k"] == 3600
+    assert "2" not in client.zsets["fraud:velocity:k"]
+
+
+def test_get_counter_picks_backend(monkeypatch: Any, settings: Any) -> None:
+    """get_counter should choose the Redis counter for django-redis."""
+    monkeypatch.setattr(velocity, "_counter", None)
+    assert isinstance(velocity.get_counter(), CacheBucketCounter)
+    monkeypatch.setattr(velocity, "_counter", None)
+    monkeypatch.setattr(velocity, "RedisSortedSetCounter", lambda: "redis")
+    settings.CACHES = {
+        "default": {"BACKEND": "django_redis.cache.RedisCache"}
+    }
+    assert velocity.get_counter() == "redis"
+
+
+@pytest.mark.django_db
+def test_warm_counter_answers_without_query(
+    django_assert_num_queries: Any,
+) -> None:
+    """Once seeded, recorded loans should be counted without the loans
+    table."""
+    user = User.objects.create_user(
+        username="velo", email="velo@example.com", password="pw"
+    )
+    first = LoanApplication.objects.create(user=user, amount=1000)
+    record_loan(first)  # cold counter: left to the first evaluation
+    assert recent_loan_count(first) == 1
+    second = LoanApplication.objects.create(user=user, amount=1000)
+    record_loan(second)
+    with django_assert_num_queries(0):
+        assert recent_loan_count(second) == 2
+
+
+@pytest.mark.django_db
+def test_unrecorded_loan_catches_up_from_db() -> None:
+    """Loans created outside the API should still be counted."""
+    user = User.objects.create_user(
+        username="orm", email="orm@example.com", password="pw"
+    )
+    loans = [
+        LoanApplication.objects.create(user=user, amount=1000)
+        for _ in range(3)
+    ]
+    assert recent_loan_count(loans[0]) == 3
+    extra = LoanApplication.objects.create(user=user, amount=1000)
+    assert recent_loan_count(extra) == 4
+
+
+@pytest.mark.django_db
+def test_counter_failure_falls_back_to_row_count(monkeypatch: Any) -> None:
+    """A failing counter backend should fall back to a COUNT query."""
+
+    class BrokenCounter(CacheBucketCounter):
+        def add(self, key: str, members: Mapping[int, float]) -> None:
+            raise ConnectionError("down")
+
+        def count(self, key: str, window: int, now: float) -> int:
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(velocity, "_counter", BrokenCounter())
+    user = User.objects.create_user(
+        username="broken", email="broken@example.com", password="pw"
+    )
+    loan = LoanApplication.objects.create(user=user, amount=1000)
+    assert recent_loan_count(loan) == 1
+    cache.set(f"fraud.velocity.seen.user_{user.pk}", 0)
+    record_loan(loan)  # must swallow the failure
+
+
+@pytest.mark.django_db
+def test_create_endpoint_bumps_counter(
+    auth_client: APIClient, user: Any, settings: Any
+) -> None:
+    """Loans created through the API should feed the velocity rule."""
+    # Let the burst past the hourly window so only recent_loans fires
+    settings.FRAUD_RULE_THRESHOLDS = {"velocity_windows": {"max_loans_1h": 3}}
+    url = reverse("loan-list-create")
+    statuses = [
+        auth_client.post(url, {"amount": "100.00"}, format="json").data[
+            "status"
+        ]
+        for _ in range(4)
+    ]
+    assert statuses == ["APPROVED", "APPROVED", "APPROVED", "FLAGGED"]
+    last = LoanApplication.objects.filter(user=user).last()
+    assert last is not None
+    assert recent_loan_count(last) == 4
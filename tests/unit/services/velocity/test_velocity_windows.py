@@ -0,0 +1,121 @@
+import datetime
+from decimal import Decimal
+from typing import Any, List
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from fraud.engine import FraudEngine
+from fraud.rules import VelocityWindowsRule
+from fraud.services import get_engine
+from fraud.velocity import window_stats, window_stats_many
+from loan.models import LoanApplication
+
+User: Any = get_user_model()
+
+
+def _loans_aged(user: Any, hours: List[float], amount: int = 100) -> None:
+    """Create one loan per entry, backdated by that many hours."""
+    now = timezone.now()
+    for age in hours:
+        loan = LoanApplication.objects.create(user=user, amount=amount)
+        LoanApplication.objects.filter(pk=loan.pk).update(
+            created_at=now - datetime.timedelta(hours=age)
+        )
+
+
+@pytest.mark.django_db
+def test_window_stats_in_one_query(django_assert_num_queries) -> None:
+    user = User.objects.create_user(username="w1", password="pw")
+    _loans_aged(user, [0.1, 0.5, 5, 30, 100, 200], amount=1000)
+
+    with django_assert_num_queries(1):
+        stats = window_stats(user.pk)
+
+    assert stats == {
+        "count_1h": 2,
+        "count_24h": 3,
+        "count_7d": 5,
+        "amount_24h": Decimal("3000"),
+    }
+
+
+@pytest.mark.django_db
+def test_window_stats_many_ends_at_each_loan(
+    django_assert_num_queries,
+) -> None:
+    """Each loan's windows end at its creation, so later loans of the
+    same user never count against it."""
+    busy = User.objects.create_user(username="w2", password="pw")
+    idle = User.objects.create_user(username="w3", password="pw")
+    _loans_aged(busy, [0.1, 2, 2.5])
+    _loans_aged(idle, [300])
+    newest, middle, oldest = LoanApplication.objects.filter(
+        user=busy
+    ).order_by("pk")
+    lone = LoanApplication.objects.get(user=idle)
+
+    with django_assert_num_queries(1):
+        stats = window_stats_many([newest, middle, oldest, lone])
+
+    assert stats[newest.pk]["count_1h"] == 1
+    assert stats[newest.pk]["count_24h"] == 3
+    assert stats[middle.pk]["count_1h"] == 2
+    assert stats[oldest.pk]["count_24h"] == 1
+    assert stats[lone.pk]["count_7d"] == 1
+    assert window_stats(idle.pk)["amount_24h"] == Decimal(0)
+
+
+@pytest.mark.parametrize(
+    "overrides, hours, amount",
+    [
+        ({"max_loans_1h": 1}, [0.1, 0.2], 100),
+        ({"max_loans_24h": 1}, [0.1, 10], 100),
+        ({"max_loans_7d": 1}, [0.1, 100], 100),
+        ({"max_amount_24h": 150}, [0.1, 10], 100),
+    ],
+)
+@pytest.mark.django_db
+def test_each_window_limit_flags(overrides, hours, amount) -> None:
+    user = User.objects.create_user(username="w4", password="pw")
+    _loans_aged(user, hours, amount)
+    loan = LoanApplication.objects.filter(user=user).first()
+    assert loan is not None
+    engine = FraudEngine([VelocityWindowsRule(**overrides)])
+
+    assert engine.evaluate(loan).status == "FLAGGED"
+    assert engine.evaluate_many([loan])[loan.pk].status == "FLAGGED"
+    assert FraudEngine([VelocityWindowsRule()]).evaluate(loan).reasons == []
+
+
+@pytest.mark.django_db
+def test_default_hourly_limit_is_tighter_than_daily() -> None:
+    """With the defaults a burst within an hour is flagged while the same
+    number of loans spread over the day is not."""
+    burst = User.objects.create_user(username="w6", password="pw")
+    spread = User.objects.create_user(username="w7", password="pw")
+    _loans_aged(burst, [0.1, 0.2, 0.3])
+    _loans_aged(spread, [0.1, 5, 10])
+    engine = get_engine()
+
+    for user, expected in ((burst, "FLAGGED"), (spread, "APPROVED")):
+        loan = LoanApplication.objects.filter(user=user).first()
+        assert loan is not None
+        assert engine.evaluate(loan).status == expected
+
+
+@pytest.mark.django_db
+def test_thresholds_come_from_settings(settings) -> None:
+    settings.FRAUD_RULE_THRESHOLDS = {
+        "velocity_windows": {"max_loans_1h": 0}
+    }
+    user = User.objects.create_user(username="w5", password="pw")
+    loan = LoanApplication.objects.create(user=user, amount=100)
+
+    decision = get_engine().evaluate(loan)
+
+    assert decision.status == "FLAGGED"
+    assert decision.reasons == [
+        "Loan velocity over limits (0/1h, 3/24h, 10/7d or 10000000 per 24h)"
+    ]
@@ -6,6 +6,7 @@ from django.core.cache import cache
 from rest_framework.test import APIRequestFactory
 
 from fraud.models import FraudFlag
+from fraud.reasons import reason_code
 from fraud.views import FlaggedLoanHistoryListView, FlaggedLoanListView
 from loan.models import LoanApplication
 
@@ -62,7 +63,9 @@ def test_flagged_loan_history_view_default_branch() -> None:
     )
     # Create a loan and a fraud flag (history)
     loan2 = LoanApplication.objects.create(user=user2, amount=200.00)
-    FraudFlag.objects.create(loan=loan2, reason="Test history flag")
+    FraudFlag.objects.create(
+        loan=loan2, reason_id=reason_code("Test history flag")
+    )
 
     factory2 = APIRequestFactory()
     request2 = factory2.get("/fraud/history/?page=1")
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self) -> None:
+        """Called when Django starts; imports signal handlers keeping
+        email-domain counts current."""
+        import users.signals  # noqa: F401
@@ -0,0 +1,87 @@
+"""
+Module: Management command backfilling email domains and domain counts.
+
+Streams existing users in primary-key chunks, upserts a UserProfile
+with the normalized email domain for each, then rebuilds
+DomainUserCount from the profiles with a single aggregation.
+
+Usage:
+    python manage.py backfill_email_domains [--chunk-size N]
+"""
+
+from typing import Any, Dict, List
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import Count
+
+from users.models import DomainUserCount, UserProfile, normalize_email_domain
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Backfill UserProfile.email_domain and rebuild DomainUserCount."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Users read and written per batch (default: 2000).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        chunk_size: int = options["chunk_size"]
+        users = (
+            User.objects.order_by("pk")
+            .values_list("pk", "email")
+            .iterator(chunk_size=chunk_size)
+        )
+        chunk: List[UserProfile] = []
+        processed = 0
+        for pk, email in users:
+            chunk.append(
+                UserProfile(
+                    user_id=pk, email_domain=normalize_email_domain(email)
+                )
+            )
+            if len(chunk) >= chunk_size:
+                processed += self._write_profiles(chunk)
+                chunk = []
+        if chunk:
+            processed += self._write_profiles(chunk)
+
+        counts: Dict[str, int] = dict(
+            UserProfile.objects.exclude(email_domain="")
+            .order_by()
+            .values("email_domain")
+            .annotate(n=Count("pk"))
+            .values_list("email_domain", "n")
+        )
+        with transaction.atomic():
+            DomainUserCount.objects.all().delete()
+            DomainUserCount.objects.bulk_create(
+                [
+                    DomainUserCount(domain=domain, user_count=n)
+                    for domain, n in counts.items()
+                ],
+                batch_size=chunk_size,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled {processed} profiles across "
+                f"{len(counts)} domains."
+            )
+        )
+
+    def _write_profiles(self, chunk: List[UserProfile]) -> int:
+        """Upsert one chunk of profiles; returns the chunk size."""
+        UserProfile.objects.bulk_create(
+            chunk,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["email_domain"],
+        )
+        return len(chunk)
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Initial migration for the users app.
+
+    This migration creates:
+    - 'DomainUserCount': 'domain' CharField primary key and
+    'user_count' PositiveIntegerField(default=0).
+    - 'UserProfile': OneToOne 'user' primary key to AUTH_USER_MODEL
+    and an indexed 'email_domain' CharField(max_length=255).
+    Existing users are populated with `manage.py backfill_email_domains`.
+    """
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DomainUserCount",
+            fields=[
+                (
+                    "domain",
+                    models.CharField(
+                        max_length=255,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("user_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserProfile",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="profile",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "email_domain",
+                    models.CharField(
+                        blank=True,
+                        db_index=True,
+                        default="",
+                        max_length=255,
+                    ),
+                ),
+            ],
+        ),
+    ]
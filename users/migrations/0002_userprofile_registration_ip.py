@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration to record the address each user registered from.
+
+    This migration adds a nullable, indexed 'registration_ip' to
+    'UserProfile', used to link accounts into fraud clusters.
+    """
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="registration_ip",
+            field=models.GenericIPAddressField(
+                blank=True, db_index=True, null=True
+            ),
+        ),
+    ]
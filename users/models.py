@@ -0,0 +1,84 @@
+"""
+Module: Defines per-user profile data and per-domain user counts.
+
+Attributes:
+    UserProfile: Normalized, indexed email domain for each user.
+    DomainUserCount: Number of users per email domain, maintained
+        incrementally so the fraud domain rule is a primary-key lookup.
+"""
+
+from django.conf import settings
+from django.db import models
+
+
+def normalize_email_domain(email: str) -> str:
+    """Return the lower-cased domain part of an email address.
+
+    Args:
+        email (str): Email address, possibly empty.
+
+    Returns:
+        str: The domain, or an empty string when there is none.
+    """
+    if not email or "@" not in email:
+        return ""
+    return email.rsplit("@", 1)[-1].strip().lower()
+
+
+class UserProfile(models.Model):
+    """Extra per-user data kept alongside the auth user.
+
+    Attributes:
+        user (OneToOneField): The user; also the primary key.
+        email_domain (str): Normalized domain of the user's email.
+        registration_ip (str): Client address the account was registered
+            from, if known.
+    """
+
+    user: models.OneToOneField = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="profile",
+    )
+    email_domain: models.CharField = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        db_index=True,
+    )
+    registration_ip: models.GenericIPAddressField = (
+        models.GenericIPAddressField(null=True, blank=True, db_index=True)
+    )
+
+    def __str__(self) -> str:
+        """Return a string representation of the UserProfile instance.
+
+        Returns:
+            str: Formatted string containing user id and domain.
+        """
+        return f"Profile {self.pk} - {self.email_domain}"
+
+
+class DomainUserCount(models.Model):
+    """Number of users whose email belongs to a domain.
+
+    Attributes:
+        domain (str): Normalized email domain; the primary key.
+        user_count (int): Users currently registered with the domain.
+    """
+
+    domain: models.CharField = models.CharField(
+        max_length=255, primary_key=True
+    )
+    user_count: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0
+    )
+
+    def __str__(self) -> str:
+        """Return a string representation of the DomainUserCount instance.
+
+        Returns:
+            str: Formatted string containing domain and count.
+        """
+        return f"{self.domain}: {self.user_count}"
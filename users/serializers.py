@@ -8,6 +8,7 @@ from typing import Any, Dict
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
+from django.db import transaction
 from rest_framework import serializers
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -41,16 +42,21 @@ class RegisterSerializer(serializers.ModelSerializer):
         """
         Create a new User instance.
 
+        The user row, its UserProfile email domain and the domain's user
+        count are written in one transaction; the latter two by the
+        post_save handler in users.signals.
+
         Args:
             validated_data (Dict[str, Any]): Validated user creation data.
 
         Returns:
             User: The newly created User instance.
         """
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data.get("email"),
-            password=validated_data["password"],
-        )
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=validated_data["username"],
+                email=validated_data.get("email"),
+                password=validated_data["password"],
+            )
         logger.info("Registered new user: %s", user.username)
         return user
@@ -0,0 +1,75 @@
+"""
+Module: Services keeping user email-domain data in sync.
+
+The fraud domain rule reads DomainUserCount by primary key, so every
+change to a user's email domain adjusts the counts incrementally here.
+"""
+
+import logging
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import transaction
+from django.db.models import F
+
+from .models import DomainUserCount, UserProfile, normalize_email_domain
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def _adjust_domain_count(domain: str, delta: int) -> None:
+    """Add ``delta`` to a domain's user count, creating the row if
+    needed."""
+    if not domain:
+        return
+    if delta > 0:
+        DomainUserCount.objects.get_or_create(domain=domain)
+    DomainUserCount.objects.filter(domain=domain).update(
+        user_count=F("user_count") + delta
+    )
+
+
+def sync_email_domain(user: AbstractBaseUser) -> None:
+    """Record a user's current email domain and update domain counts.
+
+    Idempotent: nothing is written when the stored domain is current.
+
+    Args:
+        user (AbstractBaseUser): A saved user instance.
+    """
+    domain = normalize_email_domain(
+        getattr(user, "email", "")  # type: ignore[arg-type]
+    )
+    with transaction.atomic():
+        profile, created = (
+            UserProfile.objects.select_for_update().get_or_create(
+                user_id=user.pk, defaults={"email_domain": domain}
+            )
+        )
+        if not created:
+            if profile.email_domain == domain:
+                return
+            logger.info(
+                "User id=%s email domain changed from %s to %s",
+                user.pk,
+                profile.email_domain,
+                domain,
+            )
+            _adjust_domain_count(profile.email_domain, -1)
+            profile.email_domain = domain
+            profile.save(update_fields=["email_domain"])
+        _adjust_domain_count(domain, 1)
+
+
+def release_email_domain(user: AbstractBaseUser) -> None:
+    """Remove a user that is about to be deleted from the domain counts.
+
+    Args:
+        user (AbstractBaseUser): The user being deleted.
+    """
+    domain = (
+        UserProfile.objects.filter(user_id=user.pk)
+        .values_list("email_domain", flat=True)
+        .first()
+    )
+    if domain:
+        _adjust_domain_count(domain, -1)
@@ -0,0 +1,39 @@
+"""
+Module: Signal handlers for users app.
+
+Keep UserProfile.email_domain and DomainUserCount current for every
+user save, including users created outside the registration endpoint
+(createsuperuser, admin, fixtures).
+"""
+
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .services import release_email_domain, sync_email_domain
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(
+    sender: Any,
+    instance: Any,
+    created: bool,
+    update_fields: Optional[frozenset] = None,
+    raw: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Sync the email domain when a user is created or the email may have
+    changed."""
+    if raw:
+        return
+    if update_fields is not None and "email" not in update_fields:
+        return
+    sync_email_domain(instance)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender: Any, instance: Any, **kwargs: Any) -> None:
+    """Release the user's domain before the profile cascade removes it."""
+    release_email_domain(instance)
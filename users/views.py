@@ -15,6 +15,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from fraud.clusters import client_ip, link_registration
+from fraud.risk_features import create_risk_features
+
 from .serializers import RegisterSerializer, UserSerializer
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -45,6 +48,8 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
+        link_registration(user, client_ip(request))
+        create_risk_features(user)
         refresh = RefreshToken.for_user(user)
         logger.info(
             "Issued JWT refresh and access tokens for user: %s",